@@ -0,0 +1,92 @@
+"""Per-call latency of a new client per call versus the pooled pocketflow.llm registry.
+
+    python benchmarks/bench_llm_clients.py [--calls 200] [--delay-ms 0]
+
+Runs against a local OpenAI-compatible mock server (plain HTTP/1.1 with
+keep-alive), so the gap is connection setup plus client construction. Over
+TLS to a real provider the handshake makes the fresh-client path slower still.
+Uses the openai SDK if installed, otherwise raw httpx calls.
+"""
+import argparse, importlib.util, json, sys, threading, time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import llm
+from pocketflow.profiler import percentile
+
+class MockOpenAI(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True  # headers and body are separate writes
+    delay = 0.0
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        time.sleep(self.delay)
+        inputs = body.get("input", [])
+        data = json.dumps({
+            "object": "list", "model": body["model"], "usage": {"prompt_tokens": 1, "total_tokens": 1},
+            "data": [{"object": "embedding", "index": i, "embedding": [0.1] * 8} for i in range(len(inputs))],
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+    def log_message(self, *args): pass
+
+def make_call(base_url, fresh):
+    payload = {"model": "text-embedding-ada-002", "input": ["hello world"]}
+    if importlib.util.find_spec("openai"):
+        from openai import OpenAI
+        if fresh:
+            def call():
+                with OpenAI(api_key="mock", base_url=base_url) as client:
+                    client.embeddings.create(**payload)
+        else:
+            client = llm.get_client("openai", api_key="mock", base_url=base_url)
+            def call(): client.embeddings.create(**payload)
+        return call
+    import httpx
+    url = base_url + "/embeddings"
+    if fresh:
+        def call():
+            with httpx.Client() as client:
+                client.post(url, json=payload).raise_for_status()
+    else:
+        def call(): llm.get_client("http").post(url, json=payload).raise_for_status()
+    return call
+
+def bench(call, calls):
+    call()  # warm-up: imports and, for the pooled client, the first connection
+    times = []
+    for _ in range(calls):
+        t0 = time.perf_counter()
+        call()
+        times.append((time.perf_counter() - t0) * 1000)
+    return times
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--delay-ms", type=float, default=0.0, help="simulated server processing time")
+    args = parser.parse_args()
+    MockOpenAI.delay = args.delay_ms / 1000
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MockOpenAI)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}/v1"
+    sdk = "openai SDK" if importlib.util.find_spec("openai") else "httpx"
+    print(f"{args.calls} embedding calls via {sdk}, HTTP/2 {'available' if llm.HTTP2 else 'unavailable (pip install h2)'}")
+    try:
+        results = {}
+        for name, fresh in (("new client per call", True), ("pooled registry", False)):
+            t = results[name] = bench(make_call(base_url, fresh), args.calls)
+            print(f"{name:20s}: mean {sum(t) / len(t):7.2f} ms  p50 {percentile(t, 50):7.2f} ms  p95 {percentile(t, 95):7.2f} ms")
+        fresh, pooled = (sum(t) / len(t) for t in results.values())
+        print(f"{'speedup':20s}: {fresh / pooled:7.2f}x")
+    finally:
+        llm.registry.close()
+        server.shutdown()
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Throughput of ProcessPoolBatchNode with pickling versus ShmTransport for large numpy payloads.
+
+    python benchmarks/bench_shm_transport.py [--items 64] [--mb 8] [--workers 4] [--chunksize 1]
+
+Each item is an --mb MB float32 array. The "reduce" workload returns a few
+floats per item, so only the inputs are large; "map" returns an array of the
+same size, so results are large too. Throughput counts input plus result bytes.
+"""
+import argparse, sys, time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+import numpy as np
+from pocketflow import ProcessPoolBatchNode
+from pocketflow.shm import ShmTransport
+
+class Reduce(ProcessPoolBatchNode):
+    def prep(self, shared): return shared["arrays"]
+    def exec(self, a): return (float(a.mean()), float(a.std()))
+    def post(self, shared, prep_res, exec_res_list): shared["out"] = exec_res_list
+
+class Map(Reduce):
+    def exec(self, a): return a * 0.5
+
+def run(cls, arrays, shm, workers, chunksize, repeat):
+    node = cls(max_workers=workers, chunksize=chunksize)
+    node.transport = ShmTransport() if shm else None
+    best = float("inf")
+    for _ in range(repeat):
+        shared = {"arrays": arrays}
+        t0 = time.perf_counter()
+        node.run(shared)
+        best = min(best, time.perf_counter() - t0)
+    out_bytes = sum(getattr(r, "nbytes", 0) for r in shared["out"])
+    return best, (sum(a.nbytes for a in arrays) + out_bytes) / best / 2**20
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=64)
+    parser.add_argument("--mb", type=float, default=8)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--chunksize", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    n = int(args.mb * 2**20 / 4)
+    rng = np.random.default_rng(0)
+    arrays = [rng.random(n, dtype=np.float32) for _ in range(args.items)]
+    print(f"{args.items} x {args.mb} MB float32, {args.workers} workers, chunksize {args.chunksize}")
+    for name, cls in [("reduce", Reduce), ("map", Map)]:
+        (tp, pickled), (ts, shared) = (run(cls, arrays, shm, args.workers, args.chunksize, args.repeat) for shm in (False, True))
+        print(f"{name:7s} pickle {tp:7.2f}s {pickled:9.0f} MB/s   shm {ts:7.2f}s {shared:9.0f} MB/s   x{tp / ts:.1f}")
+
+if __name__ == "__main__":
+    main()
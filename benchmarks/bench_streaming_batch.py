@@ -0,0 +1,77 @@
+"""Peak RSS of StreamingBatchNode versus BatchNode on a synthetic multi-GB CSV.
+
+    python benchmarks/bench_streaming_batch.py [--size-mb 2048] [--chunk-rows 50000] [--compare]
+
+Each mode runs in its own subprocess so peak RSS is measured independently.
+--compare also runs the plain BatchNode, whose memory grows with the file.
+"""
+import argparse, csv, os, random, resource, subprocess, sys, tempfile, time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import BatchNode, StreamingBatchNode
+
+def write_csv(path, size_mb):
+    rng, target = random.Random(42), size_mb * 1024 * 1024
+    with open(path, "w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["id", "amount", "product", "note"])
+        i = 0
+        while f.tell() < target:
+            w.writerows([i + j, f"{rng.gauss(100, 30):.2f}", rng.choice("ABC"), "x" * 40] for j in range(10_000))
+            i += 10_000
+
+def read_chunks(path, chunk_rows):
+    with open(path, newline="") as f:
+        reader = csv.reader(f)
+        next(reader)
+        chunk = []
+        for row in reader:
+            chunk.append(row)
+            if len(chunk) == chunk_rows:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+class ChunkStats:
+    def prep(self, shared): return read_chunks(shared["path"], shared["chunk_rows"])
+    def exec(self, chunk): return [float(row[1]) for row in chunk]  # the "processed" chunk
+
+class BatchStats(ChunkStats, BatchNode):
+    def post(self, shared, prep_res, exec_res_list):
+        shared["rows"] = sum(len(r) for r in exec_res_list)
+        shared["total"] = sum(sum(r) for r in exec_res_list)
+
+class StreamingStats(ChunkStats, StreamingBatchNode):
+    def post_item(self, shared, chunk, amounts):
+        shared["rows"] = shared.get("rows", 0) + len(amounts)
+        shared["total"] = shared.get("total", 0) + sum(amounts)
+
+def run_mode(mode, path, chunk_rows):
+    shared = {"path": path, "chunk_rows": chunk_rows}
+    t0 = time.perf_counter()
+    (StreamingStats if mode == "streaming" else BatchStats)().run(shared)
+    elapsed = time.perf_counter() - t0
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+    print(f"{mode:10s}: {shared['rows']:>12,} rows  {elapsed:8.1f}s  peak RSS {peak_mb:8.1f} MB")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=int, default=2048)
+    parser.add_argument("--chunk-rows", type=int, default=50_000)
+    parser.add_argument("--compare", action="store_true")
+    parser.add_argument("--mode", choices=["streaming", "batch"], help=argparse.SUPPRESS)
+    parser.add_argument("--path", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.mode:
+        return run_mode(args.mode, args.path, args.chunk_rows)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "sales.csv")
+        print(f"Writing {args.size_mb} MB synthetic CSV...")
+        write_csv(path, args.size_mb)
+        for mode in ["streaming"] + (["batch"] if args.compare else []):
+            subprocess.run([sys.executable, __file__, "--mode", mode, "--path", path, "--chunk-rows", str(args.chunk_rows)], check=True)
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,9 @@
-from openai import OpenAI
+from pocketflow.llm import get_client
 import os
 from duckduckgo_search import DDGS
 
 def call_llm(prompt):    
-    client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY", "your-api-key"))
+    client = get_client("openai", api_key=os.environ.get("OPENAI_API_KEY", "your-api-key"))
     r = client.chat.completions.create(
         model="gpt-4o",
         messages=[{"role": "user", "content": prompt}]
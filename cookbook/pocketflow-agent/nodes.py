@@ -1,5 +1,6 @@
 from pocketflow import Node
-from utils import call_llm, search_web_duckduckgo
+from pocketflow.cache import SemanticCache
+from utils import call_llm, search_web_duckduckgo, get_embedding
 import yaml
 
 class DecideAction(Node):
@@ -100,6 +101,9 @@ class SearchWeb(Node):
         return "decide"
 
 class AnswerQuestion(Node):
+    # Near-identical questions get the earlier researched answer; keyed on the question alone
+    cache = SemanticCache(get_embedding, threshold=0.95, maxsize=10_000, ttl=24 * 3600, text=lambda inputs: inputs[0])
+
     def prep(self, shared):
         """Get the question and context for answering."""
         return shared["question"], shared.get("context", "")
@@ -1,16 +1,21 @@
-from openai import OpenAI
+from pocketflow.llm import get_client
 import os
 from duckduckgo_search import DDGS
 import requests
 
 def call_llm(prompt):    
-    client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY", "your-api-key"))
+    client = get_client("openai", api_key=os.environ.get("OPENAI_API_KEY", "your-api-key"))
     r = client.chat.completions.create(
         model="gpt-4o",
         messages=[{"role": "user", "content": prompt}]
     )
     return r.choices[0].message.content
 
+def get_embedding(text):
+    client = get_client("openai", api_key=os.environ.get("OPENAI_API_KEY", "your-api-key"))
+    response = client.embeddings.create(model="text-embedding-ada-002", input=text)
+    return response.data[0].embedding
+
 def search_web_duckduckgo(query):
     results = DDGS().text(query, max_results=5)
     # Convert results to a string
@@ -1,8 +1,12 @@
 import pandas as pd
-from pocketflow import BatchNode
+from pocketflow import StreamingBatchNode
 
-class CSVProcessor(BatchNode):
-    """BatchNode that processes a large CSV file in chunks."""
+class CSVProcessor(StreamingBatchNode):
+    """StreamingBatchNode that processes a large CSV file in chunks.
+
+    Each chunk's statistics are folded into running totals as soon as
+    the chunk is processed, so memory stays constant regardless of file size.
+    """
     
     def __init__(self, chunk_size=1000):
         """Initialize with chunk size."""
@@ -36,26 +40,36 @@ class CSVProcessor(BatchNode):
             "total_amount": chunk["amount"].sum()
         }
     
-    def post(self, shared, prep_res, exec_res_list):
-        """Combine results from all chunks.
+    def post_item(self, shared, chunk, res):
+        """Fold one chunk's statistics into the running totals.
+        
+        Args:
+            chunk: The DataFrame that was just processed
+            res: Statistics returned by exec for this chunk
+        """
+        totals = shared.setdefault("totals", {"total_sales": 0, "num_transactions": 0, "total_amount": 0})
+        for key in totals:
+            totals[key] += res[key]
+    
+    def post(self, shared, prep_res, exec_res):
+        """Turn the running totals into final statistics.
         
         Args:
-            prep_res: Original chunks iterator
-            exec_res_list: List of results from each chunk
+            prep_res: Original chunks iterator (already consumed)
+            exec_res: None, results were handled by post_item
             
         Returns:
             str: Action to take next
         """
-        # Combine statistics from all chunks
-        total_sales = sum(res["total_sales"] for res in exec_res_list)
-        total_transactions = sum(res["num_transactions"] for res in exec_res_list)
-        total_amount = sum(res["total_amount"] for res in exec_res_list)
+        # An empty CSV yields no chunks, so post_item never created the totals
+        totals = shared.pop("totals", {"total_sales": 0, "num_transactions": 0, "total_amount": 0})
+        count = totals["num_transactions"]
         
         # Calculate final statistics
         shared["statistics"] = {
-            "total_sales": total_sales,
-            "average_sale": total_amount / total_transactions,
-            "total_transactions": total_transactions
+            "total_sales": totals["total_sales"],
+            "average_sale": totals["total_amount"] / count if count else 0,
+            "total_transactions": totals["num_transactions"]
         }
         
         return "show_stats" 
\ No newline at end of file
@@ -1,4 +1,9 @@
+import sys
 from flow import chat_flow
+from utils.vector_index import MemoryStore
+from utils.archive_queue import ArchiveQueue
+from utils.call_llm import summarize_conversations
+from utils.get_embedding import get_embedding
 
 def run_chat_memory_demo():
     """
@@ -6,10 +11,18 @@ def run_chat_memory_demo():
     
     Features:
     1. Maintains a window of the 3 most recent conversation pairs
-    2. Archives older conversations with embeddings
+    2. Archives older conversations with embeddings, on disk and per user
     3. Retrieves 1 relevant past conversation when needed
     4. Total context to LLM: 3 recent pairs + 1 retrieved pair
+    5. Summarizes the oldest memories once a user has more than 500
+
+    Pass a user name as the first argument to keep separate memories per user.
     """
+    user_id = sys.argv[1] if len(sys.argv) > 1 else "default"
+    memory = MemoryStore("chat_memory.db", max_items=500, evict_batch=20,
+                         summarize=summarize_conversations, embed=get_embedding)
+    # Embeds and stores archived conversations in the background, in batches
+    archiver = ArchiveQueue(memory)
     
     print("=" * 50)
     print("PocketFlow Chat with Memory")
@@ -20,7 +33,11 @@ def run_chat_memory_demo():
     print("=" * 50)
     
     # Run the chat flow
-    chat_flow.run({})
+    try:
+        chat_flow.run({"memory": memory, "archiver": archiver, "user_id": user_id})
+    finally:
+        archiver.close()
+        memory.close()
 
 if __name__ == "__main__":
     run_chat_memory_demo()
\ No newline at end of file
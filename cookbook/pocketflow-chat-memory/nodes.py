@@ -1,5 +1,6 @@
 from pocketflow import Node
-from utils.vector_index import create_index, add_vector, search_vectors
+from utils.vector_index import MemoryStore
+from utils.lexical_index import reciprocal_rank_fusion
 from utils.call_llm import call_llm
 from utils.get_embedding import get_embedding
 
@@ -8,6 +9,9 @@ class GetUserQuestionNode(Node):
         """Initialize messages if first run"""
         if "messages" not in shared:
             shared["messages"] = []
+            # Long-term memory: main.py passes a persistent store, otherwise it lives in RAM
+            shared.setdefault("memory", MemoryStore())
+            shared.setdefault("user_id", "default")
             print("Welcome to the interactive chat! Type 'exit' to end the conversation.")
         
         return None
@@ -43,15 +47,16 @@ class AnswerNode(Node):
         # 1. Get the last 3 conversation pairs (or fewer if not available)
         recent_messages = shared["messages"][-6:] if len(shared["messages"]) > 6 else shared["messages"]
         
-        # 2. Add the retrieved relevant conversation if available
+        # 2. Add the retrieved relevant conversations if available
         context = []
-        if shared.get("retrieved_conversation"):
-            # Add a system message to indicate this is a relevant past conversation
+        if shared.get("retrieved_conversations"):
+            # Add a system message to indicate these are relevant past conversations
             context.append({
                 "role": "system", 
-                "content": "The following is a relevant past conversation that may help with the current query:"
+                "content": "The following are relevant past conversations that may help with the current query:"
             })
-            context.extend(shared["retrieved_conversation"])
+            for conversation in shared["retrieved_conversations"]:
+                context.extend(conversation)
             context.append({
                 "role": "system", 
                 "content": "Now continue the current conversation:"
@@ -101,48 +106,62 @@ class EmbedNode(Node):
         # Remove them from current messages
         shared["messages"] = shared["messages"][2:]
         
-        return oldest_pair
+        return oldest_pair, shared.get("archiver")
     
-    def exec(self, conversation):
-        """Embed a conversation"""
-        if not conversation:
+    def exec(self, inputs):
+        """Embed a conversation, or leave it to the archive queue"""
+        if not inputs:
             return None
+        conversation, archiver = inputs
             
         # Combine user and assistant messages into a single text for embedding
         user_msg = next((msg for msg in conversation if msg["role"] == "user"), {"content": ""})
         assistant_msg = next((msg for msg in conversation if msg["role"] == "assistant"), {"content": ""})
         combined = f"User: {user_msg['content']} Assistant: {assistant_msg['content']}"
         
+        # With an archive queue the embedding happens in the background
+        if archiver is not None:
+            return {"conversation": conversation, "text": combined}
+        
         # Generate embedding
         embedding = get_embedding(combined)
         
         return {
             "conversation": conversation,
+            "text": combined,
             "embedding": embedding
         }
     
     def post(self, shared, prep_res, exec_res):
-        """Store the embedding and add to index"""
+        """Store the conversation and its embedding in the user's memory"""
         if not exec_res:
             # If there's nothing to embed, just continue with the next question
             return "question"
             
-        # Initialize vector index if not exist
-        if "vector_index" not in shared:
-            shared["vector_index"] = create_index()
-            shared["vector_items"] = []  # Track items separately
-            
-        # Add the embedding to the index and store the conversation
-        position = add_vector(shared["vector_index"], exec_res["embedding"])
-        shared["vector_items"].append(exec_res["conversation"])
+        memory, user = shared["memory"], shared["user_id"]
+        if "embedding" not in exec_res:
+            shared["archiver"].submit(user, exec_res["conversation"], exec_res["text"])
+            print("✅ Queued conversation for archiving")
+            return "question"
+        
+        memory_id = memory.add(user, exec_res["conversation"], exec_res["text"], exec_res["embedding"])
         
-        print(f"✅ Added conversation to index at position {position}")
-        print(f"✅ Index now contains {len(shared['vector_items'])} conversations")
+        print(f"✅ Added conversation to memory with id {memory_id}")
+        print(f"✅ Memory now contains {memory.count(user)} conversations")
         
         # Continue with the next question
         return "question"
 
 class RetrieveNode(Node):
+    def __init__(self, k=1, candidates=5, skip_coverage=0.9, skip_margin=2.0, **kwargs):
+        super().__init__(**kwargs)
+        # Retrieve the top k past conversations, fusing the top `candidates` of
+        # BM25 and vector search. Skip embedding the question when the best
+        # keyword hit covers skip_coverage of its idf weight and beats the
+        # runner-up by skip_margin; None always embeds.
+        self.k, self.candidates = k, max(k, candidates)
+        self.skip_coverage, self.skip_margin = skip_coverage, skip_margin
+
     def prep(self, shared):
         """Get the current query for retrieval"""
         if not shared.get("messages"):
@@ -152,52 +171,62 @@ class RetrieveNode(Node):
         latest_user_msg = next((msg for msg in reversed(shared["messages"]) 
                                 if msg["role"] == "user"), {"content": ""})
         
-        # Check if we have a vector index with items
-        if ("vector_index" not in shared or 
-            "vector_items" not in shared or 
-            len(shared["vector_items"]) == 0):
+        # Wait for this user's queued archive writes, so retrieval sees every
+        # conversation that has left the window
+        if shared.get("archiver"):
+            shared["archiver"].wait(shared["user_id"])
+        
+        # Check if the user has any memories yet
+        if shared["memory"].count(shared["user_id"]) == 0:
             return None
             
         return {
             "query": latest_user_msg["content"],
-            "vector_index": shared["vector_index"],
-            "vector_items": shared["vector_items"]
+            "memory": shared["memory"],
+            "user_id": shared["user_id"]
         }
     
     def exec(self, inputs):
-        """Find the most relevant past conversation"""
+        """Find the most relevant past conversations"""
         if not inputs:
             return None
             
-        query = inputs["query"]
-        vector_index = inputs["vector_index"]
-        vector_items = inputs["vector_items"]
+        query, memory, user = inputs["query"], inputs["memory"], inputs["user_id"]
         
         print(f"🔍 Finding relevant conversation for: {query[:30]}...")
         
+        # Keyword search first: a confident match needs no embedding call
+        lexical = memory.lexical_search(user, query, k=self.candidates)
+        if (self.skip_coverage is not None and lexical and lexical[0][2] >= self.skip_coverage
+                and (len(lexical) == 1 or lexical[0][1] >= self.skip_margin * lexical[1][1])):
+            return {"conversations": [item["conversation"] for item, _, _ in lexical[:self.k]],
+                    "mode": "lexical", "score": lexical[0][1]}
+        
         # Create embedding for the query
         query_embedding = get_embedding(query)
         
-        # Search for the most similar conversation
-        indices, distances = search_vectors(vector_index, query_embedding, k=1)
+        # Search for the most similar conversations and fuse both rankings
+        dense = memory.search(user, query_embedding, k=self.candidates)[0]
+        items = {item["id"]: item for item, _ in dense}
+        items.update((item["id"], item) for item, _, _ in lexical)
+        fused = reciprocal_rank_fusion([[item["id"] for item, _ in dense], [item["id"] for item, _, _ in lexical]])
         
-        if not indices:
+        if not fused:
             return None
             
-        # Get the corresponding conversation
-        conversation = vector_items[indices[0]]
-        
         return {
-            "conversation": conversation,
-            "distance": distances[0]
+            "conversations": [items[i]["conversation"] for i, _ in fused[:self.k]],
+            "mode": "hybrid",
+            "score": fused[0][1]
         }
     
     def post(self, shared, prep_res, exec_res):
-        """Store the retrieved conversation"""
+        """Store the retrieved conversations"""
         if exec_res is not None:
-            shared["retrieved_conversation"] = exec_res["conversation"]
-            print(f"📄 Retrieved conversation (distance: {exec_res['distance']:.4f})")
+            shared["retrieved_conversations"] = exec_res["conversations"]
+            print(f"📄 Retrieved {len(exec_res['conversations'])} conversation(s) "
+                  f"({exec_res['mode']} score: {exec_res['score']:.4f})")
         else:
-            shared["retrieved_conversation"] = None
+            shared["retrieved_conversations"] = None
         
         return "answer"
\ No newline at end of file
@@ -0,0 +1,73 @@
+import asyncio
+import concurrent.futures
+import threading
+import warnings
+from pocketflow.batching import MicroBatcher
+try:
+    from utils.get_embedding import get_embeddings_async
+except ImportError:  # run as a script from inside utils/
+    from get_embedding import get_embeddings_async
+
+class ArchiveQueue:
+    """Write-behind archiving into a MemoryStore on a background event loop.
+
+    submit() returns immediately, so a chat turn never waits for an embedding.
+    Conversations submitted within max_wait of each other, from any session,
+    share one embeddings request and one commit. wait(user) blocks until that
+    user's queued conversations are searchable, which keeps retrieval
+    consistent; the queue usually drains while the user is still typing."""
+
+    def __init__(self, memory, embed_batch=get_embeddings_async, max_batch_size=64, max_wait=0.05, max_retries=3):
+        self.memory, self.embed_batch, self.max_retries = memory, embed_batch, max_retries
+        self.batcher = MicroBatcher(max_batch_size=max_batch_size, max_wait=max_wait)
+        self.pending = {}  # user -> futures of conversations not yet in the store
+        self.failed = []   # (user, conversation, text) that could not be embedded
+        self._lock = threading.Lock()
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="archive-queue", daemon=True)
+        self.thread.start()
+
+    def submit(self, user, conversation, text):
+        """Queue a conversation for embedding and storage; returns a future of its memory id"""
+        future = asyncio.run_coroutine_threadsafe(
+            self.batcher.call_async(self._write_batch, (user, conversation, text)), self.loop)
+        with self._lock:
+            self.pending.setdefault(user, set()).add(future)
+        future.add_done_callback(lambda f: self._done(user, f))
+        return future
+
+    def _done(self, user, future):
+        with self._lock:
+            futures = self.pending.get(user, set())
+            futures.discard(future)
+            if not futures:
+                self.pending.pop(user, None)
+
+    async def _write_batch(self, entries):
+        for attempt in range(self.max_retries):
+            try:
+                vectors = await self.embed_batch([text for _, _, text in entries])
+                break
+            except Exception as e:
+                if attempt == self.max_retries - 1:
+                    self.failed.extend(entries)
+                    warnings.warn(f"Could not archive {len(entries)} conversations: {e}")
+                    raise
+                await asyncio.sleep(0.5 * 2 ** attempt)
+        # SQLite and FAISS calls block, so they run off the event loop
+        return await asyncio.to_thread(self.memory.add_many, [
+            (user, conversation, text, vector) for (user, conversation, text), vector in zip(entries, vectors)])
+
+    def wait(self, user, timeout=None):
+        """Block until the user's queued conversations are in the store (or failed)"""
+        with self._lock:
+            futures = list(self.pending.get(user, ()))
+        concurrent.futures.wait(futures, timeout)
+
+    def close(self, timeout=None):
+        """Drain the queue and stop the background loop"""
+        with self._lock:
+            futures = [f for fs in self.pending.values() for f in fs]
+        concurrent.futures.wait(futures, timeout)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout)
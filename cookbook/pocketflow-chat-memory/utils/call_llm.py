@@ -1,8 +1,8 @@
 import os
-from openai import OpenAI
+from pocketflow.llm import get_client
 
 def call_llm(messages):
-    client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY", "your-api-key"))
+    client = get_client("openai", api_key=os.environ.get("OPENAI_API_KEY", "your-api-key"))
     
     response = client.chat.completions.create(
         model="gpt-4o",
@@ -12,6 +12,13 @@ def call_llm(messages):
     
     return response.choices[0].message.content
 
+def summarize_conversations(conversations):
+    """Condense archived conversations into a short paragraph of facts worth remembering"""
+    transcript = "\n\n".join("\n".join(f"{msg['role']}: {msg['content']}" for msg in conversation)
+                               for conversation in conversations)
+    return call_llm([{"role": "user", "content": "Summarize the facts, preferences and commitments in these "
+                      f"past conversations in a short paragraph:\n\n{transcript}"}])
+
 if __name__ == "__main__":
     # Test the LLM call
     messages = [{"role": "user", "content": "In a few words, what's the meaning of life?"}]
@@ -1,9 +1,9 @@
 import os
 import numpy as np
-from openai import OpenAI
+from pocketflow.llm import get_client, get_async_client
 
 def get_embedding(text):
-    client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY", "YOUR_API_KEY"))
+    client = get_client("openai", api_key=os.environ.get("OPENAI_API_KEY", "YOUR_API_KEY"))
     
     response = client.embeddings.create(
         model="text-embedding-ada-002",
@@ -17,6 +17,17 @@ def get_embedding(text):
     return np.array(embedding, dtype=np.float32)
 
 
+async def get_embeddings_async(texts):
+    client = get_async_client("openai", api_key=os.environ.get("OPENAI_API_KEY", "YOUR_API_KEY"))
+
+    # One request for the whole batch; results come back in input order
+    response = await client.embeddings.create(
+        model="text-embedding-ada-002",
+        input=list(texts)
+    )
+    return [np.array(d.embedding, dtype=np.float32) for d in response.data]
+
+
 if __name__ == "__main__":
     # Test the embedding function
     text1 = "The quick brown fox jumps over the lazy dog."
@@ -0,0 +1,73 @@
+import math
+import re
+from collections import Counter, defaultdict
+
+TOKEN = re.compile(r"\w+")
+# Function words carry no keyword signal, and in a question they would count
+# as unmatched terms and hide a confident match
+STOPWORDS = frozenset("""a about an and are as at be but by can could did do does for from had has have how
+i if in into is it its me my no not of on or our she so that the their them then there these they this
+to was we were what when where which who why will with would you your""".split())
+
+def tokenize(text):
+    return [t for t in TOKEN.findall(text.lower()) if t not in STOPWORDS]
+
+class LexicalIndex:
+    """In-memory BM25 inverted index over keyed texts; keys match the vector index's ids"""
+
+    def __init__(self, k1=1.5, b=0.75):
+        self.k1, self.b = k1, b
+        self.postings = defaultdict(dict)  # term -> {key: term frequency}
+        self.lengths, self.total = {}, 0
+
+    def __len__(self):
+        return len(self.lengths)
+
+    def add(self, key, text):
+        counts = Counter(tokenize(text))
+        for term, tf in counts.items():
+            self.postings[term][key] = tf
+        self.lengths[key] = sum(counts.values())
+        self.total += self.lengths[key]
+
+    def remove(self, key, text):
+        for term in set(tokenize(text)):
+            postings = self.postings.get(term, {})
+            postings.pop(key, None)
+            if not postings:
+                self.postings.pop(term, None)
+        self.total -= self.lengths.pop(key, 0)
+
+    def search(self, query, k=10):
+        """Return up to k (key, score, coverage) tuples, best BM25 score first.
+
+        coverage is the share of the query's idf weight whose terms occur in
+        that text: 1.0 means every query word is there."""
+        n, terms = len(self.lengths), Counter(tokenize(query))
+        if not n or not terms:
+            return []
+        avgdl = self.total / n or 1.0
+        scores, matched, weight = Counter(), Counter(), 0.0
+        for term, qtf in terms.items():
+            postings = self.postings.get(term, {})
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            weight += idf * qtf
+            for key, tf in postings.items():
+                norm = tf + self.k1 * (1 - self.b + self.b * self.lengths[key] / avgdl)
+                scores[key] += idf * qtf * tf * (self.k1 + 1) / norm
+                matched[key] += idf * qtf
+        return [(key, score, matched[key] / weight) for key, score in scores.most_common(k)]
+
+def reciprocal_rank_fusion(rankings, k=60):
+    """Fuse ranked lists of keys: each scores the sum of 1 / (k + rank) over the lists it appears in"""
+    scores = {}
+    for ranking in rankings:
+        for rank, key in enumerate(ranking, start=1):
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+if __name__ == "__main__":
+    index = LexicalIndex()
+    for key, text in enumerate(["my cat Whiskers drinks from taps", "peanut allergy, almonds are fine", "anniversary is June 17th"]):
+        index.add(key, text)
+    print(index.search("what does Whiskers drink?"))
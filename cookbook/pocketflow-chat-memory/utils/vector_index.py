@@ -1,5 +1,15 @@
+import contextlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
 import numpy as np
 import faiss
+try:
+    from utils.lexical_index import LexicalIndex
+except ImportError:  # run as a script from inside utils/
+    from lexical_index import LexicalIndex
 
 def create_index(dimension=1536):
     return faiss.IndexFlatL2(dimension)
@@ -40,6 +50,207 @@ def search_vectors(index, query_vector, k=1):
     
     return indices[0].tolist(), distances[0].tolist()
 
+class Namespace:
+    """One user's memories in RAM: a FAISS index keyed by memory id, the items, and a BM25 index"""
+
+    def __init__(self, dim):
+        self.index = faiss.IndexIDMap2(faiss.IndexFlatL2(dim)) if dim else None
+        self.items = {}  # id -> {"id", "kind", "text", "conversation", "created"}
+        self.lexical = LexicalIndex()
+        self.lock = threading.RLock()
+        self.next_id = 0
+        self.pins = 0  # callers using this namespace; pinned namespaces are never dropped from RAM
+        self.ready, self.failed = threading.Event(), False
+
+    def add(self, item, vector, dim):
+        if self.index is None:
+            self.index = faiss.IndexIDMap2(faiss.IndexFlatL2(dim))
+        self.index.add_with_ids(vector.reshape(1, -1), np.array([item["id"]], dtype=np.int64))
+        self.items[item["id"]] = item
+        self.lexical.add(item["id"], item["text"])
+        self.next_id = max(self.next_id, item["id"] + 1)
+
+    def remove(self, ids):
+        self.index.remove_ids(np.array(ids, dtype=np.int64))
+        for i in ids:
+            self.lexical.remove(i, self.items.pop(i)["text"])
+
+class MemoryStore:
+    """Long-term conversation memory for many users, persisted in SQLite.
+
+    Each user id is a namespace with its own FAISS and BM25 index. Namespaces
+    are loaded on first use and the least recently used are dropped from RAM
+    beyond max_loaded, so one process can serve thousands of sessions while
+    only active users take memory. A namespace in use is never dropped. Once
+    a user has more than max_items memories, the oldest evict_batch are
+    replaced by a single summary when `summarize(conversations) -> text` and
+    `embed(text) -> vector` are given, and simply dropped otherwise.
+    path=None keeps everything in memory."""
+
+    def __init__(self, path=None, max_items=500, evict_batch=20, summarize=None, embed=None, max_loaded=1000):
+        self.max_items, self.evict_batch, self.max_loaded = max_items, max(2, evict_batch), max_loaded
+        self.summarize, self.embed = summarize, embed
+        self.db = sqlite3.connect(path or ":memory:", check_same_thread=False)
+        self.db.executescript("""
+            PRAGMA journal_mode = WAL;
+            PRAGMA synchronous = NORMAL;
+            CREATE TABLE IF NOT EXISTS info (key TEXT PRIMARY KEY, value);
+            CREATE TABLE IF NOT EXISTS memories (user TEXT, id INTEGER, kind TEXT, text TEXT, conversation TEXT,
+                                                 vector BLOB, created REAL, PRIMARY KEY (user, id));
+        """)
+        self.dim = dict(self.db.execute("SELECT key, value FROM info")).get("dim")
+        self._db_lock, self._lock = threading.Lock(), threading.Lock()
+        self._loaded = OrderedDict()  # user -> Namespace, least recently used first
+
+    def namespace(self, user):
+        with self._use(user) as ns:
+            return ns
+
+    @contextlib.contextmanager
+    def _use(self, user):
+        """Load a user's namespace and keep it in RAM until the block exits.
+
+        Only the first caller loads the rows, outside the store-wide lock, so
+        a cold user never blocks other sessions; later callers wait for it."""
+        with self._lock:
+            ns = self._loaded.get(user)
+            fresh = ns is None
+            if fresh:
+                ns = self._loaded[user] = Namespace(self.dim)
+            else:
+                self._loaded.move_to_end(user)
+            ns.pins += 1
+            self._trim()
+        try:
+            if fresh:
+                self._load(user, ns)
+            else:
+                ns.ready.wait()
+                if ns.failed:
+                    with self._use(user) as retried:  # the load failed and was dropped: try again
+                        yield retried
+                    return
+            yield ns
+        finally:
+            with self._lock:
+                ns.pins -= 1
+                self._trim()
+
+    def _load(self, user, ns):
+        try:
+            with self._db_lock:
+                rows = self.db.execute("SELECT id, kind, text, conversation, vector, created FROM memories "
+                                       "WHERE user = ? ORDER BY id", (user,)).fetchall()
+            with ns.lock:
+                for i, kind, text, conversation, vector, created in rows:
+                    item = {"id": i, "kind": kind, "text": text, "conversation": json.loads(conversation), "created": created}
+                    ns.add(item, np.frombuffer(vector, dtype=np.float32), self.dim)
+        except BaseException:
+            with self._lock:
+                if self._loaded.get(user) is ns:
+                    del self._loaded[user]
+            ns.failed = True
+            raise
+        finally:
+            ns.ready.set()
+
+    def _trim(self):
+        # Drop the least recently used namespaces nobody is using; they are
+        # still on disk and reloaded on next use
+        excess = len(self._loaded) - self.max_loaded
+        if excess > 0:
+            for user in [user for user, ns in self._loaded.items() if not ns.pins][:excess]:
+                del self._loaded[user]
+
+    def add(self, user, conversation, text, vector, kind="conversation", created=None):
+        """Store one memory and return its id, evicting the oldest if the user is over max_items"""
+        return self.add_many([(user, conversation, text, vector)], kind, created)[0]
+
+    def add_many(self, entries, kind="conversation", created=None):
+        """Store (user, conversation, text, vector) entries, for any mix of users, in one commit"""
+        vectors = [np.ascontiguousarray(vector, dtype=np.float32).reshape(-1) for *_, vector in entries]
+        for vector in vectors:
+            if self.dim is None:
+                with self._db_lock:
+                    self.dim = len(vector)
+                    self.db.execute("INSERT OR REPLACE INTO info VALUES ('dim', ?)", (self.dim,))
+            elif len(vector) != self.dim:
+                raise ValueError(f"Expected {self.dim}-dimensional vectors, got {len(vector)}")
+        ids, touched = [], {}
+        with contextlib.ExitStack() as pins:
+            for (user, conversation, text, _), vector in zip(entries, vectors):
+                if user not in touched:
+                    touched[user] = pins.enter_context(self._use(user))
+                ns = touched[user]
+                with ns.lock:
+                    item = {"kind": kind, "text": text, "conversation": conversation,
+                            "created": time.time() if created is None else created}
+                    with self._db_lock:
+                        # Ids come from SQLite too, so a namespace that was forgotten
+                        # while this write was in flight can never hand out a used id
+                        next_id, = self.db.execute("SELECT COALESCE(MAX(id), -1) + 1 FROM memories WHERE user = ?",
+                                                   (user,)).fetchone()
+                        item["id"] = max(ns.next_id, next_id)
+                        self.db.execute("INSERT INTO memories VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                        (user, item["id"], kind, text, json.dumps(conversation), vector.tobytes(), item["created"]))
+                    ns.add(item, vector, self.dim)
+                ids.append(item["id"])
+            with self._db_lock:
+                self.db.commit()
+            for user, ns in touched.items():
+                with ns.lock:
+                    if len(ns.items) > self.max_items:
+                        self._evict(user, ns)
+        return ids
+
+    def _evict(self, user, ns):
+        oldest = sorted(ns.items.values(), key=lambda item: item["created"])[:self.evict_batch]
+        ids = [item["id"] for item in oldest]
+        with self._db_lock:
+            self.db.executemany("DELETE FROM memories WHERE user = ? AND id = ?", [(user, i) for i in ids])
+            self.db.commit()
+        ns.remove(ids)
+        if self.summarize and self.embed:
+            summary = self.summarize([item["conversation"] for item in oldest])
+            # Dated like the newest summarized memory, so the summary is itself
+            # among the oldest and gets folded into the next one
+            self.add(user, [{"role": "system", "content": f"Summary of earlier conversations: {summary}"}],
+                     summary, self.embed(summary), kind="summary", created=oldest[-1]["created"])
+
+    def search(self, user, queries, k=1):
+        """Top-k memories for each query vector: a list with one [(item, distance)] list per query.
+
+        All of a user's queries go to FAISS as one matrix search."""
+        queries = np.ascontiguousarray(queries, dtype=np.float32).reshape(-1, self.dim or np.shape(queries)[-1])
+        with self._use(user) as ns, ns.lock:
+            k = min(k, len(ns.items))
+            if not k:
+                return [[] for _ in queries]
+            distances, ids = ns.index.search(queries, k)
+            return [[(ns.items[i], float(d)) for i, d in zip(row_ids, row_d) if i >= 0]
+                    for row_ids, row_d in zip(ids, distances)]
+
+    def lexical_search(self, user, query, k=5):
+        """Top-k memories by BM25 as [(item, score, coverage)]"""
+        with self._use(user) as ns, ns.lock:
+            return [(ns.items[i], score, coverage) for i, score, coverage in ns.lexical.search(query, k)]
+
+    def count(self, user):
+        with self._use(user) as ns, ns.lock:
+            return len(ns.items)
+
+    def forget(self, user):
+        """Delete every memory of a user"""
+        with self._lock:
+            self._loaded.pop(user, None)
+        with self._db_lock:
+            self.db.execute("DELETE FROM memories WHERE user = ?", (user,))
+            self.db.commit()
+
+    def close(self):
+        with self._db_lock:
+            self.db.close()
+
 # Example usage
 if __name__ == "__main__":
     # Create a new index
@@ -62,4 +273,11 @@ if __name__ == "__main__":
     print("Query:", query)
     print("Found indices:", indices)
     print("Distances:", distances)
-    print("Retrieved items:", [items[idx] for idx in indices]) 
\ No newline at end of file
+    print("Retrieved items:", [items[idx] for idx in indices])
+
+    # The same with a persistent, per-user memory store
+    store = MemoryStore(max_items=3, evict_batch=2)
+    for i in range(5):
+        store.add("alice", [{"role": "user", "content": f"message {i}"}], f"message {i}", np.random.random(3))
+    print("alice has", store.count("alice"), "memories, bob has", store.count("bob"))
+    print("Top 2 for 2 queries:", [[item["text"] for item, _ in hits] for hits in store.search("alice", np.random.random((2, 3)), k=2)]) 
\ No newline at end of file
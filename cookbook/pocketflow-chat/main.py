@@ -1,7 +1,18 @@
 from pocketflow import Node, Flow
-from utils import call_llm
+from pocketflow.cache import SemanticCache
+from utils import call_llm, get_embedding
+
+def opening_question(messages):
+    """Embed only a chat's first question. Later replies depend on the whole
+    history, which an embedding of the conversation can't tell apart."""
+    if messages is not None and len(messages) == 1:
+        return get_embedding(messages[0]["content"])
+    return None  # no vector and no embed function: exec runs uncached
 
 class ChatNode(Node):
+    # Reuse the reply when a new chat opens with a question nearly identical to a cached one
+    cache = SemanticCache(vector=opening_question, threshold=0.97, maxsize=10_000, ttl=3600)
+
     def prep(self, shared):
         # Initialize messages if this is the first run
         if "messages" not in shared:
@@ -53,3 +64,4 @@ flow = Flow(start=chat_node)
 if __name__ == "__main__":
     shared = {}
     flow.run(shared)
+    print(ChatNode.cache.stats())
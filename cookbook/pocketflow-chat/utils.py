@@ -1,8 +1,8 @@
-from openai import OpenAI
+from pocketflow.llm import get_client
 import os
 
 def call_llm(messages):
-    client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY", "your-api-key"))
+    client = get_client("openai", api_key=os.environ.get("OPENAI_API_KEY", "your-api-key"))
     
     response = client.chat.completions.create(
         model="gpt-4o",
@@ -12,6 +12,11 @@ def call_llm(messages):
     
     return response.choices[0].message.content
 
+def get_embedding(text):
+    client = get_client("openai", api_key=os.environ.get("OPENAI_API_KEY", "your-api-key"))
+    response = client.embeddings.create(model="text-embedding-ada-002", input=text)
+    return response.data[0].embedding
+
 if __name__ == "__main__":
     # Test the LLM call
     messages = [{"role": "user", "content": "In a few words, what's the meaning of life?"}]
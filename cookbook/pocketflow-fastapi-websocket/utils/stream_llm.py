@@ -1,8 +1,8 @@
 import os
-from openai import AsyncOpenAI
+from pocketflow.llm import get_async_client
 
 async def stream_llm(messages):
-    client = AsyncOpenAI(api_key=os.environ.get("OPENAI_API_KEY", "your-api-key"))
+    client = get_async_client("openai", api_key=os.environ.get("OPENAI_API_KEY", "your-api-key"))
     
     stream = await client.chat.completions.create(
         model="gpt-4o-mini",
@@ -1,6 +1,6 @@
 import os
 
-from openai import OpenAI
+from pocketflow.llm import get_client
 from openai.types.chat.chat_completion import ChatCompletion
 
 api_key = os.getenv("OPENAI_API_KEY")
@@ -10,7 +10,7 @@ model = "gpt-4o"
 
 def call_llm(message: str):
     print(f"Calling LLM with message: \n{message}")
-    client = OpenAI(api_key=api_key, base_url=base_url)
+    client = get_client("openai", api_key=api_key, base_url=base_url)
     response: ChatCompletion = client.chat.completions.create(
         model=model, messages=[{"role": "user", "content": message}]
     )
@@ -1,4 +1,4 @@
-from openai import OpenAI
+from pocketflow.llm import get_client
 import os
 import asyncio
 from mcp import ClientSession, StdioServerParameters
@@ -8,7 +8,7 @@ from mcp.client.stdio import stdio_client
 MCP = False
 
 def call_llm(prompt):    
-    client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY", "your-api-key"))
+    client = get_client("openai", api_key=os.environ.get("OPENAI_API_KEY", "your-api-key"))
     r = client.chat.completions.create(
         model="gpt-4o",
         messages=[{"role": "user", "content": prompt}]
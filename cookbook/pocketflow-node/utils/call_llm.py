@@ -1,7 +1,7 @@
-from openai import OpenAI
+from pocketflow.llm import get_client
 
 def call_llm(prompt):    
-    client = OpenAI(api_key="YOUR_API_KEY_HERE")
+    client = get_client("openai", api_key="YOUR_API_KEY_HERE")
     r = client.chat.completions.create(
         model="gpt-4o",
         messages=[{"role": "user", "content": prompt}]
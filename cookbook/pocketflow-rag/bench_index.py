@@ -0,0 +1,64 @@
+"""Recall@k, QPS and memory of each index type on synthetic corpora (CPU only).
+
+    python bench_index.py [--sizes 10000 100000 1000000] [--dim 128] [--k 10] [--queries 1000]
+    python bench_index.py --sizes 10000000 --types flat ivfpq hnsw   # 10M needs ~5 GB for dim 128
+    python bench_index.py --batch 1      # one query per search call, like the single-query online flow
+
+Vectors are drawn around random cluster centres, which is closer to real
+embeddings than uniform noise. Ground truth is an exact flat search; recall@k
+is the fraction of the true k nearest neighbours each index returns.
+"""
+import argparse
+import time
+import numpy as np
+import faiss
+from vector_store import INDEX_TYPES, build_index
+
+def synthetic(n, dim, seed, clusters=1000):
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((clusters, dim), dtype=np.float32)
+    out = np.empty((n, dim), dtype=np.float32)
+    for i in range(0, n, 1_000_000):  # fill in blocks to bound temporary memory
+        m = min(1_000_000, n - i)
+        out[i:i + m] = centres[rng.integers(0, clusters, m)] + 0.3 * rng.standard_normal((m, dim), dtype=np.float32)
+    return out
+
+def recall(found, truth, k):
+    return np.mean([len(set(f[:k]) & set(t[:k])) / k for f, t in zip(found, truth)])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--types", nargs="+", choices=INDEX_TYPES, default=list(INDEX_TYPES))
+    parser.add_argument("--dim", type=int, default=128)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--batch", type=int, default=0, help="queries per search call (0 = all in one call)")
+    parser.add_argument("--threads", type=int, default=0, help="FAISS OpenMP threads (0 = all cores)")
+    args = parser.parse_args()
+    if args.threads:
+        faiss.omp_set_num_threads(args.threads)
+    queries = synthetic(args.queries, args.dim, seed=1)
+    print(f"{'n':>10}  {'index':6}  {'build s':>8}  {'recall@' + str(args.k):>9}  {'QPS':>10}  {'memory MB':>10}")
+    for n in args.sizes:
+        corpus = synthetic(n, args.dim, seed=0)
+        ids = np.arange(n, dtype=np.int64)
+        truth = None
+        for kind in ["flat"] + [t for t in args.types if t != "flat"]:
+            t0 = time.perf_counter()
+            index = build_index(corpus, ids, kind)
+            build = time.perf_counter() - t0
+            t0 = time.perf_counter()
+            batch = args.batch or len(queries)
+            found = np.vstack([index.search(queries[i:i + batch], args.k)[1] for i in range(0, len(queries), batch)])
+            qps = len(queries) / (time.perf_counter() - t0)
+            if truth is None:
+                truth = found
+            if kind in args.types:
+                memory = faiss.serialize_index(index).nbytes / 2**20
+                print(f"{n:>10,}  {kind:6}  {build:8.1f}  {recall(found, truth, args.k):9.3f}  {qps:10,.0f}  {memory:10.1f}")
+            del index
+        del corpus
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,45 @@
-from pocketflow import Flow
-from nodes import EmbedDocumentsNode, CreateIndexNode, EmbedQueryNode, RetrieveDocumentNode, ChunkDocumentsNode, GenerateAnswerNode
+from pocketflow import Flow, AsyncFlow, AsyncPipelineFlow
+from nodes import SyncDocumentsNode, ChunkDocumentsNode, EmbedDocumentsNode, UpdateIndexNode, EmbedQueryNode, RetrieveDocumentNode, GenerateAnswerNode, HybridRetrieveNode, EmbedQueriesNode, RetrieveDocumentsNode, GenerateAnswersNode, ChunkStreamNode, EmbedChunksNode, IndexChunksNode
 
 def get_offline_flow():
     # Create offline flow for document indexing
+    sync_docs_node = SyncDocumentsNode()
     chunk_docs_node = ChunkDocumentsNode()
     embed_docs_node = EmbedDocumentsNode()
-    create_index_node = CreateIndexNode()
+    update_index_node = UpdateIndexNode()
     
     # Connect the nodes
-    chunk_docs_node >> embed_docs_node >> create_index_node
+    sync_docs_node >> chunk_docs_node >> embed_docs_node >> update_index_node
     
-    offline_flow = Flow(start=chunk_docs_node)
+    offline_flow = Flow(start=sync_docs_node)
     return offline_flow
 
-def get_online_flow():
+class IndexPipelineFlow(AsyncPipelineFlow):
+    async def post_async(self, shared, prep_res, exec_res):
+        """Report per-stage throughput and queue depth; the slowest stage sets the pace"""
+        print(self.metrics_table())
+        return exec_res
+
+def get_pipelined_offline_flow(max_requests=2, queue_size=256):
+    # Same result as the offline flow, but chunk -> embed -> index run as
+    # concurrent stages joined by bounded queues, so no stage waits for the
+    # previous one to finish and memory stays bounded by queue_size
+    sync_docs_node = SyncDocumentsNode()
+    chunk_stream_node = ChunkStreamNode()
+    embed_chunks_node = EmbedChunksNode(max_requests=max_requests)
+    index_chunks_node = IndexChunksNode()
+    update_index_node = UpdateIndexNode()
+
+    chunk_stream_node >> embed_chunks_node >> index_chunks_node
+    index_pipeline = IndexPipelineFlow(start=chunk_stream_node, queue_size=queue_size)
+    sync_docs_node >> index_pipeline >> update_index_node
+
+    return AsyncFlow(start=sync_docs_node)
+
+def get_online_flow(k=1, max_distance=None):
     # Create online flow for document retrieval and answer generation
     embed_query_node = EmbedQueryNode()
-    retrieve_doc_node = RetrieveDocumentNode()
+    retrieve_doc_node = RetrieveDocumentNode(k=k, max_distance=max_distance)
     generate_answer_node = GenerateAnswerNode()
     
     # Connect the nodes
@@ -25,6 +48,30 @@ def get_online_flow():
     online_flow = Flow(start=embed_query_node)
     return online_flow
 
+def get_hybrid_online_flow(k=1, **options):
+    # BM25 and vector search fused by reciprocal rank; the query is only
+    # embedded when the keyword match isn't confident on its own
+    hybrid_retrieve_node = HybridRetrieveNode(k=k, **options)
+    generate_answer_node = GenerateAnswerNode()
+
+    hybrid_retrieve_node >> generate_answer_node
+
+    return Flow(start=hybrid_retrieve_node)
+
+def get_batch_online_flow(k=1, max_distance=None, max_workers=16):
+    # Answer many queries per run: one embeddings request, one index search,
+    # and up to max_workers LLM calls in flight at once
+    embed_queries_node = EmbedQueriesNode()
+    retrieve_docs_node = RetrieveDocumentsNode(k=k, max_distance=max_distance)
+    generate_answers_node = GenerateAnswersNode(max_workers=max_workers)
+
+    embed_queries_node >> retrieve_docs_node >> generate_answers_node
+
+    return Flow(start=embed_queries_node)
+
 # Initialize flows
 offline_flow = get_offline_flow()
-online_flow = get_online_flow()
\ No newline at end of file
+pipelined_offline_flow = get_pipelined_offline_flow()
+online_flow = get_online_flow()
+hybrid_online_flow = get_hybrid_online_flow()
+batch_online_flow = get_batch_online_flow()
\ No newline at end of file
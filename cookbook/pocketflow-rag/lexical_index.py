@@ -0,0 +1,86 @@
+import math
+import re
+from collections import Counter
+
+TOKEN = re.compile(r"\w+")
+# Function words carry no keyword signal, and in a question they would count
+# as unmatched terms and hide a confident match
+STOPWORDS = frozenset("""a about an and are as at be but by can could did do does for from had has have how
+i if in into is it its me my no not of on or our she so that the their them then there these they this
+to was we were what when where which who why will with would you your""".split())
+
+def tokenize(text):
+    return [t for t in TOKEN.findall(text.lower()) if t not in STOPWORDS]
+
+class LexicalIndex:
+    """BM25 inverted index over chunk rows, kept in the vector store's SQLite file.
+
+    Postings are (term, row, term frequency); chunk lengths sit in their own
+    table. The caller commits, so the lexical and vector sides of a chunk are
+    written in the same transaction."""
+
+    def __init__(self, db, k1=1.5, b=0.75):
+        self.db, self.k1, self.b = db, k1, b
+        db.executescript("""
+            CREATE TABLE IF NOT EXISTS postings (term TEXT, row INTEGER, tf INTEGER, PRIMARY KEY (term, row)) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS postings_row ON postings(row);
+            CREATE TABLE IF NOT EXISTS lengths (row INTEGER PRIMARY KEY, length INTEGER);
+        """)
+        self._stats = None
+
+    def __len__(self):
+        return self.stats()[0]
+
+    def stats(self):
+        """(number of chunks, average chunk length in tokens)"""
+        if self._stats is None:
+            n, total = self.db.execute("SELECT COUNT(*), COALESCE(SUM(length), 0) FROM lengths").fetchone()
+            self._stats = n, total / n if n else 0.0
+        return self._stats
+
+    def add(self, rows, texts):
+        postings, lengths = [], []
+        for row, text in zip(rows, texts):
+            counts = Counter(tokenize(text))
+            lengths.append((int(row), sum(counts.values())))
+            postings.extend((term, int(row), tf) for term, tf in counts.items())
+        self.db.executemany("INSERT OR REPLACE INTO postings VALUES (?, ?, ?)", postings)
+        self.db.executemany("INSERT OR REPLACE INTO lengths VALUES (?, ?)", lengths)
+        self._stats = None
+
+    def delete(self, rows):
+        rows = [(int(r),) for r in rows]
+        self.db.executemany("DELETE FROM postings WHERE row = ?", rows)
+        self.db.executemany("DELETE FROM lengths WHERE row = ?", rows)
+        self._stats = None
+
+    def renumber(self):
+        """Apply the temp table renumber(old, new) that VectorStore.compact() fills"""
+        for table in ("postings", "lengths"):
+            self.db.execute(f"UPDATE {table} SET row = -1 - (SELECT new FROM renumber WHERE old = {table}.row)")
+            self.db.execute(f"UPDATE {table} SET row = -1 - row")
+
+    def idf(self, df, n):
+        return math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    def search(self, query, k=10):
+        """Return up to k (row, score, coverage) tuples, best BM25 score first.
+
+        coverage is the share of the query's idf weight whose terms occur in
+        that row: 1.0 means every query word, rare ones counting most, is there."""
+        n, avgdl = self.stats()
+        terms = Counter(tokenize(query))
+        if not n or not terms:
+            return []
+        scores, matched, weight = Counter(), Counter(), 0.0
+        for term, qtf in terms.items():
+            postings = self.db.execute(
+                "SELECT p.row, p.tf, l.length FROM postings p JOIN lengths l ON l.row = p.row WHERE p.term = ?",
+                (term,)).fetchall()
+            idf = self.idf(len(postings), n)
+            weight += idf * qtf
+            for row, tf, length in postings:
+                norm = tf + self.k1 * (1 - self.b + self.b * length / avgdl)
+                scores[row] += idf * qtf * tf * (self.k1 + 1) / norm
+                matched[row] += idf * qtf
+        return [(row, score, matched[row] / weight) for row, score in scores.most_common(k)]
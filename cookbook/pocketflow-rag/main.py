@@ -1,15 +1,18 @@
 import sys
-from flow import offline_flow, online_flow
+from flow import offline_flow, online_flow, batch_online_flow
+from vector_store import VectorStore
 
 def run_rag_demo():
     """
     Run a demonstration of the RAG system.
     
     This function:
-    1. Indexes a set of sample documents (offline flow)
+    1. Indexes new or changed sample documents into a persistent store (offline flow)
     2. Takes a query from the command line
     3. Retrieves the most relevant document (online flow)
     4. Generates an answer using an LLM
+
+    Several queries are answered together by the batched online flow.
     """
 
     # Sample texts - specialized/fictional content that benefits from RAG
@@ -57,29 +60,44 @@ def run_rag_demo():
     # Default query about the fictional technology
     default_query = "How to install PocketFlow?"
     
-    # Get query from command line if provided with --
-    query = default_query
-    for arg in sys.argv[1:]:
-        if arg.startswith("--"):
-            query = arg[2:]
-            break
+    # Get queries from command line if provided with --
+    queries = [arg[2:] for arg in sys.argv[1:] if arg.startswith("--")] or [default_query]
+    query = queries[0]
     
-    # Single shared store for both flows
+    # Single shared store for both flows. The vector store lives on disk, so a
+    # second run only chunks and embeds documents whose content changed.
     shared = {
-        "texts": texts,
-        "embeddings": None,
+        # Values are texts, or pathlib.Path objects for files that are streamed
+        # from disk in blocks, e.g. {p.name: p for p in Path("corpus").glob("*.txt")}
+        "docs": {f"doc-{i}": text for i, text in enumerate(texts)},
+        # index: "flat" (exact), "ivf", "hnsw", "pq" or "ivfpq" (approximate, for large corpora)
+        "store": VectorStore("rag_index", index="flat"),
+        "changed_docs": None,
+        "chunks": None,
+        "embedded_chunks": 0,
         "index": None,
         "query": query,
         "query_embedding": None,
+        "queries": queries,
+        "query_embeddings": None,
+        "retrieved_documents": None,
         "retrieved_document": None,
-        "generated_answer": None
+        "generated_answer": None,
+        "generated_answers": None
     }
     
     # Initialize and run the offline flow (document indexing)
     offline_flow.run(shared)
     
-    # Run the online flow to retrieve the most relevant document and generate an answer
-    online_flow.run(shared)
+    # Run the online flow to retrieve the most relevant document and generate an answer.
+    # Several queries share one embeddings request and one index search.
+    if len(queries) > 1:
+        batch_online_flow.run(shared)
+    else:
+        online_flow.run(shared)
+
+    # Saves the FAISS index so the next run doesn't rebuild or retrain it
+    shared["store"].close()
 
 
 if __name__ == "__main__":
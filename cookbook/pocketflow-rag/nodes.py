@@ -1,72 +1,164 @@
-from pocketflow import Node, Flow, BatchNode
+from itertools import groupby, islice
+from pocketflow import Node, Flow, StreamingBatchNode, ThreadPoolBatchNode, AsyncParallelBatchNode
+from pocketflow.batching import MicroBatcher
+from pocketflow.cache import SemanticCache
 import numpy as np
-import faiss
-from utils import call_llm, get_embedding, fixed_size_chunk
+from utils import call_llm, get_embedding, get_embeddings, get_embeddings_async, stream_chunks
 
 # Nodes for the offline flow
-class ChunkDocumentsNode(BatchNode):
+class SyncDocumentsNode(Node):
     def prep(self, shared):
-        """Read texts from shared store"""
-        return shared["texts"]
+        """Get the persistent store and the current documents"""
+        return shared["store"], shared["docs"]
+
+    def exec(self, inputs):
+        """Find documents that are new or changed since the last run"""
+        store, docs = inputs
+        return store.diff(docs)
+
+    def post(self, shared, prep_res, exec_res):
+        """Drop removed documents and old versions of changed ones, and pass the changed ones on"""
+        changed, removed = exec_res
+        shared["store"].delete(removed + list(changed))
+        shared["changed_docs"] = changed
+        print(f"✅ {len(changed)} new or changed documents, {len(removed)} removed, "
+              f"{len(prep_res[1]) - len(changed)} unchanged")
+        return "default"
+
+class ChunkDocumentsNode(Node):
+    def prep(self, shared):
+        """Read new or changed documents (texts or file paths) from shared store"""
+        return {doc_id: shared["docs"][doc_id] for doc_id in shared["changed_docs"]}
     
-    def exec(self, text):
-        """Chunk a single text into smaller pieces"""
-        return fixed_size_chunk(text)
+    def exec(self, docs):
+        """Chunk the documents lazily: files are read only as the embedding stage pulls chunks"""
+        return ((doc_id, chunk) for doc_id, source in docs.items() for chunk in stream_chunks(source))
     
-    def post(self, shared, prep_res, exec_res_list):
-        """Store chunked texts in the shared store"""
-        # Flatten the list of lists into a single list of chunks
-        all_chunks = []
-        for chunks in exec_res_list:
-            all_chunks.extend(chunks)
-        
-        # Replace the original texts with the flat list of chunks
-        shared["texts"] = all_chunks
-        
-        print(f"✅ Created {len(all_chunks)} chunks from {len(prep_res)} documents")
+    def post(self, shared, prep_res, exec_res):
+        """Store the stream of (doc_id, chunk) pairs in the shared store"""
+        shared["chunks"] = exec_res
+        print(f"✅ Streaming chunks from {len(prep_res)} documents")
         return "default"
     
-class EmbedDocumentsNode(BatchNode):
+class EmbedDocumentsNode(StreamingBatchNode):
+    # Chunks per embeddings request; only one batch is in memory at a time
+    batch_size = 100
+
     def prep(self, shared):
-        """Read texts from shared store and return as an iterable"""
-        return shared["texts"]
+        """Group the chunk stream into batches of batch_size"""
+        chunks = iter(shared["chunks"])
+        return iter(lambda: list(islice(chunks, self.batch_size)), [])
     
-    def exec(self, text):
-        """Embed a single text"""
-        return get_embedding(text)
+    def exec(self, batch):
+        """Embed a batch of chunks in a single request"""
+        return get_embeddings([text for _, text in batch])
+
+    def post_item(self, shared, batch, embeddings):
+        """Write the batch's vectors to the store as soon as they arrive"""
+        store = shared["store"]
+        for doc_id, group in groupby(zip(batch, embeddings), key=lambda pair: pair[0][0]):
+            group = list(group)
+            store.append(doc_id, [chunk for (_, chunk), _ in group], np.array([e for _, e in group], dtype=np.float32))
+        shared["embedded_chunks"] += len(batch)
     
     def post(self, shared, prep_res, exec_res_list):
-        """Store embeddings in the shared store"""
-        embeddings = np.array(exec_res_list, dtype=np.float32)
-        shared["embeddings"] = embeddings
-        print(f"✅ Created {len(embeddings)} document embeddings")
+        print(f"✅ Embedded and stored {shared['embedded_chunks']} chunks")
         return "default"
 
-class CreateIndexNode(Node):
+class UpdateIndexNode(Node):
     def prep(self, shared):
-        """Get embeddings from shared store"""
-        return shared["embeddings"]
+        """Get the store and the content hashes of the changed documents"""
+        return shared["store"], shared["changed_docs"]
     
-    def exec(self, embeddings):
-        """Create FAISS index and add embeddings"""
-        print("🔍 Creating search index...")
-        dimension = embeddings.shape[1]
-        
-        # Create a flat L2 index
-        index = faiss.IndexFlatL2(dimension)
-        
-        # Add the embeddings to the index
-        index.add(embeddings)
-        
-        return index
+    def exec(self, inputs):
+        """Mark each changed document as fully indexed, now that all its chunks are stored"""
+        store, hashes = inputs
+        for doc_id, content_hash in hashes.items():
+            store.commit_doc(doc_id, content_hash)
+        return store
     
     def post(self, shared, prep_res, exec_res):
-        """Store the index in shared store"""
+        """Keep the store as the search index"""
         shared["index"] = exec_res
-        print(f"✅ Index created with {exec_res.ntotal} vectors")
+        print(f"✅ Index has {len(exec_res)} chunks")
+        return "default"
+
+# Stages of the pipelined offline flow: chunks move on one by one, so chunking,
+# embedding and writing to the store all run at the same time
+class ChunkStreamNode(StreamingBatchNode):
+    def prep(self, shared):
+        """The new or changed documents are the items fed into the pipeline"""
+        return [(doc_id, shared["docs"][doc_id]) for doc_id in shared["changed_docs"]]
+
+    def exec(self, doc):
+        """Emit each chunk as soon as it is cut, while the rest of the file is still unread"""
+        doc_id, source = doc
+        for chunk in stream_chunks(source):
+            yield doc_id, chunk
+
+class EmbedChunksNode(AsyncParallelBatchNode):
+    # Chunks per embeddings request
+    batch_size = 100
+
+    def __init__(self, max_requests=2, max_wait=0.05, **kwargs):
+        # Enough workers to fill max_requests batches; the batcher merges their
+        # single-chunk calls into requests of up to batch_size chunks
+        super().__init__(max_concurrency=max_requests * self.batch_size, **kwargs)
+        self.batcher = MicroBatcher(max_batch_size=self.batch_size, max_wait=max_wait)
+
+    async def exec_batch_async(self, items):
+        """Embed a batch of (doc_id, chunk) pairs in a single request"""
+        embeddings = await get_embeddings_async([chunk for _, chunk in items])
+        return [(doc_id, chunk, embedding) for (doc_id, chunk), embedding in zip(items, embeddings)]
+
+class IndexChunksNode(StreamingBatchNode):
+    # Chunks per store write
+    flush_size = 100
+
+    def prep(self, shared):
+        self.pending = []  # shared with the stage's worker copies
+
+    def exec(self, embedded):
+        return embedded
+
+    def post_item(self, shared, item, embedded):
+        """Buffer embedded chunks and write them to the store in batches.
+
+        post_item runs on the event loop thread, which also owns the SQLite connection."""
+        self.pending.append(embedded)
+        if len(self.pending) >= self.flush_size:
+            self.flush(shared)
+
+    def flush(self, shared):
+        store = shared["store"]
+        for doc_id, group in groupby(self.pending, key=lambda entry: entry[0]):
+            group = list(group)
+            store.append(doc_id, [chunk for _, chunk, _ in group], np.array([e for _, _, e in group], dtype=np.float32))
+        shared["embedded_chunks"] += len(self.pending)
+        self.pending.clear()
+
+    def post(self, shared, prep_res, exec_res):
+        self.flush(shared)
+        print(f"✅ Embedded and stored {shared['embedded_chunks']} chunks")
         return "default"
 
 # Nodes for the online flow
+def hits(index, rows, distances):
+    """Retrieved chunks for one query; rows of -1 are missing neighbours or fall outside max_distance"""
+    return [
+        {"text": index.chunk(row)["text"], "index": int(row), "distance": float(distance)}
+        for row, distance in zip(rows, distances) if row >= 0
+    ]
+
+def answer_prompt(query, retrieved_docs):
+    context = "\n\n".join(doc["text"] for doc in retrieved_docs) or "(no relevant context found)"
+    return f"""
+Briefly answer the following question based on the context provided:
+Question: {query}
+Context: {context}
+Answer:
+"""
+
 class EmbedQueryNode(Node):
     def prep(self, shared):
         """Get query from shared store"""
@@ -84,55 +176,109 @@ class EmbedQueryNode(Node):
         return "default"
 
 class RetrieveDocumentNode(Node):
+    def __init__(self, k=1, max_distance=None, **kwargs):
+        super().__init__(**kwargs)
+        # Top-k chunks to retrieve, and an optional cut-off on squared L2 distance
+        self.k, self.max_distance = k, max_distance
+
     def prep(self, shared):
-        """Get query embedding, index, and texts from shared store"""
-        return shared["query_embedding"], shared["index"], shared["texts"]
+        """Get query embedding and the index from shared store"""
+        return shared["query_embedding"], shared["index"]
     
     def exec(self, inputs):
-        """Search the index for similar documents"""
+        """Search the index for the k most similar chunks within max_distance"""
         print("🔎 Searching for relevant documents...")
-        query_embedding, index, texts = inputs
-        
-        # Search for the most similar document
-        distances, indices = index.search(query_embedding, k=1)
+        query_embedding, index = inputs
         
-        # Get the index of the most similar document
-        best_idx = indices[0][0]
-        distance = distances[0][0]
-        
-        # Get the corresponding text
-        most_relevant_text = texts[best_idx]
-        
-        return {
-            "text": most_relevant_text,
-            "index": best_idx,
-            "distance": distance
-        }
+        distances, indices = index.search(query_embedding, k=self.k, max_distance=self.max_distance)
+        return hits(index, indices[0], distances[0])
     
     def post(self, shared, prep_res, exec_res):
-        """Store retrieved document in shared store"""
-        shared["retrieved_document"] = exec_res
-        print(f"📄 Retrieved document (index: {exec_res['index']}, distance: {exec_res['distance']:.4f})")
-        print(f"📄 Most relevant text: \"{exec_res['text']}\"")
+        """Store retrieved documents in shared store"""
+        shared["retrieved_documents"] = exec_res
+        # Best match, or None when nothing is close enough
+        shared["retrieved_document"] = exec_res[0] if exec_res else None
+        if not exec_res:
+            print("📄 No document within the distance threshold")
+        for doc in exec_res:
+            print(f"📄 Retrieved document (index: {doc['index']}, distance: {doc['distance']:.4f})")
+        if exec_res:
+            print(f"📄 Most relevant text: \"{exec_res[0]['text']}\"")
         return "default"
     
+def reciprocal_rank_fusion(rankings, k=60):
+    """Fuse ranked lists of rows: each row scores the sum of 1 / (k + rank) over the lists it appears in"""
+    scores = {}
+    for ranking in rankings:
+        for rank, row in enumerate(ranking, start=1):
+            scores[row] = scores.get(row, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+class HybridRetrieveNode(Node):
+    def __init__(self, k=1, candidates=20, max_distance=None, skip_coverage=0.9, skip_margin=2.0, **kwargs):
+        super().__init__(**kwargs)
+        # Fuse the top `candidates` of BM25 and vector search into the top k.
+        # Skip the embedding call when the best keyword hit covers at least
+        # skip_coverage of the query's idf weight and outscores the runner-up
+        # by skip_margin; skip_coverage=None always embeds.
+        self.k, self.candidates, self.max_distance = k, candidates, max_distance
+        self.skip_coverage, self.skip_margin = skip_coverage, skip_margin
+
+    def prep(self, shared):
+        """Get the query text and the index from shared store"""
+        return shared["query"], shared["index"]
+
+    def confident(self, lexical):
+        """Whether the keyword ranking alone is trustworthy"""
+        if self.skip_coverage is None or not lexical or lexical[0][2] < self.skip_coverage:
+            return False
+        return len(lexical) == 1 or lexical[0][1] >= self.skip_margin * lexical[1][1]
+
+    def exec(self, inputs):
+        """Rank by BM25, and by vector search too unless the keyword match is confident"""
+        query, index = inputs
+        lexical = index.lexical.search(query, k=self.candidates)
+        if self.confident(lexical):
+            ranked, mode, query_embedding = [(row, score) for row, score, _ in lexical[:self.k]], "lexical", None
+        else:
+            print(f"🔍 Embedding query: {query}")
+            query_embedding = np.array([get_embedding(query)], dtype=np.float32)
+            _, rows = index.search(query_embedding, k=self.candidates, max_distance=self.max_distance)
+            dense = [int(row) for row in rows[0] if row >= 0]
+            ranked, mode = reciprocal_rank_fusion([dense, [row for row, _, _ in lexical]])[:self.k], "hybrid"
+        docs = [{"text": index.chunk(row)["text"], "index": int(row), "score": float(score)} for row, score in ranked]
+        return mode, docs, query_embedding
+
+    def post(self, shared, prep_res, exec_res):
+        """Store retrieved documents, how they were found, and the query embedding if one was made"""
+        mode, docs, query_embedding = exec_res
+        shared["retrieval_mode"] = mode
+        shared["query_embedding"] = query_embedding
+        shared["retrieved_documents"] = docs
+        shared["retrieved_document"] = docs[0] if docs else None
+        if mode == "lexical":
+            print("🔤 Confident keyword match, skipped the embedding call")
+        for doc in docs:
+            print(f"📄 Retrieved document (index: {doc['index']}, {mode} score: {doc['score']:.4f})")
+        return "default"
+    
+# Answers keyed on the query alone: retrieval is a function of the query, and the
+# TTL bounds how stale an answer gets after the documents change. The cache reuses
+# the embedding made for retrieval and never calls the embeddings API itself; after
+# a confident keyword match there is none, and only an identical query can hit.
+answer_cache = SemanticCache(threshold=0.95, maxsize=10_000, ttl=3600, text=lambda inputs: inputs[0], vector=lambda inputs: inputs[2])
+
 class GenerateAnswerNode(Node):
+    cache, cache_namespace = answer_cache, "rag-answers"
+
     def prep(self, shared):
-        """Get query, retrieved document, and any other context needed"""
-        return shared["query"], shared["retrieved_document"]
+        """Get query, retrieved documents, and the query embedding for the answer cache"""
+        return shared["query"], shared["retrieved_documents"], shared.get("query_embedding")
     
     def exec(self, inputs):
         """Generate an answer using the LLM"""
-        query, retrieved_doc = inputs
-        
-        prompt = f"""
-Briefly answer the following question based on the context provided:
-Question: {query}
-Context: {retrieved_doc['text']}
-Answer:
-"""
-        
-        answer = call_llm(prompt)
+        query, retrieved_docs, _ = inputs
+        answer = call_llm(answer_prompt(query, retrieved_docs))
         return answer
     
     def post(self, shared, prep_res, exec_res):
@@ -141,3 +287,58 @@ Answer:
         print("\n🤖 Generated Answer:")
         print(exec_res)
         return "default"
+
+# Nodes for the batched online flow: many queries per run
+class EmbedQueriesNode(Node):
+    def prep(self, shared):
+        """Get the list of queries from shared store"""
+        return shared["queries"]
+
+    def exec(self, queries):
+        """Embed every query in a single request"""
+        print(f"🔍 Embedding {len(queries)} queries")
+        return np.array(get_embeddings(queries), dtype=np.float32).reshape(len(queries), -1)
+
+    def post(self, shared, prep_res, exec_res):
+        """Store the (n_queries, dim) matrix in shared store"""
+        shared["query_embeddings"] = exec_res
+        return "default"
+
+class RetrieveDocumentsNode(RetrieveDocumentNode):
+    def prep(self, shared):
+        """Get all query embeddings and the index from shared store"""
+        return shared["query_embeddings"], shared["index"]
+
+    def exec(self, inputs):
+        """Search the index once for every query's k nearest chunks"""
+        query_embeddings, index = inputs
+        if not len(query_embeddings):
+            return []
+        distances, indices = index.search(query_embeddings, k=self.k, max_distance=self.max_distance)
+        return [hits(index, rows, dists) for rows, dists in zip(indices, distances)]
+
+    def post(self, shared, prep_res, exec_res):
+        """Store one list of retrieved chunks per query"""
+        shared["retrieved_documents"] = exec_res
+        print(f"🔎 Retrieved {sum(map(len, exec_res))} chunks for {len(exec_res)} queries")
+        return "default"
+
+class GenerateAnswersNode(ThreadPoolBatchNode):
+    # Shares entries with GenerateAnswerNode: a question answered in a batch is a hit for a single query
+    cache, cache_namespace = answer_cache, "rag-answers"
+
+    def prep(self, shared):
+        """Pair each query with its retrieved chunks and its row of the query embeddings"""
+        return list(zip(shared["queries"], shared["retrieved_documents"], shared["query_embeddings"]))
+
+    def exec(self, inputs):
+        """Generate one answer; the thread pool runs the LLM calls concurrently"""
+        query, retrieved_docs, _ = inputs
+        return call_llm(answer_prompt(query, retrieved_docs))
+
+    def post(self, shared, prep_res, exec_res_list):
+        """Store answers in the same order as the queries"""
+        shared["generated_answers"] = exec_res_list
+        for (query, _, _), answer in zip(prep_res, exec_res_list):
+            print(f"\n❓ {query}\n🤖 {answer}")
+        return "default"
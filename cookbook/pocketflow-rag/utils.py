@@ -1,9 +1,10 @@
 import os
+import re
 import numpy as np
-from openai import OpenAI
+from pocketflow.llm import get_client, get_async_client
 
 def call_llm(prompt):    
-    client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY", "your-api-key"))
+    client = get_client("openai", api_key=os.environ.get("OPENAI_API_KEY", "your-api-key"))
     r = client.chat.completions.create(
         model="gpt-4o",
         messages=[{"role": "user", "content": prompt}]
@@ -11,7 +12,7 @@ def call_llm(prompt):
     return r.choices[0].message.content
 
 def get_embedding(text):
-    client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY", "your-api-key"))
+    client = get_client("openai", api_key=os.environ.get("OPENAI_API_KEY", "your-api-key"))
     
     response = client.embeddings.create(
         model="text-embedding-ada-002",
@@ -24,11 +25,83 @@ def get_embedding(text):
     # Convert to numpy array for consistency with other embedding functions
     return np.array(embedding, dtype=np.float32)
 
-def fixed_size_chunk(text, chunk_size=2000):
-    chunks = []
-    for i in range(0, len(text), chunk_size):
-        chunks.append(text[i : i + chunk_size])
-    return chunks
+def get_embeddings(texts):
+    client = get_client("openai", api_key=os.environ.get("OPENAI_API_KEY", "your-api-key"))
+
+    # The embeddings API accepts a list of inputs and returns one vector per input, in order
+    response = client.embeddings.create(
+        model="text-embedding-ada-002",
+        input=list(texts)
+    )
+    return [np.array(d.embedding, dtype=np.float32) for d in response.data]
+
+async def get_embeddings_async(texts):
+    client = get_async_client("openai", api_key=os.environ.get("OPENAI_API_KEY", "your-api-key"))
+
+    # Same request as get_embeddings, without blocking the event loop
+    response = await client.embeddings.create(
+        model="text-embedding-ada-002",
+        input=list(texts)
+    )
+    return [np.array(d.embedding, dtype=np.float32) for d in response.data]
+
+# Sentence ends: terminal punctuation, optional closing quote or bracket, then whitespace
+SENTENCE_END = re.compile(r"[.!?][\"')\]]*\s")
+
+def _read_blocks(source, read_size):
+    """Yield a text in one piece, or a file (path or open file) in read_size-character blocks"""
+    if isinstance(source, str):
+        yield source
+        return
+    f = source if hasattr(source, "read") else open(source, encoding="utf-8", errors="replace")
+    try:
+        for block in iter(lambda: f.read(read_size), ""):
+            yield block
+    finally:
+        if f is not source:
+            f.close()
+
+def _boundary(window, min_size):
+    """End of the last paragraph, else sentence, else word in window, at or after min_size"""
+    end = window.rfind("\n\n", min_size)
+    if end >= 0:
+        return end + 2
+    last = None
+    for last in SENTENCE_END.finditer(window, min_size):
+        pass
+    if last:
+        return last.end()
+    end = max(window.rfind(" ", min_size), window.rfind("\n", min_size))
+    return end + 1 if end >= 0 else len(window)
+
+def stream_chunks(source, chunk_size=2000, overlap=200, read_size=1 << 20):
+    """Yield chunks of at most chunk_size characters from a text, a file path or an open file.
+
+    Files are read read_size characters at a time, so memory stays bounded by
+    the block size whatever the document size. Each chunk ends at the last
+    paragraph break in its window, else the last sentence end, else the last
+    space, and never before half of chunk_size. The next chunk starts up to
+    `overlap` characters earlier, at a word start."""
+    if not 0 <= overlap < chunk_size:
+        raise ValueError("overlap must be at least 0 and smaller than chunk_size")
+    buf, pos = "", 0
+    for block in _read_blocks(source, read_size):
+        buf = buf[pos:] + block
+        pos = 0
+        # Only cut while more than a window is buffered: the next block may extend it
+        while len(buf) - pos > chunk_size:
+            end = pos + _boundary(buf[pos:pos + chunk_size], chunk_size // 2)
+            chunk = buf[pos:end].strip()
+            if chunk:
+                yield chunk
+            start = end - overlap
+            if overlap:
+                space = buf.find(" ", start, end)
+                start = space + 1 if space >= 0 else start
+            pos = max(start, pos + 1)
+    chunk = buf[pos:].strip()
+    if chunk:
+        yield chunk
 
 if __name__ == "__main__":
     print("=== Testing call_llm ===")
@@ -0,0 +1,246 @@
+import hashlib
+import json
+import os
+import sqlite3
+import numpy as np
+import faiss
+from lexical_index import LexicalIndex
+
+INDEX_TYPES = ("flat", "ivf", "hnsw", "pq", "ivfpq")
+TRAINED = ("ivf", "pq", "ivfpq")
+RETRAIN_GROWTH = 4  # retrain once the corpus is this many times the size the index was trained on
+
+def _pq_m(dim):
+    """Largest number of PQ sub-quantizers that divides dim and keeps at least 4 dims each"""
+    return max(m for m in range(1, max(1, dim // 4) + 1) if dim % m == 0)
+
+def index_kind(n, kind="flat", nlist=None, nbits=8, **_):
+    """The index type build_index builds for n vectors: trained types need enough of them"""
+    nlist = nlist or max(1, min(65536, int(4 * np.sqrt(n))))
+    if kind in ("ivf", "ivfpq") and n < nlist or kind in ("pq", "ivfpq") and n < 2 ** nbits:
+        return "flat"
+    return kind
+
+def build_index(vectors, ids, kind="flat", nlist=None, nprobe=16, M=32, ef_search=64, ef_construction=40, pq_m=None, nbits=8):
+    """Build a FAISS index over `vectors` whose search results are `ids`.
+
+    flat is exact. ivf, pq and ivfpq are trained on the vectors themselves and
+    fall back to flat when there are too few to train on. hnsw cannot delete."""
+    n, dim = vectors.shape
+    nlist = nlist or max(1, min(65536, int(4 * np.sqrt(n))))
+    pq_m = pq_m or _pq_m(dim)
+    if kind not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type '{kind}', expected one of {INDEX_TYPES}")
+    kind = index_kind(n, kind, nlist, nbits)
+    spec = {"flat": "IDMap2,Flat", "ivf": f"IVF{nlist},Flat", "hnsw": f"IDMap2,HNSW{M},Flat",
+            "pq": f"IDMap2,PQ{pq_m}x{nbits}", "ivfpq": f"IVF{nlist},PQ{pq_m}x{nbits}"}[kind]
+    index = faiss.index_factory(dim, spec)
+    if kind == "hnsw":
+        hnsw = faiss.downcast_index(index.index).hnsw
+        hnsw.efConstruction, hnsw.efSearch = ef_construction, ef_search
+    if not index.is_trained:
+        index.train(vectors)
+    if kind in ("ivf", "ivfpq"):
+        faiss.extract_index_ivf(index).nprobe = nprobe
+    if n:
+        index.add_with_ids(vectors, ids)
+    return index
+
+class VectorStore:
+    """Persistent chunk store: vectors in a memory-mapped float32 file, texts,
+    metadata and per-document content hashes in SQLite.
+
+    Documents are added and deleted one at a time without touching the rest of
+    the corpus; large ones can be written batch by batch with append() and
+    commit_doc(). Deleted rows stay in the vector file until compact().
+    `index` picks the search structure (see build_index); extra keyword
+    arguments are passed on to build_index. A flat fallback, or a trained
+    index that the corpus has outgrown by RETRAIN_GROWTH, is rebuilt before
+    the next search. `lexical` is a BM25 index over the same rows, for
+    keyword and hybrid retrieval."""
+
+    def __init__(self, path, index="flat", **index_options):
+        os.makedirs(path, exist_ok=True)
+        self.path, self.index_type, self.index_options = path, index, index_options
+        self.index_path = os.path.join(path, "index.faiss")
+        self.vectors_path = os.path.join(path, "vectors.f32")
+        self.db = sqlite3.connect(os.path.join(path, "store.db"))
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS info (key TEXT PRIMARY KEY, value);
+            CREATE TABLE IF NOT EXISTS docs (doc_id TEXT PRIMARY KEY, hash TEXT);
+            CREATE TABLE IF NOT EXISTS chunks (row INTEGER PRIMARY KEY, doc_id TEXT, text TEXT, meta TEXT);
+            CREATE INDEX IF NOT EXISTS chunks_doc ON chunks(doc_id);
+        """)
+        self.lexical = LexicalIndex(self.db)
+        if not len(self.lexical) and len(self):  # store written before the lexical index existed
+            self.lexical.add(*zip(*self.db.execute("SELECT row, text FROM chunks")))
+            self.db.commit()
+        info = dict(self.db.execute("SELECT key, value FROM info"))
+        self.dim, self.rows = info.get("dim"), info.get("rows", 0)
+        self._vectors, self._index, self._stale, self._built = None, None, False, None
+        self._spec = json.dumps([index, index_options], sort_keys=True)
+        if (info.get("index_spec") == self._spec and info.get("index_rows") == self.rows and info.get("index_built")
+                and os.path.exists(self.index_path)):
+            self._index, self._built = faiss.read_index(self.index_path), tuple(json.loads(info["index_built"]))
+            self._stale = self._outdated()
+
+    @staticmethod
+    def content_hash(source):
+        """SHA-256 of a text, or of a file read in blocks when `source` is a path-like object"""
+        h = hashlib.sha256()
+        if isinstance(source, os.PathLike):
+            with open(source, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    h.update(block)
+        else:
+            h.update(source.encode("utf-8"))
+        return h.hexdigest()
+
+    def diff(self, docs):
+        """Split {doc_id: text or path} into {doc_id: hash} of new or changed documents, and stored ids that are gone"""
+        stored = dict(self.db.execute("SELECT doc_id, hash FROM docs"))
+        hashes = {doc_id: self.content_hash(source) for doc_id, source in docs.items()}
+        changed = {doc_id: h for doc_id, h in hashes.items() if stored.get(doc_id) != h}
+        removed = [doc_id for doc_id in stored if doc_id not in docs]
+        return changed, removed
+
+    def _open(self, capacity):
+        """Memory-map the vector file with room for at least `capacity` rows"""
+        size = os.path.getsize(self.vectors_path) if os.path.exists(self.vectors_path) else 0
+        have = size // (4 * self.dim)
+        if self._vectors is None or capacity > have:
+            if capacity > have:
+                with open(self.vectors_path, "ab") as f:
+                    f.truncate(max(capacity, 2 * have, 1024) * 4 * self.dim)
+            self._vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r+").reshape(-1, self.dim)
+        return self._vectors
+
+    def vectors(self):
+        """Memory-mapped view of every written row, live or deleted"""
+        return self._open(self.rows)[:self.rows] if self.dim else np.zeros((0, 0), dtype=np.float32)
+
+    def add(self, doc_id, text, chunks, vectors, metas=None):
+        """Store a document's chunks and vectors, replacing any previous version"""
+        self.delete([doc_id], commit=False)
+        self.append(doc_id, chunks, vectors, metas)
+        self.commit_doc(doc_id, self.content_hash(text))
+
+    def append(self, doc_id, chunks, vectors, metas=None):
+        """Add some of a document's chunks; call commit_doc() once all of them are in.
+
+        Lets a large document be written batch by batch. Until commit_doc()
+        the document has no hash, so an interrupted run re-indexes it."""
+        if not len(chunks):
+            return
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32).reshape(len(chunks), -1)
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+            self.db.execute("INSERT OR REPLACE INTO info VALUES ('dim', ?)", (self.dim,))
+        elif vectors.shape[1] != self.dim:
+            raise ValueError(f"Expected {self.dim}-dimensional vectors, got {vectors.shape[1]}")
+        self.db.execute("DELETE FROM docs WHERE doc_id = ?", (doc_id,))
+        start = self.rows
+        mm = self._open(start + len(chunks))
+        mm[start:start + len(chunks)] = vectors
+        mm.flush()  # vectors hit the disk before the rows that point at them
+        metas = metas or [None] * len(chunks)
+        self.db.executemany("INSERT INTO chunks VALUES (?, ?, ?, ?)",
+                            [(start + i, doc_id, c, json.dumps(m)) for i, (c, m) in enumerate(zip(chunks, metas))])
+        self.lexical.add(range(start, start + len(chunks)), chunks)
+        self.rows = start + len(chunks)
+        self.db.execute("INSERT OR REPLACE INTO info VALUES ('rows', ?)", (self.rows,))
+        self.db.commit()
+        if self._index is not None:
+            self._index.add_with_ids(vectors, np.arange(start, self.rows, dtype=np.int64))
+            self._stale = self._stale or self._outdated()
+
+    def commit_doc(self, doc_id, content_hash):
+        """Mark a document as fully indexed at this content hash"""
+        self.db.execute("INSERT OR REPLACE INTO docs VALUES (?, ?)", (doc_id, content_hash))
+        self.db.commit()
+
+    def delete(self, doc_ids, commit=True):
+        """Drop documents and their chunks; their vector rows become garbage"""
+        for doc_id in doc_ids:
+            rows = [r for (r,) in self.db.execute("SELECT row FROM chunks WHERE doc_id = ?", (doc_id,))]
+            self.db.execute("DELETE FROM chunks WHERE doc_id = ?", (doc_id,))
+            self.db.execute("DELETE FROM docs WHERE doc_id = ?", (doc_id,))
+            if rows:
+                self.lexical.delete(rows)
+                self.db.execute("DELETE FROM info WHERE key = 'index_rows'")  # a saved index still has them
+            if self._index is not None and rows:
+                if self.index_type == "hnsw":
+                    self._stale = True  # HNSW graphs can't drop nodes: rebuild before the next search
+                else:
+                    self._index.remove_ids(np.array(rows, dtype=np.int64))
+        if commit:
+            self.db.commit()
+
+    def live_rows(self):
+        return np.array([r for (r,) in self.db.execute("SELECT row FROM chunks ORDER BY row")], dtype=np.int64)
+
+    def __len__(self):
+        return self.db.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def _outdated(self):
+        """Whether the index built for (kind, trained rows) no longer suits the rows it now holds"""
+        kind, trained = self._built
+        n = self._index.ntotal
+        return kind != index_kind(n, self.index_type, **self.index_options) or kind in TRAINED and n > RETRAIN_GROWTH * trained
+
+    def index(self):
+        """In-memory FAISS index over the live rows, kept in sync by add() and delete()"""
+        if self._index is None or self._stale:
+            rows = self.live_rows()
+            vectors = np.ascontiguousarray(self.vectors()[rows]) if len(rows) else np.zeros((0, self.dim or 1), dtype=np.float32)
+            self._index, self._stale = build_index(vectors, rows, self.index_type, **self.index_options), False
+            self._built = (index_kind(len(rows), self.index_type, **self.index_options), len(rows))
+        return self._index
+
+    def save_index(self):
+        """Write the index next to the store so a restart skips training and re-adding"""
+        if self._index is None or self._stale:
+            return
+        faiss.write_index(self._index, self.index_path)
+        self.db.executemany("INSERT OR REPLACE INTO info VALUES (?, ?)", [("index_spec", self._spec), ("index_rows", self.rows),
+                                                                          ("index_built", json.dumps(self._built))])
+        self.db.commit()
+
+    def search(self, queries, k=1, max_distance=None):
+        """Return (distances, rows) for each query, like faiss Index.search.
+
+        Results farther than max_distance (squared L2) come back as row -1."""
+        distances, rows = self.index().search(np.ascontiguousarray(queries, dtype=np.float32).reshape(-1, self.dim), k)
+        if max_distance is not None:
+            rows[distances > max_distance] = -1
+        return distances, rows
+
+    def chunk(self, row):
+        doc_id, text, meta = self.db.execute("SELECT doc_id, text, meta FROM chunks WHERE row = ?", (int(row),)).fetchone()
+        return {"row": int(row), "doc_id": doc_id, "text": text, "meta": json.loads(meta)}
+
+    def compact(self):
+        """Rewrite the vector file without deleted rows and renumber the chunks"""
+        rows = self.live_rows()
+        if len(rows) == self.rows:
+            return
+        kept = np.array(self.vectors()[rows]) if len(rows) else np.zeros((0, self.dim or 0), dtype=np.float32)
+        self._vectors, self._index = None, None
+        tmp = self.vectors_path + ".tmp"
+        kept.tofile(tmp)
+        self.db.execute("CREATE TEMP TABLE renumber (old INTEGER PRIMARY KEY, new INTEGER)")
+        self.db.executemany("INSERT INTO renumber VALUES (?, ?)", [(int(r), i) for i, r in enumerate(rows)])
+        self.db.execute("UPDATE chunks SET row = -1 - (SELECT new FROM renumber WHERE old = chunks.row)")
+        self.db.execute("UPDATE chunks SET row = -1 - row")
+        self.lexical.renumber()
+        self.db.execute("DROP TABLE renumber")
+        self.db.execute("DELETE FROM info WHERE key = 'index_rows'")
+        self.rows = len(rows)
+        self.db.execute("INSERT OR REPLACE INTO info VALUES ('rows', ?)", (self.rows,))
+        os.replace(tmp, self.vectors_path)
+        self.db.commit()
+
+    def close(self):
+        self.save_index()
+        self._vectors, self._index = None, None
+        self.db.close()
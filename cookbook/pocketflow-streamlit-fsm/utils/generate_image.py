@@ -1,9 +1,9 @@
-from openai import OpenAI
+from pocketflow.llm import get_client
 import os
 import base64
 
 def generate_image(prompt: str) -> str:
-    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    client = get_client("openai", api_key=os.getenv("OPENAI_API_KEY"))
     
     response = client.images.generate(
         model="gpt-image-1",
@@ -1,10 +1,10 @@
 # utils.py
 
-from openai import OpenAI
+from pocketflow.llm import get_client
 import os
 
 def call_llm(prompt):    
-    client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY", "Your Key Here"),base_url=os.environ.get("OPENAI_API_BASE", "Your API Base Here"))
+    client = get_client("openai", api_key=os.environ.get("OPENAI_API_KEY", "Your Key Here"),base_url=os.environ.get("OPENAI_API_BASE", "Your API Base Here"))
     r = client.chat.completions.create(
         model=os.environ.get("OPENAI_MODEL", "openai/gpt-4.1-nano"),
         messages=[{"role": "user", "content": prompt}]
@@ -1,8 +1,8 @@
-from openai import OpenAI
+from pocketflow.llm import get_client
 import os
 
 def call_llm(messages):
-    client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY", "your-api-key"))
+    client = get_client("openai", api_key=os.environ.get("OPENAI_API_KEY", "your-api-key"))
     
     response = client.chat.completions.create(
         model="gpt-4o",
@@ -1,9 +1,9 @@
 import os
-from openai import OpenAI
+from pocketflow.llm import get_client
 import io
 
 def speech_to_text_api(audio_data: bytes, sample_rate: int):
-    client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+    client = get_client("openai", api_key=os.environ.get("OPENAI_API_KEY"))
 
     # The API expects a file-like object. We can use io.BytesIO for in-memory bytes.
     # We also need to give it a name, as if it were a file upload.
@@ -1,8 +1,8 @@
 import os
-from openai import OpenAI
+from pocketflow.llm import get_client
 
 def text_to_speech_api(text_to_synthesize: str):
-    client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+    client = get_client("openai", api_key=os.environ.get("OPENAI_API_KEY"))
 
     response = client.audio.speech.create(
         model="gpt-4o-mini-tts",
@@ -1,4 +1,54 @@
-import asyncio, warnings, copy, time
+import asyncio, warnings, copy, time, threading, contextvars, contextlib, collections, functools, inspect, os
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed, wait, FIRST_COMPLETED
+
+_deadline=contextvars.ContextVar("pocketflow_deadline",default=None)
+_retries=contextvars.ContextVar("pocketflow_retries",default=None)
+
+class NodeTimeout(TimeoutError):
+    def __init__(self,node,timeout): super().__init__(f"{type(node).__name__} timed out after {timeout:.3g}s"); self.node,self.timeout=node,timeout
+    def __reduce__(self): return (NodeTimeout,(self.node,self.timeout))
+
+@contextlib.contextmanager
+def _deadline_scope(timeout):
+    if timeout is None: yield; return
+    d,t=_deadline.get(),time.monotonic()+timeout; tok=_deadline.set(t if d is None else min(d,t))
+    try: yield
+    finally: _deadline.reset(tok)
+
+@contextlib.contextmanager
+def _run_scope():
+    if _retries.get() is not None: yield; return
+    tok=_retries.set({})
+    try: yield
+    finally: _retries.reset(tok)
+
+def _watchdog(node,fn,arg,timeout):
+    if timeout<=0: raise NodeTimeout(node,max(timeout,0))
+    res={}
+    def target():
+        try: res["v"]=fn(arg)
+        except BaseException as e: res["e"]=e
+    t=threading.Thread(target=contextvars.copy_context().run,args=(target,),daemon=True); t.start(); t.join(timeout)
+    if t.is_alive(): raise NodeTimeout(node,timeout)
+    if "e" in res: raise res["e"]
+    return res["v"]
+
+_hooks=[]
+def add_hook(hook): _hooks.append(hook); return hook
+def remove_hook(hook): _hooks.remove(hook)
+def _emit(node,phase,event,**info):
+    info["time"]=time.perf_counter()
+    for h in list(_hooks): h(node,phase,event,info)
+def _timed(node,phase,fn,*args):
+    t0,err=time.perf_counter(),None; _emit(node,phase,"start")
+    try: return fn(*args)
+    except BaseException as e: err=e; raise
+    finally: _emit(node,phase,"end",start=t0,duration=time.perf_counter()-t0,error=err)
+async def _timed_async(node,phase,fn,*args):
+    t0,err=time.perf_counter(),None; _emit(node,phase,"start")
+    try: return await fn(*args)
+    except BaseException as e: err=e; raise
+    finally: _emit(node,phase,"end",start=t0,duration=time.perf_counter()-t0,error=err)
 
 class BaseNode:
     def __init__(self): self.params,self.successors={},{}
@@ -10,11 +60,17 @@ class BaseNode:
     def exec(self,prep_res): pass
     def post(self,shared,prep_res,exec_res): pass
     def _exec(self,prep_res): return self.exec(prep_res)
-    def _run(self,shared): p=self.prep(shared); e=self._exec(p); return self.post(shared,p,e)
+    def _run(self,shared):
+        if _hooks: p=_timed(self,"prep",self.prep,shared); e=_timed(self,"exec",self._exec,p); return _timed(self,"post",self.post,shared,p,e)
+        p=self.prep(shared); e=self._exec(p); return self.post(shared,p,e)
     def run(self,shared): 
         if self.successors: warnings.warn("Node won't run successors. Use Flow.")  
-        return self._run(shared)
+        with _run_scope(): return self._run(shared)
     def __rshift__(self,other): return self.next(other)
+    def __rrshift__(self,other):
+        if not isinstance(other,(list,tuple)): return NotImplemented
+        for n in other: n.next(self)
+        return self
     def __sub__(self,action):
         if isinstance(action,str): return _ConditionalTransition(self,action)
         raise TypeError("Action must be a string")
@@ -24,77 +80,475 @@ class _ConditionalTransition:
     def __rshift__(self,tgt): return self.src.next(tgt,self.action)
 
 class Node(BaseNode):
+    cache=retry=timeout=batcher=None
     def __init__(self,max_retries=1,wait=0): super().__init__(); self.max_retries,self.wait=max_retries,wait
+    def exec_batch(self,prep_res_list): return [self.exec(p) for p in prep_res_list]
     def exec_fallback(self,prep_res,exc): raise exc
+    def _retry_delay(self,exc,t0):
+        if self.cur_retry==self.max_retries-1: return None
+        return self.wait if self.retry is None else self.retry.delay(self.cur_retry,exc,time.monotonic()-t0)
+    def _time_left(self):
+        d,t=_deadline.get(),self.timeout
+        if d is not None: r=d-time.monotonic(); t=r if t is None else min(t,r)
+        return t
+    def _exec_once(self,prep_res):
+        fn=self.exec if self.batcher is None else functools.partial(self.batcher.call,self.exec_batch)
+        return fn(prep_res) if self.cache is None else self.cache.call(self,fn,prep_res)
     def _exec(self,prep_res):
+        t0=time.monotonic()
         for self.cur_retry in range(self.max_retries):
-            try: return self.exec(prep_res)
+            try: t=self._time_left(); return self._exec_once(prep_res) if t is None else _watchdog(self,self._exec_once,prep_res,t)
             except Exception as e:
-                if self.cur_retry==self.max_retries-1: return self.exec_fallback(prep_res,e)
-                if self.wait>0: time.sleep(self.wait)
+                d=self._retry_delay(e,t0)
+                if _hooks: _emit(self,"exec","retry" if d is not None else "fallback",attempt=self.cur_retry,error=e)
+                if d is None: return self.exec_fallback(prep_res,e)
+                if d>0: time.sleep(d)
 
 class BatchNode(Node):
-    def _exec(self,items): return [super(BatchNode,self)._exec(i) for i in (items or [])]
+    def _exec_item(self,item): return _timed(self,"item",super(BatchNode,self)._exec,item) if _hooks else super(BatchNode,self)._exec(item)
+    def _exec(self,items):
+        if self.batcher is None: return [self._exec_item(i) for i in (items or [])]
+        items=list(items or []); ex=ThreadPoolExecutor(max(1,min(len(items),self.batcher.max_batch_size)))
+        try: return [f.result() for f in [ex.submit(contextvars.copy_context().run,copy.copy(self)._exec_item,i) for i in items]]
+        finally: ex.shutdown(cancel_futures=True)
+
+class StreamingBatchNode(BatchNode):
+    def post_item(self,shared,item,exec_res): pass
+    def _stream(self,shared,p):
+        for i in (p or []): self.post_item(shared,i,self._exec_item(i))
+    def _run(self,shared):
+        if _hooks: p=_timed(self,"prep",self.prep,shared); _timed(self,"exec",self._stream,shared,p); return _timed(self,"post",self.post,shared,p,None)
+        p=self.prep(shared); self._stream(shared,p); return self.post(shared,p,None)
+
+class _PoolBatchNode(BatchNode):
+    executor_cls=transport=None
+    def __init__(self,max_retries=1,wait=0,max_workers=None,chunksize=1,ordered=True): super().__init__(max_retries,wait); self.max_workers,self.chunksize,self.ordered=max_workers,chunksize,ordered
+    def _exec_chunk(self,chunk,shm=False):
+        n=copy.copy(self)
+        return self.transport.run(lambda c:[n._exec_item(i) for i in c],chunk) if shm else [n._exec_item(i) for i in chunk]
+    def _exec(self,items):
+        items=list(items or []); chunks=[items[i:i+self.chunksize] for i in range(0,len(items),self.chunksize)]
+        if not chunks: return []
+        proc=self.executor_cls is ProcessPoolExecutor; shm=proc and self.transport is not None; owned,fs,loaded=[],[],set()
+        if shm: self.transport.start(); chunks=[self.transport.export(c,owned) for c in chunks]
+        ex=self.executor_cls(self.max_workers)
+        try:
+            fs=[ex.submit(self._exec_chunk,c,shm) if proc else ex.submit(contextvars.copy_context().run,self._exec_chunk,c) for c in chunks]; out=[]
+            for f in (fs if self.ordered else as_completed(fs)): out+=self.transport.load(f.result()) if shm else f.result(); loaded.add(f)
+            return out
+        finally:
+            ex.shutdown(cancel_futures=True)
+            if shm:
+                for f in fs:
+                    if f not in loaded and not f.cancelled() and f.exception() is None: self.transport.load(f.result(),copy=False)
+                self.transport.release(owned)
+
+class ThreadPoolBatchNode(_PoolBatchNode): executor_cls=ThreadPoolExecutor
+
+class ProcessPoolBatchNode(_PoolBatchNode): executor_cls=ProcessPoolExecutor
 
 class Flow(BaseNode):
-    def __init__(self,start=None): super().__init__(); self.start_node=start
+    timeout=checkpoint=None; _track_nodes=True
+    def __init__(self,start=None): super().__init__(); self.start_node,self._plan,self._state,self._resume_at=start,None,{},None
     def start(self,start): self.start_node=start; return start
     def get_next_node(self,curr,action):
         nxt=curr.successors.get(action or "default")
         if not nxt and curr.successors: warnings.warn(f"Flow ends: '{action}' not found in {list(curr.successors)}")
         return nxt
+    def compile(self):
+        nodes,idx,stack=[],{},[self.start_node]
+        while stack:
+            n=stack.pop()
+            if n is not None and id(n) not in idx: idx[id(n)]=len(nodes); nodes.append(n); stack.extend(reversed(list(n.successors.values())))
+        self._plan=(nodes,[{a:idx[id(s)] for a,s in n.successors.items()} for n in nodes]); return self
+    def _instances(self,p):
+        nodes=[copy.copy(n) for n in self._plan[0]]
+        for n in nodes: n.set_params(p)
+        return nodes
+    def _next_index(self,i,action):
+        t=self._plan[1][i]; nxt=t.get(action or "default")
+        if nxt is None and t: warnings.warn(f"Flow ends: '{action}' not found in {list(t)}")
+        return nxt
+    def _start_point(self,nodes): (i,a),self._resume_at=(self._resume_at or (0 if nodes else None,None)),None; return i,a
+    def _save(self,shared,**state): self._state.update(state); self.checkpoint.save(shared,self._state)
     def _orch(self,shared,params=None):
-        curr,p,last_action =copy.copy(self.start_node),(params or {**self.params}),None
+        p,last_action=(params or {**self.params}),None
+        if self._plan:
+            nodes=self._instances(p); i,last_action=self._start_point(nodes)
+            while i is not None:
+                last_action=nodes[i]._run(shared); i=self._next_index(i,last_action)
+                if i is not None and self.checkpoint is not None and self._track_nodes: self._save(shared,node=i,action=last_action)
+            return last_action
+        curr=copy.copy(self.start_node)
         while curr: curr.set_params(p); last_action=curr._run(shared); curr=copy.copy(self.get_next_node(curr,last_action))
         return last_action
-    def _run(self,shared): p=self.prep(shared); o=self._orch(shared); return self.post(shared,p,o)
+    def _run(self,shared):
+        with _deadline_scope(self.timeout): p=self.prep(shared); o=self._orch(shared); return self.post(shared,p,o)
     def post(self,shared,prep_res,exec_res): return exec_res
+    def _begin(self,state):
+        if self._plan is None: self.compile()
+        n=state.get("node"); self._state,self._resume_at=state,((n,state.get("action")) if n is not None else None)
+    def _finish(self): self.checkpoint.clear(); self._state,self._resume_at={},None
+    def run(self,shared):
+        if self.checkpoint is None: return super().run(shared)
+        self._begin({}); r=super().run(shared); self._finish(); return r
+    def resume(self,shared): self._begin(self.checkpoint.load(shared) or {}); r=BaseNode.run(self,shared); self._finish(); return r
 
 class BatchFlow(Flow):
+    def _mark_done(self,shared,done,k):
+        if self.checkpoint is not None: done.add(k); self._save(shared,done=sorted(done),node=None,action=None)
     def _run(self,shared):
-        pr=self.prep(shared) or []
-        for bp in pr: self._orch(shared,{**self.params,**bp})
+        with _deadline_scope(self.timeout):
+            pr=self.prep(shared) or []; done=set(self._state.get("done",()))
+            for k,bp in enumerate(pr):
+                if k not in done: self._orch(shared,{**self.params,**bp}); self._mark_done(shared,done,k)
+            return self.post(shared,pr,None)
+
+_MISSING=object()
+def _same(a,b):
+    try: return bool(a==b)
+    except Exception: return a is b
+def _merge_changes(dst,base,branch,deep):
+    for k,v in branch.items():
+        b=base.get(k,_MISSING)
+        if deep and isinstance(v,dict) and isinstance(dst.get(k),dict): _merge_changes(dst[k],b if isinstance(b,dict) else {},v,True)
+        elif b is _MISSING or not _same(b,v): dst[k]=v
+
+class ThreadedBatchFlow(BatchFlow):
+    _track_nodes=False
+    def __init__(self,start=None,max_workers=None,merge=None): super().__init__(start); self.max_workers,self.merge=max_workers,merge
+    def _snapshots(self,shared): return self.merge is None and hasattr(shared,"snapshot")
+    def _run_branch(self,shared,bp,base=None):
+        branch=copy.deepcopy(base) if base is not None else shared.snapshot() if self._snapshots(shared) else shared
+        self._orch(branch,{**self.params,**bp}); return branch
+    def _run(self,shared):
+        with _deadline_scope(self.timeout): return self._run_threaded(shared)
+    def _run_threaded(self,shared):
+        if self.merge is not None and not (callable(self.merge) or self.merge in ("update","deep")): raise ValueError(f"Unknown merge strategy '{self.merge}'")
+        if self.checkpoint is not None and self.merge is None and not self._snapshots(shared): raise ValueError("ThreadedBatchFlow can't checkpoint while runs write to one shared dict; use merge='update', 'deep' or a callable, or a SharedStore")
+        pr=list(self.prep(shared) or []); done=set(self._state.get("done",())); todo=[(k,bp) for k,bp in enumerate(pr) if k not in done]
+        # runs copy a frozen base when they start, so merging finished runs can't race with copying and only max_workers copies are alive
+        isolated=self.merge is not None; base=copy.deepcopy(shared) if isolated else None
+        ex=ThreadPoolExecutor(self.max_workers); branches=[]
+        try:
+            fs=[ex.submit(contextvars.copy_context().run,self._run_branch,shared,bp,base) for _,bp in todo]
+            for i,(k,bp) in enumerate(todo):
+                b=fs[i].result(); fs[i]=None  # drop the finished copy once merged
+                if not isolated: branches.append(b); continue
+                if callable(self.merge): self.merge(shared,b,bp)
+                else: _merge_changes(shared,base,b,self.merge=="deep")
+                b=None
+                self._mark_done(shared,done,k)  # merged in param order, so a crash keeps every earlier run
+        finally: ex.shutdown(cancel_futures=True)
+        if self._snapshots(shared): shared.merge(branches)
+        if not isolated:
+            for k,_ in todo: self._mark_done(shared,done,k)
         return self.post(shared,pr,None)
 
+def _work_steal(tasks,run,workers=None):
+    if not tasks: return
+    workers=workers or min(32,(os.cpu_count() or 1)+4); qs=[collections.deque() for _ in range(workers)]; cv=threading.Condition(); st={"left":len(tasks),"err":None}
+    for k,t in enumerate(tasks): qs[k%workers].append(t)
+    def take(w):
+        for q in qs[w:]+qs[:w]:
+            try: return q.pop() if q is qs[w] else q.popleft()
+            except IndexError: pass
+    def worker(w):
+        def push(t):
+            with cv: st["left"]+=1; qs[w].append(t); cv.notify()
+        while st["err"] is None:
+            t=take(w)
+            if t is None:
+                with cv:
+                    while not any(qs) and st["left"] and st["err"] is None: cv.wait()
+                    if not st["left"]: return
+                continue
+            try: run(t,push)
+            except BaseException as e:
+                with cv: st["err"]=e if st["err"] is None else st["err"]; cv.notify_all()
+                return
+            with cv:
+                st["left"]-=1
+                if not st["left"]: cv.notify_all()
+    ex=ThreadPoolExecutor(workers)
+    try:
+        for f in [ex.submit(contextvars.copy_context().run,worker,w) for w in range(workers)]: f.result()
+    finally: ex.shutdown()
+    if st["err"] is not None: raise st["err"]
+
+class _Level:
+    def __init__(self,node,prep_res,params,parent): self.node,self.prep_res,self.params,self.parent,self.left=node,prep_res,params,parent,len(prep_res)
+
+class WorkStealingBatchFlow(BatchFlow):
+    _track_nodes=False
+    def __init__(self,start=None,max_workers=None): super().__init__(start); self.max_workers=max_workers
+    def _expands(self,n): return type(n)._run is BatchFlow._run and not isinstance(n,AsyncNode) and n.timeout is None and n.checkpoint is None
+    def _run(self,shared):
+        if self.checkpoint is not None: raise ValueError("WorkStealingBatchFlow does not support checkpoint: its tasks write to one shared dict concurrently. Use BatchFlow or ThreadedBatchFlow(merge=...)")
+        with _deadline_scope(self.timeout):
+            pr=list(self.prep(shared) or []); root,lock=_Level(self,pr,self.params,None),threading.Lock()
+            def walk(curr,p,parent,push):
+                while curr:
+                    curr.set_params(p)
+                    if not self._expands(curr): action=curr._run(shared)
+                    else:
+                        cpr=list(curr.prep(shared) or [])
+                        if cpr:
+                            lvl=_Level(curr,cpr,p,parent)
+                            for bp in reversed(cpr): push((copy.copy(curr.start_node),{**p,**bp},lvl))
+                            return
+                        action=curr.post(shared,cpr,None)
+                    curr=copy.copy(self.get_next_node(curr,action))
+                finish(parent,push)
+            def finish(lvl,push):
+                with lock: lvl.left-=1; last=not lvl.left
+                if last and lvl.parent is not None: walk(copy.copy(self.get_next_node(lvl.node,lvl.node.post(shared,lvl.prep_res,None))),lvl.params,lvl.parent,push)
+            _work_steal([(copy.copy(self.start_node),{**self.params,**bp},root) for bp in pr],lambda t,push: walk(*t,push),self.max_workers)
+            return self.post(shared,pr,None)
+
+def _targets(s): return list(s) if isinstance(s,(list,tuple)) else [s]
+
+class DAGFlow(Flow):
+    _track_nodes=False
+    def __init__(self,start=None,max_workers=None): super().__init__(start); self.max_workers=max_workers
+    def _no_checkpoint(self):
+        if self.checkpoint is not None: raise ValueError(f"{type(self).__name__} does not support checkpoint: branches run concurrently, so there is no single position to resume from")
+    def compile(self):
+        nodes,idx,stack=[],{},[self.start_node]
+        while stack:
+            n=stack.pop()
+            if n is not None and id(n) not in idx: idx[id(n)]=len(nodes); nodes.append(n); stack.extend(t for s in reversed(list(n.successors.values())) for t in reversed(_targets(s)))
+        table=[{a:[idx[id(t)] for t in _targets(s)] for a,s in n.successors.items()} for n in nodes]; npred=[0]*len(nodes)
+        for t in table:
+            for j in (j for ts in t.values() for j in ts): npred[j]+=1
+        left,ready,seen=list(npred),[0] if nodes and not npred[0] else [],0
+        while ready:
+            i=ready.pop(); seen+=1
+            for j in (j for ts in table[i].values() for j in ts):
+                left[j]-=1
+                if left[j]==0: ready.append(j)
+        if seen<len(nodes): raise ValueError(f"DAGFlow has a cycle through {sorted({type(nodes[i]).__name__ for i,c in enumerate(left) if c>0})}")
+        self._plan=(nodes,table,npred); return self
+    def _resolve(self,i,action,pending,live,ready):
+        stack=[(i,action,True)]
+        while stack:
+            i,a,ran=stack.pop(); t=self._plan[1][i]; a=a or "default"
+            if ran and t and a not in t: warnings.warn(f"Flow ends: '{a}' not found in {list(t)}")
+            for b,ts in t.items():
+                for j in ts:
+                    pending[j]-=1; live[j]=live[j] or (ran and b==a)
+                    if pending[j]==0: ready.append(j) if live[j] else stack.append((j,None,False))
+    def _schedule(self,params):
+        if self._plan is None: self.compile()
+        nodes=self._instances(params); return nodes,list(self._plan[2]),[i==0 for i in range(len(nodes))],[0] if nodes else []
+    def _orch(self,shared,params=None):
+        self._no_checkpoint(); nodes,pending,live,ready=self._schedule(params or {**self.params}); last_action,running=None,{}
+        if not nodes: return None
+        ex=ThreadPoolExecutor(self.max_workers)
+        try:
+            while ready or running:
+                for i in ready: running[ex.submit(contextvars.copy_context().run,nodes[i]._run,shared)]=i
+                ready.clear(); done,_=wait(running,return_when=FIRST_COMPLETED)
+                for f in done: i=running.pop(f); last_action=f.result(); self._resolve(i,last_action,pending,live,ready)
+        finally: ex.shutdown(cancel_futures=True)
+        return last_action
+
+class RateLimiter:
+    def __init__(self,rps=None,tpm=None): self.rps,self.tpm,self.reqs,self.toks,self.t=rps,tpm,float(max(rps,1) if rps else 0),float(tpm or 0),time.monotonic()
+    async def acquire(self,tokens=0):
+        tokens=min(tokens,self.tpm or 0)
+        while True:
+            now=time.monotonic(); dt,self.t=now-self.t,now
+            if self.rps: self.reqs=min(max(self.rps,1),self.reqs+dt*self.rps)
+            if self.tpm: self.toks=min(self.tpm,self.toks+dt*self.tpm/60)
+            wait=max((1-self.reqs)/self.rps if self.rps else 0,(tokens-self.toks)*60/self.tpm if self.tpm else 0)
+            if wait<=0: self.reqs-=1 if self.rps else 0; self.toks-=tokens; return
+            await asyncio.sleep(wait)
+
+async def _gather_bounded(fn,items,limit=None,limiter=None,cost=lambda item:0):
+    items=list(items); res,it=[None]*len(items),iter(enumerate(items))
+    async def worker():
+        for i,item in it:
+            if limiter: await limiter.acquire(cost(item))
+            res[i]=await fn(item)
+    workers=[asyncio.ensure_future(worker()) for _ in range(min(limit or len(items),len(items)))]
+    try: await asyncio.gather(*workers)
+    except BaseException:
+        for w in workers: w.cancel()
+        await asyncio.gather(*workers,return_exceptions=True); raise
+    return res
+
 class AsyncNode(Node):
     async def prep_async(self,shared): pass
     async def exec_async(self,prep_res): pass
+    async def exec_batch_async(self,prep_res_list): return [await self.exec_async(p) for p in prep_res_list]
     async def exec_fallback_async(self,prep_res,exc): raise exc
     async def post_async(self,shared,prep_res,exec_res): pass
+    async def _exec_once_async(self,prep_res):
+        t=self._time_left()
+        if t is not None and t<=0: raise NodeTimeout(self,max(t,0))
+        fn=self.exec_async if self.batcher is None else functools.partial(self.batcher.call_async,self.exec_batch_async)
+        c=fn(prep_res) if self.cache is None else self.cache.call_async(self,fn,prep_res)
+        if t is None: return await c
+        try: return await asyncio.wait_for(c,t)
+        except asyncio.TimeoutError: raise NodeTimeout(self,t) from None
     async def _exec(self,prep_res): 
+        t0=time.monotonic()
         for self.cur_retry in range(self.max_retries):
-            try: return await self.exec_async(prep_res)
+            try: return await self._exec_once_async(prep_res)
             except Exception as e:
-                if self.cur_retry==self.max_retries-1: return await self.exec_fallback_async(prep_res,e)
-                if self.wait>0: await asyncio.sleep(self.wait)
+                d=self._retry_delay(e,t0)
+                if _hooks: _emit(self,"exec","retry" if d is not None else "fallback",attempt=self.cur_retry,error=e)
+                if d is None: return await self.exec_fallback_async(prep_res,e)
+                if d>0: await asyncio.sleep(d)
     async def run_async(self,shared): 
         if self.successors: warnings.warn("Node won't run successors. Use AsyncFlow.")  
-        return await self._run_async(shared)
-    async def _run_async(self,shared): p=await self.prep_async(shared); e=await self._exec(p); return await self.post_async(shared,p,e)
+        with _run_scope(): return await self._run_async(shared)
+    async def _run_async(self,shared):
+        if _hooks: p=await _timed_async(self,"prep",self.prep_async,shared); e=await _timed_async(self,"exec",self._exec,p); return await _timed_async(self,"post",self.post_async,shared,p,e)
+        p=await self.prep_async(shared); e=await self._exec(p); return await self.post_async(shared,p,e)
     def _run(self,shared): raise RuntimeError("Use run_async.")
 
 class AsyncBatchNode(AsyncNode,BatchNode):
-    async def _exec(self,items): return [await super(AsyncBatchNode,self)._exec(i) for i in items]
+    async def _exec_item(self,item): return await (_timed_async(self,"item",super(AsyncBatchNode,self)._exec,item) if _hooks else super(AsyncBatchNode,self)._exec(item))
+    async def _exec(self,items): return [await self._exec_item(i) for i in items] if self.batcher is None else await _gather_bounded(self._exec_item,items or [],self.batcher.max_batch_size)
 
 class AsyncParallelBatchNode(AsyncNode,BatchNode):
-    async def _exec(self,items): return await asyncio.gather(*(super(AsyncParallelBatchNode,self)._exec(i) for i in items))
+    def __init__(self,max_retries=1,wait=0,max_concurrency=None,rate_limit=None): super().__init__(max_retries,wait); self.max_concurrency,self.rate_limit=max_concurrency,rate_limit
+    def item_tokens(self,item): return 0
+    async def _exec_item(self,item): return await (_timed_async(self,"item",super(AsyncParallelBatchNode,self)._exec,item) if _hooks else super(AsyncParallelBatchNode,self)._exec(item))
+    async def _exec(self,items): return await _gather_bounded(self._exec_item,items or [],self.max_concurrency,self.rate_limit,self.item_tokens)
 
 class AsyncFlow(Flow,AsyncNode):
     async def _orch_async(self,shared,params=None):
-        curr,p,last_action =copy.copy(self.start_node),(params or {**self.params}),None
+        p,last_action=(params or {**self.params}),None
+        if self._plan:
+            nodes=self._instances(p); i,last_action=self._start_point(nodes)
+            while i is not None:
+                n=nodes[i]; last_action=await n._run_async(shared) if isinstance(n,AsyncNode) else n._run(shared); i=self._next_index(i,last_action)
+                if i is not None and self.checkpoint is not None and self._track_nodes: self._save(shared,node=i,action=last_action)
+            return last_action
+        curr=copy.copy(self.start_node)
         while curr: curr.set_params(p); last_action=await curr._run_async(shared) if isinstance(curr,AsyncNode) else curr._run(shared); curr=copy.copy(self.get_next_node(curr,last_action))
         return last_action
-    async def _run_async(self,shared): p=await self.prep_async(shared); o=await self._orch_async(shared); return await self.post_async(shared,p,o)
+    async def _run_async(self,shared):
+        with _deadline_scope(self.timeout): p=await self.prep_async(shared); o=await self._orch_async(shared); return await self.post_async(shared,p,o)
     async def post_async(self,shared,prep_res,exec_res): return exec_res
+    async def run_async(self,shared):
+        if self.checkpoint is None: return await super().run_async(shared)
+        self._begin({}); r=await super().run_async(shared); self._finish(); return r
+    async def resume_async(self,shared): self._begin(self.checkpoint.load(shared) or {}); r=await AsyncNode.run_async(self,shared); self._finish(); return r
 
 class AsyncBatchFlow(AsyncFlow,BatchFlow):
     async def _run_async(self,shared):
-        pr=await self.prep_async(shared) or []
-        for bp in pr: await self._orch_async(shared,{**self.params,**bp})
-        return await self.post_async(shared,pr,None)
+        with _deadline_scope(self.timeout):
+            pr=await self.prep_async(shared) or []; done=set(self._state.get("done",()))
+            for k,bp in enumerate(pr):
+                if k not in done: await self._orch_async(shared,{**self.params,**bp}); self._mark_done(shared,done,k)
+            return await self.post_async(shared,pr,None)
 
 class AsyncParallelBatchFlow(AsyncFlow,BatchFlow):
+    _track_nodes=False
+    def __init__(self,start=None,max_concurrency=None,rate_limit=None): super().__init__(start); self.max_concurrency,self.rate_limit=max_concurrency,rate_limit
     async def _run_async(self,shared): 
-        pr=await self.prep_async(shared) or []
-        await asyncio.gather(*(self._orch_async(shared,{**self.params,**bp}) for bp in pr))
-        return await self.post_async(shared,pr,None)
\ No newline at end of file
+        with _deadline_scope(self.timeout):
+            snap=getattr(shared,"snapshot",None)
+            if self.checkpoint is not None and snap is None: raise ValueError("AsyncParallelBatchFlow can't checkpoint while runs write to one shared dict; use a SharedStore")
+            pr=await self.prep_async(shared) or []; done=set(self._state.get("done",()))
+            todo=[kbp for kbp in enumerate(pr) if kbp[0] not in done]
+            async def run_one(kbp):
+                branch=shared if snap is None else snap(); await self._orch_async(branch,{**self.params,**kbp[1]}); return branch
+            branches=await _gather_bounded(run_one,todo,self.max_concurrency,self.rate_limit)
+            if snap is not None:
+                shared.merge(branches)
+                for k,_ in todo: self._mark_done(shared,done,k)
+            return await self.post_async(shared,pr,None)
+
+class AsyncDAGFlow(AsyncFlow,DAGFlow):
+    def __init__(self,start=None,max_concurrency=None): super().__init__(start); self.max_concurrency=max_concurrency
+    async def _orch_async(self,shared,params=None):
+        self._no_checkpoint(); nodes,pending,live,ready=self._schedule(params or {**self.params}); last_action,running=None,{}
+        async def run(n): return await n._run_async(shared) if isinstance(n,AsyncNode) else n._run(shared)
+        try:
+            while ready or running:
+                while ready and not (self.max_concurrency and len(running)>=self.max_concurrency): i=ready.pop(0); running[asyncio.ensure_future(run(nodes[i]))]=i
+                done,_=await asyncio.wait(running,return_when=asyncio.FIRST_COMPLETED)
+                for f in done: i=running.pop(f); last_action=f.result(); self._resolve(i,last_action,pending,live,ready)
+        except BaseException:
+            for f in running: f.cancel()
+            await asyncio.gather(*running,return_exceptions=True); raise
+        return last_action
+
+_END=object()
+async def _aiter(it):
+    if it is None: return
+    if hasattr(it,"__aiter__"):
+        async for x in it: yield x
+    elif iter(it) is it:  # lazy iterators may block (files, generators), so advance them off the loop
+        while (x:=await asyncio.to_thread(next,it,_END)) is not _END: yield x
+    else:
+        for x in it: yield x
+def _emitted(r): return _aiter(r) if inspect.isgenerator(r) or inspect.isasyncgen(r) else _aiter((r,))
+
+class _Stage:
+    def __init__(self,node,name,queue_size):
+        self.node,self.name,self.q=node,name,asyncio.Queue(queue_size); self.workers=self.live=getattr(node,"max_concurrency",None) or 1
+        self.items_in=self.items_out=self.puts=self.depth_max=self.depth_sum=0; self.busy=self.blocked=self.starved=self.seconds=0.0
+    async def get(self): t=time.perf_counter(); x=await self.q.get(); self.starved+=time.perf_counter()-t; return x
+    async def put(self,x):
+        t=time.perf_counter(); await self.q.put(x); d=self.q.qsize(); self.puts+=1; self.depth_sum+=d; self.depth_max=max(self.depth_max,d); return time.perf_counter()-t
+    def summary(self):
+        s=self.seconds or 1e-9
+        return {"workers":self.workers,"items_in":self.items_in,"items_out":self.items_out,"seconds":self.seconds,"throughput":self.items_out/s,"busy":self.busy,
+                "utilization":self.busy/(s*self.workers),"blocked":self.blocked,"starved":self.starved,"queue_max":self.depth_max,"queue_mean":self.depth_sum/max(1,self.puts)}
+
+class AsyncPipelineFlow(AsyncFlow):
+    _track_nodes=False
+    def __init__(self,start=None,queue_size=64): super().__init__(start); self.queue_size,self.metrics=queue_size,{}
+    def _chain(self,p):
+        nodes,seen,n=[],set(),self.start_node
+        while n is not None:
+            if id(n) in seen or set(n.successors)-{"default"}: raise ValueError(f"{type(self).__name__} needs a linear chain of nodes joined by default transitions")
+            seen.add(id(n)); c=copy.copy(n); c.set_params(p); nodes.append(c); n=n.successors.get("default")
+        return nodes
+    async def _work(self,shared,s,nxt,n,t0):
+        fn,is_async=(n._exec_item if isinstance(n,BatchNode) else n._exec),isinstance(n,AsyncNode)
+        post_item=getattr(n,"post_item_async",None) or getattr(n,"post_item",None)
+        while (item:=await s.get()) is not _END:
+            t,blocked=time.perf_counter(),0.0; s.items_in+=1
+            r=await fn(item) if is_async else await asyncio.to_thread(fn,item)
+            async for x in _emitted(r):
+                if post_item is not None: pr=post_item(shared,item,x); pr=await pr if inspect.isawaitable(pr) else pr
+                if nxt is not None: blocked+=await nxt.put(x)
+                s.items_out+=1
+            s.busy+=time.perf_counter()-t-blocked; s.blocked+=blocked
+        s.live-=1
+        if s.live: return
+        s.seconds=time.perf_counter()-t0  # last worker of the stage closes the next one
+        for _ in range(nxt.workers if nxt is not None else 0): await nxt.q.put(_END)
+    async def _feed(self,source,s):
+        async for x in _aiter(source): await s.put(x)
+        for _ in range(s.workers): await s.q.put(_END)
+    async def _orch_async(self,shared,params=None):
+        if self.checkpoint is not None: raise ValueError("AsyncPipelineFlow does not support checkpoint: items are in flight in every stage at once, so there is no position to resume from")
+        nodes=self._chain(params or {**self.params})
+        if not nodes: return None
+        preps=[await n.prep_async(shared) if isinstance(n,AsyncNode) else n.prep(shared) for n in nodes]
+        names=[type(n).__name__ for n in nodes]; names=[m if names.count(m)==1 else f"{m}#{i}" for i,m in enumerate(names)]
+        stages=[_Stage(n,m,self.queue_size) for n,m in zip(nodes,names)]; t0=time.perf_counter()
+        tasks=[asyncio.ensure_future(self._feed(preps[0],stages[0]))]+[asyncio.ensure_future(self._work(shared,s,nxt,copy.copy(s.node),t0)) for s,nxt in zip(stages,stages[1:]+[None]) for _ in range(s.workers)]
+        try: await asyncio.gather(*tasks)
+        except BaseException:
+            for t in tasks: t.cancel()
+            await asyncio.gather(*tasks,return_exceptions=True); raise
+        finally: self.metrics.clear(); self.metrics.update((s.name,s.summary()) for s in stages)  # in place, so copies made by an outer flow report here too
+        last_action=None
+        for n,pr in zip(nodes,preps): last_action=await n.post_async(shared,pr,None) if isinstance(n,AsyncNode) else n.post(shared,pr,None)
+        return last_action
+    def metrics_table(self):
+        rows=[("stage","workers","in","out","items/s","util %","blocked s","starved s","queue max","queue mean")]
+        for name,m in self.metrics.items():
+            rows.append((name,str(m["workers"]),str(m["items_in"]),str(m["items_out"]),f"{m['throughput']:.1f}",f"{m['utilization']*100:.0f}",f"{m['blocked']:.2f}",f"{m['starved']:.2f}",str(m["queue_max"]),f"{m['queue_mean']:.1f}"))
+        widths=[max(len(r[i]) for r in rows) for i in range(len(rows[0]))]
+        lines=["  ".join(c.ljust(w) if i==0 else c.rjust(w) for i,(c,w) in enumerate(zip(r,widths))) for r in rows]
+        return "\n".join([lines[0],"  ".join("-"*w for w in widths),*lines[1:]])
@@ -1,30 +1,58 @@
 import asyncio
-from typing import Any, Dict, List, Optional, Union, TypeVar, Generic
+import contextvars
+from concurrent.futures import Executor
+from typing import Any, AsyncIterator, Awaitable, Callable, ContextManager, Dict, Iterable, List, Literal, MutableMapping, Optional, Protocol, Set, Tuple, Type, Union, TypeVar, Generic
 
 # Type variables for better type relationships
 _PrepResult = TypeVar('_PrepResult')
 _ExecResult = TypeVar('_ExecResult')
 _PostResult = TypeVar('_PostResult')
+_FlowT = TypeVar('_FlowT', bound='Flow[Any, Any, Any]')
 
 # More specific parameter types
 ParamValue = Union[str, int, float, bool, None, List[Any], Dict[str, Any]]
-SharedData = Dict[str, Any]
+SharedData = MutableMapping[str, Any]
 Params = Dict[str, ParamValue]
 
+Successor = Union["BaseNode[Any, Any, Any]", List["BaseNode[Any, Any, Any]"]]
+
+_deadline: contextvars.ContextVar[Optional[float]]
+_retries: contextvars.ContextVar[Optional[Dict[Any, int]]]
+
+class NodeTimeout(TimeoutError):
+    node: BaseNode[Any, Any, Any]
+    timeout: float
+    
+    def __init__(self, node: BaseNode[Any, Any, Any], timeout: float) -> None: ...
+
+def _deadline_scope(timeout: Optional[float]) -> ContextManager[None]: ...
+def _run_scope() -> ContextManager[None]: ...
+def _watchdog(node: BaseNode[Any, Any, Any], fn: Callable[[Any], Any], arg: Any, timeout: float) -> Any: ...
+
+Hook = Callable[["BaseNode[Any, Any, Any]", str, str, Dict[str, Any]], None]
+_hooks: List[Hook]
+
+def add_hook(hook: Hook) -> Hook: ...
+def remove_hook(hook: Hook) -> None: ...
+def _emit(node: BaseNode[Any, Any, Any], phase: str, event: str, **info: Any) -> None: ...
+def _timed(node: BaseNode[Any, Any, Any], phase: str, fn: Callable[..., Any], *args: Any) -> Any: ...
+async def _timed_async(node: BaseNode[Any, Any, Any], phase: str, fn: Callable[..., Awaitable[Any]], *args: Any) -> Any: ...
+
 class BaseNode(Generic[_PrepResult, _ExecResult, _PostResult]):
     params: Params
-    successors: Dict[str, BaseNode[Any, Any, Any]]
+    successors: Dict[str, Successor]
     
     def __init__(self) -> None: ...
     def set_params(self, params: Params) -> None: ...
-    def next(self, node: BaseNode[Any, Any, Any], action: str = "default") -> BaseNode[Any, Any, Any]: ...
+    def next(self, node: Successor, action: str = "default") -> Successor: ...
     def prep(self, shared: SharedData) -> _PrepResult: ...
     def exec(self, prep_res: _PrepResult) -> _ExecResult: ...
     def post(self, shared: SharedData, prep_res: _PrepResult, exec_res: _ExecResult) -> _PostResult: ...
     def _exec(self, prep_res: _PrepResult) -> _ExecResult: ...
     def _run(self, shared: SharedData) -> _PostResult: ...
     def run(self, shared: SharedData) -> _PostResult: ...
-    def __rshift__(self, other: BaseNode[Any, Any, Any]) -> BaseNode[Any, Any, Any]: ...
+    def __rshift__(self, other: Successor) -> Successor: ...
+    def __rrshift__(self, other: Union[List[BaseNode[Any, Any, Any]], Tuple[BaseNode[Any, Any, Any], ...]]) -> BaseNode[Any, Any, Any]: ...
     def __sub__(self, action: str) -> _ConditionalTransition: ...
 
 class _ConditionalTransition:
@@ -32,41 +60,187 @@ class _ConditionalTransition:
     action: str
     
     def __init__(self, src: BaseNode[Any, Any, Any], action: str) -> None: ...
-    def __rshift__(self, tgt: BaseNode[Any, Any, Any]) -> BaseNode[Any, Any, Any]: ...
+    def __rshift__(self, tgt: Successor) -> Successor: ...
+
+class _ExecCache(Protocol):
+    def call(self, node: Node[Any, Any, Any], fn: Callable[[Any], Any], prep_res: Any) -> Any: ...
+    async def call_async(self, node: Node[Any, Any, Any], fn: Callable[[Any], Awaitable[Any]], prep_res: Any) -> Any: ...
+
+class _RetryPolicy(Protocol):
+    def delay(self, attempt: int, exc: Exception, elapsed: float) -> Optional[float]: ...
+
+class _MicroBatcher(Protocol):
+    max_batch_size: int
+    def call(self, fn: Callable[[List[Any]], List[Any]], item: Any) -> Any: ...
+    async def call_async(self, fn: Callable[[List[Any]], Awaitable[List[Any]]], item: Any) -> Any: ...
+
+class _Transport(Protocol):
+    def start(self) -> None: ...
+    def export(self, obj: Any, owned: Optional[List[Any]] = None) -> Any: ...
+    def run(self, fn: Callable[[Any], Any], obj: Any) -> Any: ...
+    def load(self, obj: Any, copy: bool = True) -> Any: ...
+    def release(self, owned: List[Any]) -> None: ...
 
 class Node(BaseNode[_PrepResult, _ExecResult, _PostResult]):
+    cache: Optional[_ExecCache]
+    retry: Optional[_RetryPolicy]
+    batcher: Optional[_MicroBatcher]
+    timeout: Optional[float]
     max_retries: int
     wait: Union[int, float]
     cur_retry: int
     
     def __init__(self, max_retries: int = 1, wait: Union[int, float] = 0) -> None: ...
+    def exec_batch(self, prep_res_list: List[_PrepResult]) -> List[_ExecResult]: ...
     def exec_fallback(self, prep_res: _PrepResult, exc: Exception) -> _ExecResult: ...
+    def _retry_delay(self, exc: Exception, t0: float) -> Optional[float]: ...
+    def _time_left(self) -> Optional[float]: ...
+    def _exec_once(self, prep_res: _PrepResult) -> _ExecResult: ...
     def _exec(self, prep_res: _PrepResult) -> _ExecResult: ...
 
 class BatchNode(Node[Optional[List[_PrepResult]], List[_ExecResult], _PostResult]):
+    def _exec_item(self, item: _PrepResult) -> _ExecResult: ...
     def _exec(self, items: Optional[List[_PrepResult]]) -> List[_ExecResult]: ...
 
+class StreamingBatchNode(BatchNode[_PrepResult, _ExecResult, _PostResult]):
+    def post_item(self, shared: SharedData, item: _PrepResult, exec_res: _ExecResult) -> None: ...
+    def _stream(self, shared: SharedData, p: Optional[Iterable[_PrepResult]]) -> None: ...
+    def _run(self, shared: SharedData) -> _PostResult: ...
+
+class _PoolBatchNode(BatchNode[_PrepResult, _ExecResult, _PostResult]):
+    executor_cls: Optional[Type[Executor]]
+    transport: Optional[_Transport]
+    max_workers: Optional[int]
+    chunksize: int
+    ordered: bool
+    
+    def __init__(
+        self,
+        max_retries: int = 1,
+        wait: Union[int, float] = 0,
+        max_workers: Optional[int] = None,
+        chunksize: int = 1,
+        ordered: bool = True,
+    ) -> None: ...
+    def _exec_chunk(self, chunk: List[_PrepResult], shm: bool = False) -> List[_ExecResult]: ...
+    def _exec(self, items: Optional[List[_PrepResult]]) -> List[_ExecResult]: ...
+
+class ThreadPoolBatchNode(_PoolBatchNode[_PrepResult, _ExecResult, _PostResult]): ...
+
+class ProcessPoolBatchNode(_PoolBatchNode[_PrepResult, _ExecResult, _PostResult]): ...
+
+class _CheckpointStore(Protocol):
+    def save(self, shared: SharedData, state: Dict[str, Any]) -> None: ...
+    def load(self, shared: SharedData) -> Optional[Dict[str, Any]]: ...
+    def clear(self) -> None: ...
+
 class Flow(BaseNode[_PrepResult, Any, _PostResult]):
+    timeout: Optional[float]
+    checkpoint: Optional[_CheckpointStore]
+    _track_nodes: bool
     start_node: Optional[BaseNode[Any, Any, Any]]
+    _plan: Optional[Tuple[List[BaseNode[Any, Any, Any]], List[Dict[str, int]]]]
+    _state: Dict[str, Any]
+    _resume_at: Optional[Tuple[int, Optional[str]]]
     
     def __init__(self, start: Optional[BaseNode[Any, Any, Any]] = None) -> None: ...
     def start(self, start: BaseNode[Any, Any, Any]) -> BaseNode[Any, Any, Any]: ...
     def get_next_node(
         self, curr: BaseNode[Any, Any, Any], action: Optional[str]
     ) -> Optional[BaseNode[Any, Any, Any]]: ...
+    def compile(self: _FlowT) -> _FlowT: ...
+    def _instances(self, params: Params) -> List[BaseNode[Any, Any, Any]]: ...
+    def _next_index(self, i: int, action: Optional[str]) -> Optional[int]: ...
+    def _start_point(self, nodes: List[BaseNode[Any, Any, Any]]) -> Tuple[Optional[int], Optional[str]]: ...
+    def _save(self, shared: SharedData, **state: Any) -> None: ...
     def _orch(
         self, shared: SharedData, params: Optional[Params] = None
     ) -> Any: ...
     def _run(self, shared: SharedData) -> _PostResult: ...
     def post(self, shared: SharedData, prep_res: _PrepResult, exec_res: Any) -> _PostResult: ...
+    def _begin(self, state: Dict[str, Any]) -> None: ...
+    def _finish(self) -> None: ...
+    def run(self, shared: SharedData) -> _PostResult: ...
+    def resume(self, shared: SharedData) -> _PostResult: ...
 
 class BatchFlow(Flow[Optional[List[Params]], Any, _PostResult]):
+    def _mark_done(self, shared: SharedData, done: Set[int], k: int) -> None: ...
+    def _run(self, shared: SharedData) -> _PostResult: ...
+
+def _same(a: Any, b: Any) -> bool: ...
+def _merge_changes(dst: Dict[str, Any], base: Dict[str, Any], branch: Dict[str, Any], deep: bool) -> None: ...
+
+MergeStrategy = Union[Literal["update", "deep"], Callable[[SharedData, SharedData, Params], None], None]
+
+class ThreadedBatchFlow(BatchFlow[_PostResult]):
+    max_workers: Optional[int]
+    merge: MergeStrategy
+    
+    def __init__(
+        self,
+        start: Optional[BaseNode[Any, Any, Any]] = None,
+        max_workers: Optional[int] = None,
+        merge: MergeStrategy = None,
+    ) -> None: ...
+    def _snapshots(self, shared: SharedData) -> bool: ...
+    def _run_branch(self, shared: SharedData, bp: Params, base: Optional[SharedData] = None) -> SharedData: ...
     def _run(self, shared: SharedData) -> _PostResult: ...
+    def _run_threaded(self, shared: SharedData) -> _PostResult: ...
+
+_Task = TypeVar('_Task')
+
+def _work_steal(
+    tasks: List[_Task], run: Callable[[_Task, Callable[[_Task], None]], None], workers: Optional[int] = None
+) -> None: ...
+
+class _Level:
+    node: BaseNode[Any, Any, Any]
+    prep_res: List[Params]
+    params: Params
+    parent: Optional[_Level]
+    left: int
+    
+    def __init__(self, node: BaseNode[Any, Any, Any], prep_res: List[Params], params: Params, parent: Optional[_Level]) -> None: ...
+
+class WorkStealingBatchFlow(BatchFlow[_PostResult]):
+    max_workers: Optional[int]
+    
+    def __init__(self, start: Optional[BaseNode[Any, Any, Any]] = None, max_workers: Optional[int] = None) -> None: ...
+    def _expands(self, node: BaseNode[Any, Any, Any]) -> bool: ...
+    def _run(self, shared: SharedData) -> _PostResult: ...
+
+def _targets(s: Successor) -> List[BaseNode[Any, Any, Any]]: ...
+
+class DAGFlow(Flow[_PrepResult, Any, _PostResult]):
+    max_workers: Optional[int]
+    _plan: Optional[Tuple[List[BaseNode[Any, Any, Any]], List[Dict[str, List[int]]], List[int]]]  # type: ignore[assignment]
+    
+    def __init__(self, start: Optional[BaseNode[Any, Any, Any]] = None, max_workers: Optional[int] = None) -> None: ...
+    def _no_checkpoint(self) -> None: ...
+    def _resolve(self, i: int, action: Optional[str], pending: List[int], live: List[bool], ready: List[int]) -> None: ...
+    def _schedule(self, params: Params) -> Tuple[List[BaseNode[Any, Any, Any]], List[int], List[bool], List[int]]: ...
+
+class RateLimiter:
+    rps: Optional[float]
+    tpm: Optional[float]
+    
+    def __init__(self, rps: Optional[float] = None, tpm: Optional[float] = None) -> None: ...
+    async def acquire(self, tokens: int = 0) -> None: ...
+
+async def _gather_bounded(
+    fn: Callable[[Any], Awaitable[Any]],
+    items: Iterable[Any],
+    limit: Optional[int] = None,
+    limiter: Optional[RateLimiter] = None,
+    cost: Callable[[Any], int] = ...,
+) -> List[Any]: ...
 
 class AsyncNode(Node[_PrepResult, _ExecResult, _PostResult]):
     async def prep_async(self, shared: SharedData) -> _PrepResult: ...
     async def exec_async(self, prep_res: _PrepResult) -> _ExecResult: ...
+    async def exec_batch_async(self, prep_res_list: List[_PrepResult]) -> List[_ExecResult]: ...
     async def exec_fallback_async(self, prep_res: _PrepResult, exc: Exception) -> _ExecResult: ...
+    async def _exec_once_async(self, prep_res: _PrepResult) -> _ExecResult: ...
     async def post_async(
         self, shared: SharedData, prep_res: _PrepResult, exec_res: _ExecResult
     ) -> _PostResult: ...
@@ -76,9 +250,22 @@ class AsyncNode(Node[_PrepResult, _ExecResult, _PostResult]):
     def _run(self, shared: SharedData) -> _PostResult: ...
 
 class AsyncBatchNode(AsyncNode[Optional[List[_PrepResult]], List[_ExecResult], _PostResult], BatchNode[Optional[List[_PrepResult]], List[_ExecResult], _PostResult]):
+    async def _exec_item(self, item: _PrepResult) -> _ExecResult: ...  # type: ignore[override]
     async def _exec(self, items: Optional[List[_PrepResult]]) -> List[_ExecResult]: ...
 
 class AsyncParallelBatchNode(AsyncNode[Optional[List[_PrepResult]], List[_ExecResult], _PostResult], BatchNode[Optional[List[_PrepResult]], List[_ExecResult], _PostResult]):
+    async def _exec_item(self, item: _PrepResult) -> _ExecResult: ...  # type: ignore[override]
+    max_concurrency: Optional[int]
+    rate_limit: Optional[RateLimiter]
+    
+    def __init__(
+        self,
+        max_retries: int = 1,
+        wait: Union[int, float] = 0,
+        max_concurrency: Optional[int] = None,
+        rate_limit: Optional[RateLimiter] = None,
+    ) -> None: ...
+    def item_tokens(self, item: _PrepResult) -> int: ...
     async def _exec(self, items: Optional[List[_PrepResult]]) -> List[_ExecResult]: ...
 
 class AsyncFlow(Flow[_PrepResult, Any, _PostResult], AsyncNode[_PrepResult, Any, _PostResult]):
@@ -89,9 +276,69 @@ class AsyncFlow(Flow[_PrepResult, Any, _PostResult], AsyncNode[_PrepResult, Any,
     async def post_async(
         self, shared: SharedData, prep_res: _PrepResult, exec_res: Any
     ) -> _PostResult: ...
+    async def run_async(self, shared: SharedData) -> _PostResult: ...
+    async def resume_async(self, shared: SharedData) -> _PostResult: ...
 
 class AsyncBatchFlow(AsyncFlow[Optional[List[Params]], Any, _PostResult], BatchFlow[Optional[List[Params]], Any, _PostResult]):
     async def _run_async(self, shared: SharedData) -> _PostResult: ...
 
 class AsyncParallelBatchFlow(AsyncFlow[Optional[List[Params]], Any, _PostResult], BatchFlow[Optional[List[Params]], Any, _PostResult]):
-    async def _run_async(self, shared: SharedData) -> _PostResult: ...
\ No newline at end of file
+    max_concurrency: Optional[int]
+    rate_limit: Optional[RateLimiter]
+    
+    def __init__(
+        self,
+        start: Optional[BaseNode[Any, Any, Any]] = None,
+        max_concurrency: Optional[int] = None,
+        rate_limit: Optional[RateLimiter] = None,
+    ) -> None: ...
+    async def _run_async(self, shared: SharedData) -> _PostResult: ...
+
+class AsyncDAGFlow(AsyncFlow[_PrepResult, Any, _PostResult], DAGFlow[_PrepResult, Any, _PostResult]):
+    max_concurrency: Optional[int]
+    
+    def __init__(self, start: Optional[BaseNode[Any, Any, Any]] = None, max_concurrency: Optional[int] = None) -> None: ...
+    async def _orch_async(
+        self, shared: SharedData, params: Optional[Params] = None
+    ) -> Any: ...
+
+_END: object
+
+def _aiter(it: Any) -> AsyncIterator[Any]: ...
+def _emitted(r: Any) -> AsyncIterator[Any]: ...
+
+class _Stage:
+    node: BaseNode[Any, Any, Any]
+    name: str
+    q: asyncio.Queue[Any]
+    workers: int
+    live: int
+    items_in: int
+    items_out: int
+    puts: int
+    depth_max: int
+    depth_sum: int
+    busy: float
+    blocked: float
+    starved: float
+    seconds: float
+
+    def __init__(self, node: BaseNode[Any, Any, Any], name: str, queue_size: int) -> None: ...
+    async def get(self) -> Any: ...
+    async def put(self, x: Any) -> float: ...
+    def summary(self) -> Dict[str, Union[int, float]]: ...
+
+class AsyncPipelineFlow(AsyncFlow[_PrepResult, Any, _PostResult]):
+    queue_size: int
+    metrics: Dict[str, Dict[str, Union[int, float]]]
+
+    def __init__(self, start: Optional[BaseNode[Any, Any, Any]] = None, queue_size: int = 64) -> None: ...
+    def _chain(self, p: Params) -> List[BaseNode[Any, Any, Any]]: ...
+    async def _work(
+        self, shared: SharedData, s: _Stage, nxt: Optional[_Stage], n: BaseNode[Any, Any, Any], t0: float
+    ) -> None: ...
+    async def _feed(self, source: Any, s: _Stage) -> None: ...
+    async def _orch_async(
+        self, shared: SharedData, params: Optional[Params] = None
+    ) -> Any: ...
+    def metrics_table(self) -> str: ...
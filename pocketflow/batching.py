@@ -0,0 +1,73 @@
+import asyncio, threading, time
+from .cache import _encode
+
+class _Slot:
+    __slots__=("fn","item","done","value","error")
+    def __init__(self,fn,item): self.fn,self.item,self.done,self.value,self.error=fn,item,False,None,None
+
+def _params(obj):
+    p=getattr(obj,"params",None)
+    try: return _encode(p)
+    except Exception: return id(p)
+def _key(fn,by_params=True):
+    f=getattr(fn,"__func__",None)
+    if f is None: return fn
+    return (f,type(fn.__self__),_params(fn.__self__) if by_params else None)  # an inherited exec_batch runs each class's own exec, with its own params
+
+def _check(items,results):
+    results=list(results)
+    if len(results)!=len(items): raise ValueError(f"Batch function returned {len(results)} results for {len(items)} items")
+    return results
+
+class MicroBatcher:
+    def __init__(self,max_batch_size=64,max_wait=0.005,by_params=True):
+        self.max_batch_size,self.max_wait,self.by_params,self.batches,self.items=max_batch_size,max_wait,by_params,0,0
+        self._cv,self._pending,self._async,self._tasks=threading.Condition(),{},{},set()
+    def __getstate__(self): s=self.__dict__.copy(); s["_cv"],s["_pending"],s["_async"],s["_tasks"]=None,{},{},set(); return s
+    def __setstate__(self,s): self.__dict__.update(s); self._cv=threading.Condition()
+    def _take(self,key):
+        batch=self._pending.pop(key); self.batches+=1; self.items+=len(batch); self._cv.notify_all(); return batch
+    def _flush(self,batch):
+        try:
+            for s,v in zip(batch,_check(batch,batch[0].fn([s.item for s in batch]))): s.value=v
+        except Exception as e:
+            for s in batch: s.error=e
+        with self._cv:
+            for s in batch: s.done=True
+            self._cv.notify_all()
+    def call(self,fn,item):
+        slot,key,batch=_Slot(fn,item),_key(fn,self.by_params),None
+        with self._cv:
+            q=self._pending.setdefault(key,[]); q.append(slot)
+            if len(q)>=self.max_batch_size: batch=self._take(key)
+            elif len(q)==1:
+                deadline=time.monotonic()+self.max_wait
+                while self._pending.get(key) is q and len(q)<self.max_batch_size:
+                    left=deadline-time.monotonic()
+                    if left<=0: break
+                    self._cv.wait(left)
+                if self._pending.get(key) is q: batch=self._take(key)
+            if batch is None:
+                while not slot.done: self._cv.wait()
+        if batch is not None: self._flush(batch)
+        if slot.error is not None: raise slot.error
+        return slot.value
+    def _flush_async(self,key,q=None):
+        if q is not None and self._async.get(key) is not q: return
+        batch=self._async.pop(key); self.batches+=1; self.items+=len(batch)
+        t=asyncio.ensure_future(self._run_async(batch)); self._tasks.add(t); t.add_done_callback(self._tasks.discard)
+    async def _run_async(self,batch):
+        try: results=_check(batch,await batch[0][0]([item for _,item,_ in batch]))
+        except Exception as e:
+            for _,_,f in batch:
+                if not f.done(): f.set_exception(e)
+            return
+        for (_,_,f),v in zip(batch,results):
+            if not f.done(): f.set_result(v)
+    async def call_async(self,fn,item):
+        loop,key=asyncio.get_running_loop(),_key(fn,self.by_params); fut=loop.create_future()
+        q=self._async.setdefault(key,[]); q.append((fn,item,fut))
+        if len(q)>=self.max_batch_size: self._flush_async(key)
+        elif len(q)==1: loop.call_later(self.max_wait,self._flush_async,key,q)
+        return await fut
+    def stats(self): return {"batches":self.batches,"items":self.items,"mean_batch_size":self.items/self.batches if self.batches else 0.0}
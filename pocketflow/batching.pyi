@@ -0,0 +1,39 @@
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, List, Set, Tuple, Union
+
+BatchFn = Callable[[List[Any]], List[Any]]
+AsyncBatchFn = Callable[[List[Any]], Awaitable[List[Any]]]
+
+class _Slot:
+    fn: BatchFn
+    item: Any
+    done: bool
+    value: Any
+    error: Union[Exception, None]
+
+    def __init__(self, fn: BatchFn, item: Any) -> None: ...
+
+def _params(obj: Any) -> Any: ...
+def _key(fn: Callable[..., Any], by_params: bool = True) -> Any: ...
+def _check(items: List[Any], results: Any) -> List[Any]: ...
+
+class MicroBatcher:
+    max_batch_size: int
+    max_wait: float
+    by_params: bool
+    batches: int
+    items: int
+    _cv: threading.Condition
+    _pending: Dict[Any, List[_Slot]]
+    _async: Dict[Any, List[Tuple[AsyncBatchFn, Any, asyncio.Future[Any]]]]
+    _tasks: Set[asyncio.Future[None]]
+
+    def __init__(self, max_batch_size: int = 64, max_wait: float = 0.005, by_params: bool = True) -> None: ...
+    def _take(self, key: Any) -> List[_Slot]: ...
+    def _flush(self, batch: List[_Slot]) -> None: ...
+    def call(self, fn: BatchFn, item: Any) -> Any: ...
+    def _flush_async(self, key: Any, q: Union[List[Any], None] = None) -> None: ...
+    async def _run_async(self, batch: List[Tuple[AsyncBatchFn, Any, asyncio.Future[Any]]]) -> None: ...
+    async def call_async(self, fn: AsyncBatchFn, item: Any) -> Any: ...
+    def stats(self) -> Dict[str, Union[int, float]]: ...
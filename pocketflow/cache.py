@@ -0,0 +1,189 @@
+import asyncio, hashlib, json, pickle, sqlite3, threading, time, warnings
+from collections import OrderedDict
+
+_SCALARS={type(None):b"N",bool:b"b",int:b"i",float:b"f",complex:b"c"}
+def _encode(v):
+    """Type-tagged, order-independent encoding: {1: "a"} and {"1": "a"}, or (1, 2) and [1, 2], never share bytes"""
+    t=type(v)
+    if t in _SCALARS: return _SCALARS[t]+repr(v).encode()+b";"
+    if t is str: v=v.encode(); return b"s%d:"%len(v)+v
+    if t is bytes: return b"y%d:"%len(v)+v
+    if t in (list,tuple): return (b"l" if t is list else b"t")+b"%d:"%len(v)+b"".join(_encode(x) for x in v)
+    if t is dict: return b"d%d:"%len(v)+b"".join(sorted(_encode(k)+_encode(x) for k,x in v.items()))
+    if t in (set,frozenset): return (b"e" if t is set else b"z")+b"%d:"%len(v)+b"".join(sorted(_encode(x) for x in v))
+    data=pickle.dumps(v,protocol=4); return b"p%d:"%len(data)+data
+
+def stable_hash(node,prep_res):
+    payload=_encode(prep_res)
+    cls=type(node); ns=f"{cls.__module__}.{cls.__qualname__}:{getattr(node,'cache_version','')}:".encode()
+    return hashlib.sha256(ns+payload).hexdigest()
+
+class ExecCache:
+    def __init__(self,ttl=None): self.ttl,self.hits,self.misses,self._lock=ttl,0,0,threading.Lock()
+    def __getstate__(self): s=self.__dict__.copy(); del s["_lock"]; return s
+    def __setstate__(self,s): self.__dict__.update(s); self._lock=threading.Lock()
+    def key(self,node,prep_res): return stable_hash(node,prep_res)
+    def get(self,key): raise NotImplementedError
+    def set(self,key,value): raise NotImplementedError
+    def clear(self): raise NotImplementedError
+    def _lookup(self,node,prep_res):
+        key=self.key(node,prep_res); hit,value=self.get(key)
+        with self._lock:
+            if hit: self.hits+=1
+            else: self.misses+=1
+        return key,hit,value
+    def call(self,node,fn,prep_res):
+        key,hit,value=self._lookup(node,prep_res)
+        if hit: return value
+        value=fn(prep_res); self.set(key,value); return value
+    async def call_async(self,node,fn,prep_res):
+        key,hit,value=self._lookup(node,prep_res)
+        if hit: return value
+        value=await fn(prep_res); self.set(key,value); return value
+    def stats(self):
+        total=self.hits+self.misses
+        return {"hits":self.hits,"misses":self.misses,"hit_rate":self.hits/total if total else 0.0}
+
+class LRUCache(ExecCache):
+    def __init__(self,maxsize=1024,ttl=None): super().__init__(ttl); self.maxsize,self._data=maxsize,OrderedDict()
+    def get(self,key):
+        with self._lock:
+            entry=self._data.get(key)
+            if entry is None: return False,None
+            if entry[0] is not None and entry[0]<time.time(): del self._data[key]; return False,None
+            self._data.move_to_end(key); return True,entry[1]
+    def set(self,key,value):
+        with self._lock:
+            self._data[key]=(time.time()+self.ttl if self.ttl else None,value); self._data.move_to_end(key)
+            while self.maxsize and len(self._data)>self.maxsize: self._data.popitem(last=False)
+    def clear(self):
+        with self._lock: self._data.clear()
+    def __len__(self): return len(self._data)
+
+class SQLiteCache(ExecCache):
+    def __init__(self,path,maxsize=None,ttl=None): super().__init__(ttl); self.path,self.maxsize,self._conn=path,maxsize,None
+    def __getstate__(self): s=super().__getstate__(); s["_conn"]=None; return s
+    def _db(self):
+        if self._conn is None:
+            self._conn=sqlite3.connect(self.path,check_same_thread=False,isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value BLOB, expires REAL, used REAL)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS cache_used ON cache(used)")
+        return self._conn
+    def get(self,key):
+        with self._lock:
+            db,now=self._db(),time.time(); row=db.execute("SELECT value,expires FROM cache WHERE key=?",(key,)).fetchone()
+            if row is None: return False,None
+            if row[1] is not None and row[1]<now: db.execute("DELETE FROM cache WHERE key=?",(key,)); return False,None
+            db.execute("UPDATE cache SET used=? WHERE key=?",(now,key)); return True,pickle.loads(row[0])
+    def set(self,key,value):
+        with self._lock:
+            db,now=self._db(),time.time()
+            db.execute("INSERT OR REPLACE INTO cache VALUES (?,?,?,?)",(key,pickle.dumps(value,protocol=4),now+self.ttl if self.ttl else None,now))
+            if self.maxsize: db.execute("DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY used DESC LIMIT -1 OFFSET ?)",(self.maxsize,))
+    def clear(self):
+        with self._lock: self._db().execute("DELETE FROM cache")
+    def __len__(self):
+        with self._lock: return self._db().execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+    def close(self):
+        with self._lock:
+            if self._conn is not None: self._conn.close(); self._conn=None
+
+def prompt_text(prep_res):
+    if isinstance(prep_res,str): return prep_res
+    if isinstance(prep_res,(list,tuple)) and prep_res and all(isinstance(m,dict) and "content" in m for m in prep_res):
+        return "\n".join(f"{m.get('role','')}: {m['content']}" for m in prep_res)
+    try: return json.dumps(prep_res,sort_keys=True,default=str)
+    except (TypeError,ValueError): return repr(prep_res)
+
+class _Space:
+    def __init__(self,dim): import numpy as np; self.vecs,self.keys=np.zeros((16,dim),dtype=np.float32),[]
+    def add(self,key,vec):
+        if len(self.keys)==len(self.vecs): import numpy as np; self.vecs=np.concatenate([self.vecs,np.zeros_like(self.vecs)])
+        self.vecs[len(self.keys)]=vec; self.keys.append(key); return len(self.keys)-1
+    def remove(self,row):
+        last,moved=len(self.keys)-1,None
+        if row!=last: self.vecs[row]=self.vecs[last]; self.keys[row]=moved=self.keys[last]
+        self.keys.pop(); return moved
+    def nearest(self,vec):
+        if not self.keys: return None,-1.0
+        sims=self.vecs[:len(self.keys)]@vec; i=int(sims.argmax()); return self.keys[i],float(sims[i])
+
+class SemanticCache(ExecCache):
+    def __init__(self,embed=None,threshold=0.95,maxsize=1024,ttl=None,text=prompt_text,embed_async=None,vector=None,max_chars=8000):
+        if embed is None and embed_async is None and vector is None: raise ValueError("SemanticCache needs embed, embed_async or vector")
+        super().__init__(ttl); self.embed,self.embed_async,self.threshold,self.maxsize,self.text=embed,embed_async,threshold,maxsize,text
+        self.vector,self.max_chars=vector,max_chars
+        self.exact_hits=self.embeddings=self.embed_errors=self._next=0; self._entries,self._exact,self._spaces,self._ns=OrderedDict(),{},{},{}
+    def namespace(self,node):
+        cls=type(node); return getattr(node,"cache_namespace",None) or f"{cls.__module__}.{cls.__qualname__}:{getattr(node,'cache_version','')}"
+    def _vector(self,v):
+        import numpy as np
+        v=np.asarray(v,dtype=np.float32).ravel(); n=float(np.linalg.norm(v)); return v/n if n else v
+    def _count(self,ns,hit):
+        c=self._ns.setdefault(ns,[0,0]); c[0 if hit else 1]+=1
+        if hit: self.hits+=1
+        else: self.misses+=1
+    def _live(self,key):
+        e=self._entries.get(key)
+        if e is None: return None
+        if e[3] is not None and e[3]<time.time(): self._drop(key); return None
+        self._entries.move_to_end(key); return e
+    def _drop(self,key):
+        ns,h,row,_,_=self._entries.pop(key); self._exact.pop((ns,h),None); moved=self._spaces[ns].remove(row)
+        if moved is not None: self._entries[moved][2]=row
+    def _exact_lookup(self,ns,h):
+        with self._lock:
+            key=self._exact.get((ns,h)); e=None if key is None else self._live(key)
+            if e is None: return False,None
+            self.exact_hits+=1; self._count(ns,True); return True,e[4]
+    def _nearest(self,ns,vec):
+        with self._lock:
+            self.embeddings+=1; space=self._spaces.get(ns); key,sim=space.nearest(vec) if space else (None,-1.0)
+            e=self._live(key) if sim>=self.threshold else None
+            self._count(ns,e is not None); return (False,None) if e is None else (True,e[4])
+    def _store(self,ns,h,vec,value):
+        with self._lock:
+            if (ns,h) in self._exact: self._drop(self._exact[(ns,h)])
+            space=self._spaces.get(ns) or self._spaces.setdefault(ns,_Space(len(vec))); key=self._next; self._next+=1
+            self._entries[key]=[ns,h,space.add(key,vec),time.time()+self.ttl if self.ttl else None,value]; self._exact[(ns,h)]=key
+            while self.maxsize and len(self._entries)>self.maxsize: self._drop(next(iter(self._entries)))
+    def _prompt(self,node,prep_res):
+        ns,text=self.namespace(node),self.text(prep_res); return ns,text,hashlib.sha256(text.encode()).hexdigest()
+    def _given(self,prep_res):
+        v=None if self.vector is None else self.vector(prep_res); return None if v is None else self._vector(v)
+    def _trim(self,text): return text[-self.max_chars:] if self.max_chars else text  # the end of a chat is what the reply depends on
+    def _failed(self,e):
+        with self._lock: self.embed_errors+=1
+        warnings.warn(f"SemanticCache could not embed the prompt ({type(e).__name__}: {e}); running exec uncached")
+    def _uncached(self,ns):
+        with self._lock: self._count(ns,False)
+    def call(self,node,fn,prep_res):
+        ns,text,h=self._prompt(node,prep_res); hit,value=self._exact_lookup(ns,h)
+        if hit: return value
+        vec=self._given(prep_res)
+        if vec is None and self.embed is not None:
+            try: vec=self._vector(self.embed(self._trim(text)))
+            except Exception as e: self._failed(e)
+        if vec is None: self._uncached(ns); return fn(prep_res)
+        hit,value=self._nearest(ns,vec)
+        if hit: return value
+        value=fn(prep_res); self._store(ns,h,vec,value); return value
+    async def call_async(self,node,fn,prep_res):
+        ns,text,h=self._prompt(node,prep_res); hit,value=self._exact_lookup(ns,h)
+        if hit: return value
+        vec=self._given(prep_res)
+        if vec is None and (self.embed is not None or self.embed_async is not None):
+            try: vec=self._vector(await self.embed_async(self._trim(text)) if self.embed_async else await asyncio.to_thread(self.embed,self._trim(text)))
+            except Exception as e: self._failed(e)
+        if vec is None: self._uncached(ns); return await fn(prep_res)
+        hit,value=self._nearest(ns,vec)
+        if hit: return value
+        value=await fn(prep_res); self._store(ns,h,vec,value); return value
+    def clear(self):
+        with self._lock: self._entries.clear(); self._exact.clear(); self._spaces.clear()
+    def __len__(self): return len(self._entries)
+    def stats(self):
+        s=super().stats(); s.update(exact_hits=self.exact_hits,semantic_hits=self.hits-self.exact_hits,embeddings=self.embeddings,embed_errors=self.embed_errors,size=len(self._entries),
+            namespaces={ns:{"hits":h,"misses":m,"hit_rate":h/(h+m) if h+m else 0.0} for ns,(h,m) in self._ns.items()})
+        return s
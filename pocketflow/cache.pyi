@@ -0,0 +1,90 @@
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+import sqlite3
+
+from . import Node
+
+_SCALARS: Dict[type, bytes]
+
+def _encode(v: Any) -> bytes: ...
+def stable_hash(node: Node[Any, Any, Any], prep_res: Any) -> str: ...
+
+class ExecCache:
+    ttl: Optional[float]
+    hits: int
+    misses: int
+
+    def __init__(self, ttl: Optional[float] = None) -> None: ...
+    def key(self, node: Node[Any, Any, Any], prep_res: Any) -> str: ...
+    def get(self, key: str) -> Tuple[bool, Any]: ...
+    def set(self, key: str, value: Any) -> None: ...
+    def clear(self) -> None: ...
+    def call(self, node: Node[Any, Any, Any], fn: Callable[[Any], Any], prep_res: Any) -> Any: ...
+    async def call_async(
+        self, node: Node[Any, Any, Any], fn: Callable[[Any], Awaitable[Any]], prep_res: Any
+    ) -> Any: ...
+    def stats(self) -> Dict[str, Union[int, float]]: ...
+
+class LRUCache(ExecCache):
+    maxsize: Optional[int]
+    _data: OrderedDict[str, Tuple[Optional[float], Any]]
+
+    def __init__(self, maxsize: Optional[int] = 1024, ttl: Optional[float] = None) -> None: ...
+    def __len__(self) -> int: ...
+
+class SQLiteCache(ExecCache):
+    path: str
+    maxsize: Optional[int]
+    _conn: Optional[sqlite3.Connection]
+
+    def __init__(self, path: str, maxsize: Optional[int] = None, ttl: Optional[float] = None) -> None: ...
+    def __len__(self) -> int: ...
+    def close(self) -> None: ...
+
+def prompt_text(prep_res: Any) -> str: ...
+
+class _Space:
+    vecs: Any
+    keys: List[int]
+
+    def __init__(self, dim: int) -> None: ...
+    def add(self, key: int, vec: Any) -> int: ...
+    def remove(self, row: int) -> Optional[int]: ...
+    def nearest(self, vec: Any) -> Tuple[Optional[int], float]: ...
+
+class SemanticCache(ExecCache):
+    embed: Optional[Callable[[str], Any]]
+    embed_async: Optional[Callable[[str], Awaitable[Any]]]
+    threshold: float
+    maxsize: Optional[int]
+    text: Callable[[Any], str]
+    vector: Optional[Callable[[Any], Any]]
+    max_chars: Optional[int]
+    exact_hits: int
+    embeddings: int
+    embed_errors: int
+    _next: int
+    _entries: OrderedDict[int, List[Any]]
+    _exact: Dict[Tuple[str, str], int]
+    _spaces: Dict[str, _Space]
+    _ns: Dict[str, List[int]]
+
+    def __init__(
+        self,
+        embed: Optional[Callable[[str], Any]] = None,
+        threshold: float = 0.95,
+        maxsize: Optional[int] = 1024,
+        ttl: Optional[float] = None,
+        text: Callable[[Any], str] = ...,
+        embed_async: Optional[Callable[[str], Awaitable[Any]]] = None,
+        vector: Optional[Callable[[Any], Any]] = None,
+        max_chars: Optional[int] = 8000,
+    ) -> None: ...
+    def namespace(self, node: Node[Any, Any, Any]) -> str: ...
+    def _given(self, prep_res: Any) -> Any: ...
+    def _trim(self, text: str) -> str: ...
+    def _failed(self, e: Exception) -> None: ...
+    def _uncached(self, ns: str) -> None: ...
+    def clear(self) -> None: ...
+    def __len__(self) -> int: ...
+    def stats(self) -> Dict[str, Any]: ...  # type: ignore[override]
@@ -0,0 +1,39 @@
+import hashlib, os, pickle, shutil
+
+_MISSING=object()
+_IMMUTABLE=(str,bytes,int,float,complex,bool,type(None),range)
+def _frozen(v):
+    if isinstance(v,_IMMUTABLE): return True
+    if type(v) in (tuple,frozenset): return all(_frozen(x) for x in v)
+    f=getattr(v,"flags",None); return f is not None and getattr(f,"writeable",True) is False  # read-only numpy arrays
+
+class FileCheckpointStore:
+    def __init__(self,path,exclude=(),static=()): self.path,self.exclude,self.static,self._files,self._objs=path,set(exclude),set(static),{},{}
+    def _write(self,name,data):
+        os.makedirs(self.path,exist_ok=True); tmp=os.path.join(self.path,name+".tmp")
+        with open(tmp,"wb") as f: f.write(data); f.flush(); os.fsync(f.fileno())
+        os.replace(tmp,os.path.join(self.path,name))
+    def save(self,shared,state):
+        files,objs={},{}
+        for k,v in list(shared.items()):
+            if k in self.exclude: continue
+            objs[k]=v
+            # the same object as last save can only have changed if it is mutable and not declared static
+            if self._objs.get(k,_MISSING) is v and (k in self.static or _frozen(v)): files[k]=self._files[k]; continue
+            data=pickle.dumps(v,protocol=pickle.HIGHEST_PROTOCOL); digest=hashlib.blake2b(data,digest_size=16).hexdigest()
+            name=files[k]=f"{hashlib.blake2b(repr(k).encode(),digest_size=8).hexdigest()}-{digest}.pkl"
+            if self._files.get(k)!=name: self._write(name,data)
+        self._write("manifest.pkl",pickle.dumps({"state":dict(state),"files":files}))
+        for k,name in self._files.items():
+            if files.get(k)!=name:
+                try: os.remove(os.path.join(self.path,name))
+                except FileNotFoundError: pass
+        self._files,self._objs=files,objs
+    def load(self,shared):
+        try:
+            with open(os.path.join(self.path,"manifest.pkl"),"rb") as f: manifest=pickle.load(f)
+        except FileNotFoundError: return None
+        for k,name in manifest["files"].items():
+            with open(os.path.join(self.path,name),"rb") as f: shared[k]=pickle.load(f)
+        self._files,self._objs=dict(manifest["files"]),{k:shared[k] for k in manifest["files"]}; return manifest["state"]
+    def clear(self): shutil.rmtree(self.path,ignore_errors=True); self._files,self._objs={},{}
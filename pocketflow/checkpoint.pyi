@@ -0,0 +1,19 @@
+from typing import Any, Dict, Hashable, Iterable, Optional, Set, Tuple, Type
+
+_MISSING: object
+_IMMUTABLE: Tuple[Type[Any], ...]
+
+def _frozen(v: Any) -> bool: ...
+
+class FileCheckpointStore:
+    path: str
+    exclude: Set[Hashable]
+    static: Set[Hashable]
+    _files: Dict[Hashable, str]
+    _objs: Dict[Hashable, Any]
+
+    def __init__(self, path: str, exclude: Iterable[Hashable] = (), static: Iterable[Hashable] = ()) -> None: ...
+    def _write(self, name: str, data: bytes) -> None: ...
+    def save(self, shared: Dict[Any, Any], state: Dict[str, Any]) -> None: ...
+    def load(self, shared: Dict[Any, Any]) -> Optional[Dict[str, Any]]: ...
+    def clear(self) -> None: ...
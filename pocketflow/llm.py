@@ -0,0 +1,69 @@
+import asyncio, importlib.util, os, threading, weakref
+
+HTTP2=importlib.util.find_spec("h2") is not None
+
+def _limits():
+    import httpx
+    return httpx.Limits(max_connections=100,max_keepalive_connections=20,keepalive_expiry=60)
+
+def http_client(**kw): import httpx; return httpx.Client(http2=HTTP2,limits=_limits(),**kw)
+def async_http_client(**kw): import httpx; return httpx.AsyncClient(http2=HTTP2,limits=_limits(),**kw)
+def openai_client(**kw): from openai import OpenAI; return OpenAI(http_client=http_client(),**kw)
+def async_openai_client(**kw): from openai import AsyncOpenAI; return AsyncOpenAI(http_client=async_http_client(),**kw)
+
+class ClientRegistry:
+    def __init__(self): self._factories,self._clients,self._async,self._lock={},{},weakref.WeakKeyDictionary(),threading.Lock()
+    def register(self,name,factory,async_factory=None): self._factories[name]=(factory,async_factory)
+    def _factory(self,name,i):
+        f=self._factories.get(name,(None,None))[i]
+        if f is None: raise KeyError(f"No {'async ' if i else ''}client factory registered for '{name}'")
+        return f
+    def get(self,name="openai",**kw):
+        key=(os.getpid(),name,tuple(sorted(kw.items())))
+        with self._lock:
+            if key not in self._clients: self._clients[key]=self._factory(name,0)(**kw)
+            return self._clients[key]
+    def get_async(self,name="openai",**kw):
+        key,loop=(name,tuple(sorted(kw.items()))),asyncio.get_running_loop()
+        with self._lock:
+            clients=self._async.setdefault(loop,{})
+            if key not in clients: clients[key]=self._factory(name,1)(**kw)
+            return clients[key]
+    def close(self):
+        with self._lock: clients,self._clients=list(self._clients.values()),{}
+        for c in clients:
+            if hasattr(c,"close"): c.close()
+    async def aclose(self):
+        with self._lock: clients=list(self._async.pop(asyncio.get_running_loop(),{}).values())
+        for c in clients:
+            if hasattr(c,"aclose"): await c.aclose()
+            elif hasattr(c,"close"): await c.close()
+
+registry=ClientRegistry()
+registry.register("openai",openai_client,async_openai_client)
+registry.register("http",http_client,async_http_client)
+
+def get_client(name="openai",**kw): return registry.get(name,**kw)
+def get_async_client(name="openai",**kw): return registry.get_async(name,**kw)
+
+def _messages(prompt): return [{"role":"user","content":prompt}] if isinstance(prompt,str) else prompt
+
+def call_llm(prompt,model="gpt-4o",client="openai",**kw):
+    r=get_client(client).chat.completions.create(model=model,messages=_messages(prompt),**kw)
+    return r.choices[0].message.content
+
+async def call_llm_async(prompt,model="gpt-4o",client="openai",**kw):
+    r=await get_async_client(client).chat.completions.create(model=model,messages=_messages(prompt),**kw)
+    return r.choices[0].message.content
+
+def get_embeddings(texts,model="text-embedding-ada-002",client="openai"):
+    r=get_client(client).embeddings.create(model=model,input=list(texts))
+    return [d.embedding for d in r.data]
+
+async def get_embeddings_async(texts,model="text-embedding-ada-002",client="openai"):
+    r=await get_async_client(client).embeddings.create(model=model,input=list(texts))
+    return [d.embedding for d in r.data]
+
+def get_embedding(text,model="text-embedding-ada-002",client="openai"): return get_embeddings([text],model,client)[0]
+
+async def get_embedding_async(text,model="text-embedding-ada-002",client="openai"): return (await get_embeddings_async([text],model,client))[0]
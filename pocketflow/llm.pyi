@@ -0,0 +1,45 @@
+import asyncio
+import threading
+import weakref
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Sequence, Tuple, Union
+
+HTTP2: bool
+
+Messages = Union[str, List[Dict[str, Any]]]
+_ClientKey = Tuple[Any, ...]
+
+def _limits() -> Any: ...
+def http_client(**kw: Any) -> Any: ...
+def async_http_client(**kw: Any) -> Any: ...
+def openai_client(**kw: Any) -> Any: ...
+def async_openai_client(**kw: Any) -> Any: ...
+
+class ClientRegistry:
+    _factories: Dict[str, Tuple[Optional[Callable[..., Any]], Optional[Callable[..., Any]]]]
+    _clients: Dict[_ClientKey, Any]
+    _async: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[_ClientKey, Any]]
+    _lock: threading.Lock
+
+    def __init__(self) -> None: ...
+    def register(
+        self, name: str, factory: Optional[Callable[..., Any]], async_factory: Optional[Callable[..., Any]] = None
+    ) -> None: ...
+    def _factory(self, name: str, i: int) -> Callable[..., Any]: ...
+    def get(self, name: str = "openai", **kw: Hashable) -> Any: ...
+    def get_async(self, name: str = "openai", **kw: Hashable) -> Any: ...
+    def close(self) -> None: ...
+    async def aclose(self) -> None: ...
+
+registry: ClientRegistry
+
+def get_client(name: str = "openai", **kw: Hashable) -> Any: ...
+def get_async_client(name: str = "openai", **kw: Hashable) -> Any: ...
+def _messages(prompt: Messages) -> List[Dict[str, Any]]: ...
+def call_llm(prompt: Messages, model: str = "gpt-4o", client: str = "openai", **kw: Any) -> str: ...
+async def call_llm_async(prompt: Messages, model: str = "gpt-4o", client: str = "openai", **kw: Any) -> str: ...
+def get_embeddings(texts: Sequence[str], model: str = "text-embedding-ada-002", client: str = "openai") -> List[List[float]]: ...
+async def get_embeddings_async(
+    texts: Sequence[str], model: str = "text-embedding-ada-002", client: str = "openai"
+) -> List[List[float]]: ...
+def get_embedding(text: str, model: str = "text-embedding-ada-002", client: str = "openai") -> List[float]: ...
+async def get_embedding_async(text: str, model: str = "text-embedding-ada-002", client: str = "openai") -> List[float]: ...
@@ -0,0 +1,45 @@
+import json, os, threading
+from collections import defaultdict
+from . import add_hook, remove_hook
+
+def percentile(values,q):
+    if not values: return 0.0
+    s=sorted(values); k=(len(s)-1)*q/100; lo=int(k); hi=min(lo+1,len(s)-1)
+    return s[lo]+(s[hi]-s[lo])*(k-lo)
+
+class Profiler:
+    def __init__(self,trace=False):
+        self.trace,self.durations,self.retries,self.fallbacks,self.events=trace,defaultdict(list),defaultdict(int),defaultdict(int),[]
+        self._lock=threading.Lock()
+    def __enter__(self): add_hook(self); return self
+    def __exit__(self,*exc): remove_hook(self)
+    def __call__(self,node,phase,event,info):
+        name=type(node).__name__
+        if event=="end":
+            with self._lock:
+                self.durations[(name,phase)].append(info["duration"])
+                if self.trace: self.events.append({"name":f"{name}.{phase}","cat":phase,"ph":"X","ts":info["start"]*1e6,"dur":info["duration"]*1e6,"pid":os.getpid(),"tid":threading.get_ident()})
+        elif event in ("retry","fallback"):
+            with self._lock: (self.retries if event=="retry" else self.fallbacks)[name]+=1
+    def reset(self):
+        with self._lock: self.durations.clear(); self.retries.clear(); self.fallbacks.clear(); self.events.clear()
+    def summary(self):
+        out={}
+        with self._lock: items=[(k,list(v)) for k,v in self.durations.items()]
+        for (name,phase),d in items:
+            node=out.setdefault(name,{"phases":{},"retries":self.retries.get(name,0),"fallbacks":self.fallbacks.get(name,0)})
+            node["phases"][phase]={"count":len(d),"total":sum(d),"mean":sum(d)/len(d),"p50":percentile(d,50),"p95":percentile(d,95),"p99":percentile(d,99),"max":max(d)}
+        return out
+    def to_json(self,**kw): return json.dumps(self.summary(),**kw)
+    def table(self):
+        rows=[("node","phase","count","total ms","mean ms","p50 ms","p95 ms","p99 ms","retries")]
+        for name,node in sorted(self.summary().items()):
+            for phase,st in node["phases"].items():
+                rows.append((name,phase,str(st["count"]),*(f"{st[k]*1000:.2f}" for k in ("total","mean","p50","p95","p99")),str(node["retries"])))
+        widths=[max(len(r[i]) for r in rows) for i in range(len(rows[0]))]
+        lines=["  ".join(c.ljust(w) if i<2 else c.rjust(w) for i,(c,w) in enumerate(zip(r,widths))) for r in rows]
+        return "\n".join([lines[0],"  ".join("-"*w for w in widths),*lines[1:]])
+    def chrome_trace(self):
+        with self._lock: return {"traceEvents":list(self.events),"displayTimeUnit":"ms"}
+    def write_chrome_trace(self,path):
+        with open(path,"w") as f: json.dump(self.chrome_trace(),f)
@@ -0,0 +1,31 @@
+import threading
+from typing import Any, DefaultDict, Dict, List, Optional, Sequence, Tuple, Type
+from types import TracebackType
+
+from . import BaseNode
+
+def percentile(values: Sequence[float], q: float) -> float: ...
+
+class Profiler:
+    trace: bool
+    durations: DefaultDict[Tuple[str, str], List[float]]
+    retries: DefaultDict[str, int]
+    fallbacks: DefaultDict[str, int]
+    events: List[Dict[str, Any]]
+    _lock: threading.Lock
+
+    def __init__(self, trace: bool = False) -> None: ...
+    def __enter__(self) -> Profiler: ...
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc: Optional[BaseException],
+        tb: Optional[TracebackType],
+    ) -> None: ...
+    def __call__(self, node: BaseNode[Any, Any, Any], phase: str, event: str, info: Dict[str, Any]) -> None: ...
+    def reset(self) -> None: ...
+    def summary(self) -> Dict[str, Dict[str, Any]]: ...
+    def to_json(self, **kw: Any) -> str: ...
+    def table(self) -> str: ...
+    def chrome_trace(self) -> Dict[str, Any]: ...
+    def write_chrome_trace(self, path: str) -> None: ...
@@ -0,0 +1,50 @@
+import random, threading, time
+from email.utils import parsedate_to_datetime
+from . import _retries
+
+def retry_after(exc):
+    value=getattr(exc,"retry_after",None)
+    if value is None:
+        headers=getattr(getattr(exc,"response",None),"headers",None) or {}
+        value=headers.get("retry-after",headers.get("Retry-After")) if hasattr(headers,"get") else None
+    if value is None: return None
+    try: return max(0.0,float(value))
+    except (TypeError,ValueError): pass
+    try: return max(0.0,parsedate_to_datetime(value).timestamp()-time.time())
+    except (TypeError,ValueError,IndexError): return None
+
+class RetryBudget:
+    def __init__(self,max_retries): self.max_retries,self._used,self._lock=max_retries,0,threading.Lock()
+    def __getstate__(self): s=self.__dict__.copy(); del s["_lock"]; return s
+    def __setstate__(self,s): self.__dict__.update(s); self._lock=threading.Lock()
+    @property
+    def used(self): r=_retries.get(); return self._used if r is None else r.get(self,0)
+    def take(self):
+        with self._lock:
+            r=_retries.get(); n=self._used if r is None else r.get(self,0)
+            if n>=self.max_retries: return False
+            if r is None: self._used=n+1
+            else: r[self]=n+1
+            return True
+    def reset(self):
+        with self._lock:
+            r=_retries.get()
+            if r is None: self._used=0
+            else: r.pop(self,None)
+    @property
+    def remaining(self): return max(0,self.max_retries-self.used)
+
+class RetryPolicy:
+    def __init__(self,base=1.0,cap=60.0,multiplier=2.0,jitter=True,max_elapsed=None,retry_on=(Exception,),budget=None):
+        self.base,self.cap,self.multiplier,self.jitter=base,cap,multiplier,jitter
+        self.max_elapsed,self.retry_on,self.budget=max_elapsed,retry_on,budget
+    def backoff(self,attempt):
+        d=min(self.cap,self.base*self.multiplier**attempt)
+        return random.uniform(0,d) if self.jitter else d
+    def delay(self,attempt,exc,elapsed):
+        if not isinstance(exc,self.retry_on): return None
+        d=self.backoff(attempt); ra=retry_after(exc)
+        if ra is not None: d=max(d,ra)
+        if self.max_elapsed is not None and elapsed+d>self.max_elapsed: return None
+        if self.budget is not None and not self.budget.take(): return None
+        return d
@@ -0,0 +1,37 @@
+from typing import Optional, Tuple, Type
+
+def retry_after(exc: BaseException) -> Optional[float]: ...
+
+class RetryBudget:
+    max_retries: int
+    _used: int
+
+    def __init__(self, max_retries: int) -> None: ...
+    @property
+    def used(self) -> int: ...
+    def take(self) -> bool: ...
+    def reset(self) -> None: ...
+    @property
+    def remaining(self) -> int: ...
+
+class RetryPolicy:
+    base: float
+    cap: float
+    multiplier: float
+    jitter: bool
+    max_elapsed: Optional[float]
+    retry_on: Tuple[Type[BaseException], ...]
+    budget: Optional[RetryBudget]
+
+    def __init__(
+        self,
+        base: float = 1.0,
+        cap: float = 60.0,
+        multiplier: float = 2.0,
+        jitter: bool = True,
+        max_elapsed: Optional[float] = None,
+        retry_on: Tuple[Type[BaseException], ...] = (Exception,),
+        budget: Optional[RetryBudget] = None,
+    ) -> None: ...
+    def backoff(self, attempt: int) -> float: ...
+    def delay(self, attempt: int, exc: Exception, elapsed: float) -> Optional[float]: ...
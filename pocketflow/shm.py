@@ -0,0 +1,70 @@
+import sys
+from multiprocessing import resource_tracker, shared_memory
+
+IMAGE_MODES=("L","RGB","RGBA","I","F")
+_pinned=[]
+
+class SharedArray:
+    __slots__=("name","shape","dtype","mode")
+    def __init__(self,name,shape,dtype,mode=None): self.name,self.shape,self.dtype,self.mode=name,tuple(shape),dtype,mode
+    def __getstate__(self): return (self.name,self.shape,self.dtype,self.mode)
+    def __setstate__(self,s): self.name,self.shape,self.dtype,self.mode=s
+    def __repr__(self): return f"SharedArray({self.name!r}, shape={self.shape}, dtype={self.dtype!r}{'' if self.mode is None else f', mode={self.mode!r}'})"
+    def view(self,shm): import numpy as np; return np.ndarray(self.shape,self.dtype,buffer=shm.buf)
+    def wrap(self,a):
+        if self.mode is None: return a
+        from PIL import Image; img=Image.fromarray(a); return img if img.mode==self.mode else img.convert(self.mode)
+
+def _image(x): return type(x).__module__.startswith("PIL.") and getattr(x,"mode",None) in IMAGE_MODES and hasattr(x,"getbands")
+
+class ShmTransport:
+    def __init__(self,min_bytes=1<<16): self.min_bytes=min_bytes
+    def start(self): resource_tracker.ensure_running()
+    def _put(self,a,mode,owned):
+        shm=shared_memory.SharedMemory(create=True,size=max(1,a.nbytes)); h=SharedArray(shm.name,a.shape,a.dtype.str,mode)
+        v=h.view(shm); v[...]=a; del v
+        if owned is None: shm.close()
+        else: owned.append(shm)
+        return h
+    def export(self,obj,owned=None):
+        np=sys.modules.get("numpy")
+        if np is not None and isinstance(obj,np.ndarray) and not obj.dtype.hasobject and obj.nbytes>=self.min_bytes: return self._put(np.ascontiguousarray(obj),None,owned)
+        if np is not None and _image(obj) and obj.width*obj.height*len(obj.getbands())>=self.min_bytes: return self._put(np.asarray(obj),obj.mode,owned)
+        if isinstance(obj,list): return [self.export(x,owned) for x in obj]
+        if type(obj) is tuple: return tuple(self.export(x,owned) for x in obj)
+        if type(obj) is dict: return {k:self.export(v,owned) for k,v in obj.items()}
+        return obj
+    def _map(self,obj,fn):
+        if isinstance(obj,SharedArray): return fn(obj)
+        if isinstance(obj,list): return [self._map(x,fn) for x in obj]
+        if type(obj) is tuple: return tuple(self._map(x,fn) for x in obj)
+        if type(obj) is dict: return {k:self._map(v,fn) for k,v in obj.items()}
+        return obj
+    def attach(self,obj,shms):
+        def open_(h): shm=shared_memory.SharedMemory(h.name); shms.append(shm); return h.wrap(h.view(shm))
+        return self._map(obj,open_)
+    def load(self,obj,copy=True):
+        def take(h):
+            shm=shared_memory.SharedMemory(h.name)
+            try:
+                if not copy: return None
+                v=h.view(shm); a=v.copy(); del v; return h.wrap(a)
+            finally:
+                shm.close()
+                try: shm.unlink()
+                except FileNotFoundError: pass
+        return self._map(obj,take)
+    def run(self,fn,obj):
+        shms=[]
+        try: return self.export(fn(self.attach(obj,shms)))
+        finally:
+            for shm in shms:
+                try: shm.close()
+                except BufferError: _pinned.append(shm)  # exec kept a view; the mapping lives as long as the worker
+    @staticmethod
+    def release(owned):
+        for shm in owned:
+            shm.close()
+            try: shm.unlink()
+            except FileNotFoundError: pass
+        owned.clear()
@@ -0,0 +1,33 @@
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Callable, List, Optional, Tuple
+
+IMAGE_MODES: Tuple[str, ...]
+_pinned: List[SharedMemory]
+
+class SharedArray:
+    name: str
+    shape: Tuple[int, ...]
+    dtype: str
+    mode: Optional[str]
+
+    def __init__(self, name: str, shape: Tuple[int, ...], dtype: str, mode: Optional[str] = None) -> None: ...
+    def __getstate__(self) -> Tuple[str, Tuple[int, ...], str, Optional[str]]: ...
+    def __setstate__(self, s: Tuple[str, Tuple[int, ...], str, Optional[str]]) -> None: ...
+    def view(self, shm: SharedMemory) -> Any: ...
+    def wrap(self, a: Any) -> Any: ...
+
+def _image(x: Any) -> bool: ...
+
+class ShmTransport:
+    min_bytes: int
+
+    def __init__(self, min_bytes: int = 65536) -> None: ...
+    def start(self) -> None: ...
+    def _put(self, a: Any, mode: Optional[str], owned: Optional[List[SharedMemory]]) -> SharedArray: ...
+    def export(self, obj: Any, owned: Optional[List[SharedMemory]] = None) -> Any: ...
+    def _map(self, obj: Any, fn: Callable[[SharedArray], Any]) -> Any: ...
+    def attach(self, obj: Any, shms: List[SharedMemory]) -> Any: ...
+    def load(self, obj: Any, copy: bool = True) -> Any: ...
+    def run(self, fn: Callable[[Any], Any], obj: Any) -> Any: ...
+    @staticmethod
+    def release(owned: List[SharedMemory]) -> None: ...
@@ -0,0 +1,169 @@
+import copy
+from collections.abc import MutableMapping, MutableSequence, MutableSet
+
+_MISSING,_DELETED=object(),object()
+
+class MergeConflict(ValueError):
+    def __init__(self,key,values): super().__init__(f"Parallel branches wrote conflicting values for key {key!r}"); self.key,self.values=key,values
+
+def _same(a,b):
+    if a is b: return True
+    try: return bool(a==b)
+    except Exception: return False
+
+def _plain(v): return v._obj if isinstance(v,_View) else v
+
+class _View:
+    """Read-only stand-in for a parent's dict/list/set: copied into the snapshot on the first write"""
+    __slots__=("_owner","_key","_obj","_own","_kids")
+    __hash__=None
+    def __init__(self,owner,key,obj): self._owner,self._key,self._obj,self._own,self._kids=owner,key,obj,False,{}
+    def _write(self):
+        if not self._own: c=type(self._obj)(self._obj); self._owner._install(self._key,self._obj,c); self._obj,self._own=c,True
+        return self._obj
+    def _install(self,key,old,new):
+        t=self._write()
+        if type(t) is list and not (0<=key<len(t) and t[key] is old): key=next((i for i,x in enumerate(t) if x is old),None)
+        elif type(t) is dict and t.get(key,_MISSING) is not old: key=None
+        if key is not None: t[key]=new
+    def _child(self,key):
+        v=self._obj[key]; kid=self._kids.get(key)
+        if kid is not None and kid._obj is v: return kid
+        kid=_view(self,key,v)
+        if isinstance(kid,_View): self._kids[key]=kid
+        return kid
+    def __len__(self): return len(self._obj)
+    def __eq__(self,other): return self._obj==_plain(other)
+    def __repr__(self): return repr(self._obj)
+    def __reduce__(self): return (type(self._obj),(self._obj,))
+    def __copy__(self): return copy.deepcopy(self._obj)
+    def __deepcopy__(self,memo): return copy.deepcopy(self._obj,memo)
+    copy=__copy__
+
+class _DictView(_View,MutableMapping):
+    __slots__=()
+    def __getitem__(self,key): return self._child(key)
+    def __setitem__(self,key,value): self._write()[key]=_plain(value)
+    def __delitem__(self,key): del self._write()[key]
+    def __iter__(self): return iter(self._obj)
+    def __contains__(self,key): return key in self._obj
+
+class _ListView(_View,MutableSequence):
+    __slots__=()
+    def __getitem__(self,i):
+        if isinstance(i,slice): return [self._child(j) for j in range(*i.indices(len(self._obj)))]
+        return self._child(i+len(self._obj) if isinstance(i,int) and i<0 else i)
+    def __setitem__(self,i,value): self._write()[i]=[_plain(v) for v in value] if isinstance(i,slice) else _plain(value)
+    def __delitem__(self,i): del self._write()[i]
+    def __iter__(self): return (self._child(i) for i in range(len(self._obj)))
+    def __contains__(self,value): return _plain(value) in self._obj
+    def __add__(self,other): return list(self)+list(other)
+    def __radd__(self,other): return list(other)+list(self)
+    def insert(self,i,value): self._write().insert(i,_plain(value))
+    def append(self,value): self._write().append(_plain(value))
+    def extend(self,values): self._write().extend([_plain(v) for v in values])
+    def sort(self,*,key=None,reverse=False): self._write().sort(key=key,reverse=reverse)
+
+class _SetView(_View,MutableSet):
+    __slots__=()
+    @classmethod
+    def _from_iterable(cls,it): return set(it)
+    def __iter__(self): return iter(self._obj)
+    def __contains__(self,value): return value in self._obj
+    def add(self,value): self._write().add(value)
+    def discard(self,value): self._write().discard(value)
+    def update(self,*others): self._write().update(*others)
+
+_VIEWS={dict:_DictView,list:_ListView,set:_SetView}
+
+def _view(owner,key,v):
+    t=_VIEWS.get(type(v)); return v if t is None else t(owner,key,v)
+
+def _append(key,base,values):
+    base=[] if base is _MISSING else list(base); out=list(base)
+    for v in values:
+        if not isinstance(v,list): raise MergeConflict(key,values)
+        out.extend(v[len(base):] if _same(v[:len(base)],base) else v)
+    return out
+
+def _update(key,base,values):
+    base={} if base is _MISSING else base; out,seen=dict(base),{}
+    for v in values:
+        if not isinstance(v,dict): raise MergeConflict(key,values)
+        for k,x in v.items():
+            if k in base and _same(base[k],x): continue
+            if k in seen and not _same(seen[k],x): raise MergeConflict((key,k),[seen[k],x])
+            seen[k]=out[k]=x
+        for k in base:
+            if k not in v: out.pop(k,None)
+    return out
+
+class SharedStore(MutableMapping):
+    def __init__(self,data=None,policies=None,default="error"):
+        self._data,self._parent,self._written,self._copied,self._deleted,self._views=dict(data or {}),None,set(),set(),set(),{}
+        self.policies,self.default,self.conflicts=dict(policies or {}),default,[]
+    def _raw(self,key):
+        if key in self._data: return _plain(self._data[key])
+        if key in self._deleted or self._parent is None: raise KeyError(key)
+        return self._parent._raw(key)
+    def __getitem__(self,key):
+        if self._parent is None: return self._data[key]
+        v=self._views.get(key)
+        if v is not None: return v
+        if key in self._data: return self._data[key]
+        v=_view(self,key,self._raw(key))
+        if isinstance(v,_View): self._views[key]=v
+        return v
+    def _install(self,key,old,new):
+        if key not in self._data and key not in self._deleted: self._data[key]=new; self._copied.add(key)
+    def __setitem__(self,key,value):
+        self._data[key]=_plain(value) if self._parent is None else value; self._views.pop(key,None); self._deleted.discard(key); self._written.add(key)
+    def __delitem__(self,key):
+        if key not in self: raise KeyError(key)
+        self._data.pop(key,None); self._views.pop(key,None); self._written.add(key)
+        if self._parent is not None: self._deleted.add(key)
+    def _keys(self):
+        if self._parent is None: return list(self._data)
+        return [k for k in self._parent._keys() if k not in self._data and k not in self._deleted]+list(self._data)
+    def __iter__(self): return iter(self._keys())
+    def __len__(self): return len(self._keys())
+    def __contains__(self,key):
+        try: self._raw(key); return True
+        except KeyError: return False
+    def __repr__(self): return f"{type(self).__name__}({dict(self.items())!r})"
+    def snapshot(self):
+        s=SharedStore.__new__(type(self))
+        s._data,s._parent,s._written,s._copied,s._deleted,s._views={},self,set(),set(),set(),{}
+        s.policies,s.default,s.conflicts=self.policies,self.default,[]
+        return s
+    def _changes(self):
+        out={}
+        for k in self._written|self._copied:
+            v=_plain(self._data.get(k,_DELETED)); b=self._parent._raw(k) if k in self._parent else _MISSING
+            if v is _DELETED and b is _MISSING: continue
+            if v is not _DELETED and b is not _MISSING and _same(b,v): continue
+            out[k]=v
+        return out
+    def merge(self,branches):
+        changed={}
+        for br in branches:
+            if br._parent is not self: raise ValueError("Can only merge snapshots of this store")
+            for k,v in br._changes().items(): changed.setdefault(k,[]).append(v)
+        self.conflicts=[k for k,values in changed.items() if any(not _same(values[0],v) for v in values[1:])]
+        for k in self.conflicts:
+            if self.policies.get(k,self.default)=="error": raise MergeConflict(k,changed[k])
+        for k,values in changed.items(): self._apply(k,values)
+        return self.conflicts
+    def _apply(self,key,values):
+        policy=self.policies.get(key,self.default)
+        if not (policy in ("last","error","append","update") or callable(policy)): raise ValueError(f"Unknown merge policy '{policy}'")
+        if len(values)==1 and values[0] is _DELETED: del self[key]; return
+        if policy in ("last","error"):
+            if values[-1] is _DELETED: del self[key]
+            else: self[key]=values[-1]
+            return
+        if any(v is _DELETED for v in values): raise MergeConflict(key,values)
+        base=self._raw(key) if key in self else _MISSING
+        if policy=="append": self[key]=_append(key,base,values)
+        elif policy=="update": self[key]=_update(key,base,values)
+        else: self[key]=policy(None if base is _MISSING else base,values)
@@ -0,0 +1,86 @@
+from collections.abc import MutableMapping, MutableSequence, MutableSet
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, List, Literal, Optional, Set, Union
+
+MergePolicy = Union[Literal["last", "error", "append", "update"], Callable[[Any, List[Any]], Any]]
+
+_MISSING: object
+_DELETED: object
+
+class MergeConflict(ValueError):
+    key: Any
+    values: List[Any]
+
+    def __init__(self, key: Any, values: List[Any]) -> None: ...
+
+def _same(a: Any, b: Any) -> bool: ...
+def _plain(v: Any) -> Any: ...
+
+class _View:
+    _owner: Any
+    _key: Any
+    _obj: Any
+    _own: bool
+    _kids: Dict[Any, _View]
+
+    def __init__(self, owner: Any, key: Any, obj: Any) -> None: ...
+    def _write(self) -> Any: ...
+    def _install(self, key: Any, old: Any, new: Any) -> None: ...
+    def _child(self, key: Any) -> Any: ...
+    def __len__(self) -> int: ...
+    def __eq__(self, other: object) -> bool: ...
+    def copy(self) -> Any: ...
+
+class _DictView(_View, MutableMapping[Any, Any]):
+    def __getitem__(self, key: Any) -> Any: ...
+    def __setitem__(self, key: Any, value: Any) -> None: ...
+    def __delitem__(self, key: Any) -> None: ...
+    def __iter__(self) -> Iterator[Any]: ...
+
+class _ListView(_View, MutableSequence[Any]):
+    def __getitem__(self, i: Any) -> Any: ...
+    def __setitem__(self, i: Any, value: Any) -> None: ...
+    def __delitem__(self, i: Any) -> None: ...
+    def insert(self, i: int, value: Any) -> None: ...
+    def sort(self, *, key: Optional[Callable[[Any], Any]] = None, reverse: bool = False) -> None: ...
+
+class _SetView(_View, MutableSet[Any]):
+    def __contains__(self, value: object) -> bool: ...
+    def __iter__(self) -> Iterator[Any]: ...
+    def add(self, value: Any) -> None: ...
+    def discard(self, value: Any) -> None: ...
+    def update(self, *others: Iterable[Any]) -> None: ...
+
+def _view(owner: Any, key: Any, v: Any) -> Any: ...
+def _append(key: Hashable, base: Any, values: List[Any]) -> List[Any]: ...
+def _update(key: Hashable, base: Any, values: List[Any]) -> Dict[Any, Any]: ...
+
+class SharedStore(MutableMapping[Hashable, Any]):
+    policies: Dict[Hashable, MergePolicy]
+    default: MergePolicy
+    conflicts: List[Hashable]
+    _data: Dict[Hashable, Any]
+    _parent: Optional[SharedStore]
+    _written: Set[Hashable]
+    _copied: Set[Hashable]
+    _deleted: Set[Hashable]
+    _views: Dict[Hashable, _View]
+
+    def __init__(
+        self,
+        data: Optional[Dict[Hashable, Any]] = None,
+        policies: Optional[Dict[Hashable, MergePolicy]] = None,
+        default: MergePolicy = "error",
+    ) -> None: ...
+    def _raw(self, key: Hashable) -> Any: ...
+    def __getitem__(self, key: Hashable) -> Any: ...
+    def _install(self, key: Hashable, old: Any, new: Any) -> None: ...
+    def __setitem__(self, key: Hashable, value: Any) -> None: ...
+    def __delitem__(self, key: Hashable) -> None: ...
+    def _keys(self) -> List[Hashable]: ...
+    def __iter__(self) -> Iterator[Hashable]: ...
+    def __len__(self) -> int: ...
+    def __contains__(self, key: object) -> bool: ...
+    def snapshot(self) -> SharedStore: ...
+    def _changes(self) -> Dict[Hashable, Any]: ...
+    def merge(self, branches: Iterable[SharedStore]) -> List[Hashable]: ...
+    def _apply(self, key: Hashable, values: List[Any]) -> None: ...
@@ -156,5 +156,30 @@ class TestAsyncParallelBatchFlow(unittest.TestCase):
         expected_total = sum(num * 2 for batch in shared_storage['batches'] for num in batch)
         self.assertEqual(shared_storage['total'], expected_total)
 
+    def test_max_concurrency(self):
+        """
+        Test that max_concurrency bounds how many sub-flows run at once
+        """
+        state = {'active': 0, 'peak': 0}
+
+        class TrackingNode(AsyncNode):
+            async def prep_async(self, shared_storage):
+                state['active'] += 1
+                state['peak'] = max(state['peak'], state['active'])
+                await asyncio.sleep(0.01)
+                state['active'] -= 1
+                shared_storage.setdefault('done', []).append(self.params['batch_id'])
+
+        class BoundedFlow(AsyncParallelBatchFlow):
+            async def prep_async(self, shared_storage):
+                return [{'batch_id': i} for i in range(8)]
+
+        shared_storage = {}
+        flow = BoundedFlow(start=TrackingNode(), max_concurrency=2)
+        self.loop.run_until_complete(flow.run_async(shared_storage))
+
+        self.assertEqual(sorted(shared_storage['done']), list(range(8)))
+        self.assertEqual(state['peak'], 2)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
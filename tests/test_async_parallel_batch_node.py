@@ -4,7 +4,7 @@ import sys
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
-from pocketflow import AsyncParallelBatchNode, AsyncParallelBatchFlow
+from pocketflow import AsyncParallelBatchNode, AsyncParallelBatchFlow, RateLimiter
 
 class AsyncParallelNumberProcessor(AsyncParallelBatchNode):
     def __init__(self, delay=0.1):
@@ -139,5 +139,98 @@ class TestAsyncParallelBatchNode(unittest.TestCase):
         self.assertLess(execution_order.index(1), execution_order.index(0))
         self.assertLess(execution_order.index(3), execution_order.index(2))
 
+    def test_max_concurrency(self):
+        """
+        Test that no more than max_concurrency items are in flight at once
+        """
+        state = {'active': 0, 'peak': 0}
+
+        class TrackingProcessor(AsyncParallelNumberProcessor):
+            async def exec_async(self, number):
+                state['active'] += 1
+                state['peak'] = max(state['peak'], state['active'])
+                await asyncio.sleep(0.01)
+                state['active'] -= 1
+                return number * 2
+
+        shared_storage = {
+            'input_numbers': list(range(20))
+        }
+
+        processor = TrackingProcessor()
+        processor.max_concurrency = 3
+        self.loop.run_until_complete(processor.run_async(shared_storage))
+
+        self.assertEqual(shared_storage['processed_numbers'], [x * 2 for x in range(20)])
+        self.assertEqual(state['peak'], 3)
+
+    def test_rate_limit_requests_per_second(self):
+        """
+        Test that the token bucket spaces requests beyond the initial burst
+        """
+        shared_storage = {
+            'input_numbers': list(range(6))
+        }
+
+        processor = AsyncParallelNumberProcessor(delay=0)
+        processor.rate_limit = RateLimiter(rps=20)
+        start_time = self.loop.time()
+        self.loop.run_until_complete(processor.run_async(shared_storage))
+        execution_time = self.loop.time() - start_time
+
+        self.assertEqual(shared_storage['processed_numbers'], [x * 2 for x in range(6)])
+        self.assertLess(execution_time, 0.1)  # 6 requests fit in the 20-request burst
+
+        limiter = RateLimiter(rps=50)
+        limiter.reqs = 0
+        start_time = self.loop.time()
+        self.loop.run_until_complete(asyncio.gather(*(limiter.acquire() for _ in range(5))))
+        self.assertGreaterEqual(self.loop.time() - start_time, 0.08)  # 5 requests at 50/s
+
+    def test_rate_limit_tokens_per_minute(self):
+        """
+        Test that item_tokens is charged against the tokens-per-minute bucket
+        """
+        class TokenProcessor(AsyncParallelNumberProcessor):
+            def item_tokens(self, item):
+                return 100
+
+        shared_storage = {
+            'input_numbers': [1, 2, 3]
+        }
+
+        processor = TokenProcessor(delay=0)
+        processor.rate_limit = RateLimiter(tpm=12000)  # 200 tokens/s, 12000 burst
+        processor.rate_limit.toks = 100
+        start_time = self.loop.time()
+        self.loop.run_until_complete(processor.run_async(shared_storage))
+
+        self.assertEqual(shared_storage['processed_numbers'], [2, 4, 6])
+        self.assertGreaterEqual(self.loop.time() - start_time, 0.9)  # 200 missing tokens at 200/s
+
+    def test_error_cancels_pending_items(self):
+        """
+        Test that a failing item stops the remaining queued items
+        """
+        started = []
+
+        class FailingProcessor(AsyncParallelNumberProcessor):
+            async def exec_async(self, number):
+                started.append(number)
+                await asyncio.sleep(0.01)
+                if number == 0:
+                    raise ValueError("boom")
+                return number
+
+        shared_storage = {
+            'input_numbers': list(range(10))
+        }
+
+        processor = FailingProcessor()
+        processor.max_concurrency = 2
+        with self.assertRaises(ValueError):
+            self.loop.run_until_complete(processor.run_async(shared_storage))
+        self.assertLess(len(started), 10)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,199 @@
+import unittest
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import Node, AsyncNode, BatchNode, AsyncParallelBatchNode, ProcessPoolBatchNode
+from pocketflow.cache import LRUCache, SQLiteCache, stable_hash
+
+CALLS = []
+
+class EmbedNode(Node):
+    def prep(self, shared_storage):
+        return shared_storage['text']
+
+    def exec(self, text):
+        CALLS.append(text)
+        return len(text)
+
+    def post(self, shared_storage, prep_result, exec_result):
+        shared_storage['result'] = exec_result
+
+class EmbedNodeV2(EmbedNode):
+    cache_version = "2"
+
+class BatchEmbedNode(BatchNode):
+    def prep(self, shared_storage):
+        return shared_storage['texts']
+
+    def exec(self, text):
+        CALLS.append(text)
+        return text.upper()
+
+    def post(self, shared_storage, prep_result, exec_result):
+        shared_storage['results'] = exec_result
+
+class ProcessEmbedNode(ProcessPoolBatchNode):
+    def prep(self, shared_storage):
+        return shared_storage['texts']
+
+    def exec(self, text):
+        return text.upper()
+
+    def post(self, shared_storage, prep_result, exec_result):
+        shared_storage['results'] = exec_result
+
+class TestExecCache(unittest.TestCase):
+    def setUp(self):
+        CALLS.clear()
+
+    def test_disabled_by_default(self):
+        node = EmbedNode()
+        node.run({'text': 'abc'})
+        node.run({'text': 'abc'})
+        self.assertEqual(CALLS, ['abc', 'abc'])
+
+    def test_lru_hits_and_misses(self):
+        node = EmbedNode()
+        node.cache = LRUCache()
+        for text in ['abc', 'abc', 'de', 'abc']:
+            shared_storage = {'text': text}
+            node.run(shared_storage)
+            self.assertEqual(shared_storage['result'], len(text))
+        self.assertEqual(CALLS, ['abc', 'de'])
+        self.assertEqual(node.cache.stats(), {'hits': 2, 'misses': 2, 'hit_rate': 0.5})
+
+    def test_key_includes_class_and_version(self):
+        node, node_v2 = EmbedNode(), EmbedNodeV2()
+        self.assertNotEqual(stable_hash(node, 'abc'), stable_hash(node_v2, 'abc'))
+        self.assertEqual(stable_hash(node, {'a': 1, 'b': 2}), stable_hash(EmbedNode(), {'b': 2, 'a': 1}))
+        cache = LRUCache()
+        node.cache = node_v2.cache = cache
+        node.run({'text': 'abc'})
+        node_v2.run({'text': 'abc'})
+        self.assertEqual(CALLS, ['abc', 'abc'])
+
+    def test_unhashable_json_falls_back_to_pickle(self):
+        self.assertEqual(stable_hash(EmbedNode(), {1, 2}), stable_hash(EmbedNode(), {1, 2}))
+
+    def test_different_types_never_share_a_key(self):
+        node = EmbedNode()
+        pairs = [({1: 'a'}, {'1': 'a'}), ((1, 2), [1, 2]), (1, 1.0), (1, True), ('1', 1), ({1, 2}, frozenset({1, 2})),
+                 (['ab', 'c'], ['a', 'bc']), (None, 'None'), (b'x', 'x')]
+        for a, b in pairs:
+            self.assertNotEqual(stable_hash(node, a), stable_hash(node, b), (a, b))
+        self.assertEqual(stable_hash(node, {'x', 'y', 'z'}), stable_hash(node, {'z', 'y', 'x'}))
+
+    def test_lru_eviction(self):
+        cache = LRUCache(maxsize=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        self.assertEqual(cache.get('b'), (False, None))
+        self.assertEqual(cache.get('a'), (True, 1))
+        self.assertEqual(len(cache), 2)
+
+    def test_ttl_expiry(self):
+        cache = LRUCache(ttl=0.05)
+        cache.set('a', 1)
+        self.assertEqual(cache.get('a'), (True, 1))
+        time.sleep(0.06)
+        self.assertEqual(cache.get('a'), (False, None))
+
+    def test_fallback_results_not_cached(self):
+        class FlakyNode(Node):
+            def exec(self, prep_result):
+                CALLS.append(prep_result)
+                if len(CALLS) == 1:
+                    raise ValueError("fail once")
+                return "ok"
+            def exec_fallback(self, prep_result, exc):
+                return "fallback"
+            def post(self, shared_storage, prep_result, exec_result):
+                return exec_result
+
+        node = FlakyNode()
+        node.cache = LRUCache()
+        self.assertEqual(node.run({}), "fallback")
+        self.assertEqual(node.run({}), "ok")
+        self.assertEqual(node.run({}), "ok")
+        self.assertEqual(len(CALLS), 2)
+
+    def test_batch_node_caches_per_item(self):
+        node = BatchEmbedNode()
+        node.cache = LRUCache()
+        shared_storage = {'texts': ['a', 'b', 'a', 'c', 'b']}
+        node.run(shared_storage)
+        self.assertEqual(shared_storage['results'], ['A', 'B', 'A', 'C', 'B'])
+        self.assertEqual(CALLS, ['a', 'b', 'c'])
+        self.assertEqual(node.cache.hits, 2)
+
+    def test_async_node(self):
+        class AsyncEmbedNode(AsyncParallelBatchNode):
+            async def prep_async(self, shared_storage):
+                return shared_storage['texts']
+            async def exec_async(self, text):
+                await asyncio.sleep(0)
+                CALLS.append(text)
+                return text * 2
+            async def post_async(self, shared_storage, prep_result, exec_result):
+                shared_storage['results'] = exec_result
+
+        node = AsyncEmbedNode()
+        node.cache = LRUCache()
+        shared_storage = {'texts': ['x', 'y']}
+        asyncio.run(node.run_async(shared_storage))
+        asyncio.run(node.run_async(shared_storage))
+        self.assertEqual(shared_storage['results'], ['xx', 'yy'])
+        self.assertEqual(sorted(CALLS), ['x', 'y'])
+        self.assertEqual(node.cache.stats()['hits'], 2)
+
+    def test_sqlite_persists_across_instances(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'cache.db')
+            node = EmbedNode()
+            node.cache = SQLiteCache(path)
+            node.run({'text': 'persist'})
+            node.cache.close()
+
+            node = EmbedNode()
+            node.cache = SQLiteCache(path)
+            shared_storage = {'text': 'persist'}
+            node.run(shared_storage)
+            self.assertEqual(shared_storage['result'], 7)
+            self.assertEqual(CALLS, ['persist'])
+            self.assertEqual(node.cache.hits, 1)
+            node.cache.close()
+
+    def test_sqlite_eviction_and_ttl(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = SQLiteCache(os.path.join(tmp, 'cache.db'), maxsize=2, ttl=60)
+            for i, key in enumerate(['a', 'b', 'c']):
+                cache.set(key, i)
+                time.sleep(0.01)
+            self.assertEqual(len(cache), 2)
+            self.assertEqual(cache.get('a'), (False, None))
+            self.assertEqual(cache.get('c'), (True, 2))
+            cache.ttl = -1
+            cache.set('d', 3)
+            self.assertEqual(cache.get('d'), (False, None))
+            cache.close()
+
+    def test_sqlite_shared_by_process_pool(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'cache.db')
+            node = ProcessEmbedNode(max_workers=2)
+            node.cache = SQLiteCache(path)
+            shared_storage = {'texts': ['a', 'b', 'c']}
+            node.run(shared_storage)
+            self.assertEqual(shared_storage['results'], ['A', 'B', 'C'])
+            self.assertEqual(len(node.cache), 3)
+            node.cache.close()
+
+if __name__ == '__main__':
+    unittest.main()
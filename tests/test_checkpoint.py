@@ -0,0 +1,266 @@
+import unittest
+import asyncio
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import (Node, AsyncNode, Flow, AsyncFlow, BatchFlow, AsyncBatchFlow, AsyncParallelBatchFlow, ThreadedBatchFlow,
+                        WorkStealingBatchFlow, DAGFlow, AsyncDAGFlow, AsyncPipelineFlow)
+from pocketflow.checkpoint import FileCheckpointStore
+from pocketflow.store import SharedStore
+
+class Crash(Exception):
+    pass
+
+class StepNode(Node):
+    def __init__(self, name, crash_on=None):
+        super().__init__()
+        self.name, self.crash_on = name, crash_on
+
+    def prep(self, shared_storage):
+        shared_storage.setdefault('runs', []).append(self.name)
+        if self.crash_on and self.crash_on(shared_storage):
+            raise Crash(self.name)
+        shared_storage['steps'] = shared_storage.get('steps', 0) + 1
+
+class AsyncStepNode(AsyncNode):
+    def __init__(self, name, crash_on=None):
+        super().__init__()
+        self.name, self.crash_on = name, crash_on
+
+    async def prep_async(self, shared_storage):
+        shared_storage.setdefault('runs', []).append(self.name)
+        if self.crash_on and self.crash_on(shared_storage):
+            raise Crash(self.name)
+
+class ParamNode(Node):
+    crash_at = None
+
+    def prep(self, shared_storage):
+        i = self.params['i']
+        if i == ParamNode.crash_at:
+            ParamNode.crash_at = None
+            raise Crash(i)
+        shared_storage.setdefault('processed', []).append(i)
+
+class ParamBatchFlow(BatchFlow):
+    def prep(self, shared_storage):
+        return [{'i': i} for i in range(5)]
+
+class ThreadedParamBatchFlow(ThreadedBatchFlow):
+    def prep(self, shared_storage):
+        return [{'i': i} for i in range(5)]
+
+class AsyncParamNode(AsyncNode):
+    crash_at = None
+
+    async def prep_async(self, shared_storage):
+        await asyncio.sleep(0.001 * self.params['i'])
+        i = self.params['i']
+        if i == AsyncParamNode.crash_at:
+            raise Crash(i)
+        shared_storage.setdefault('processed', []).append(i)
+
+class Counted:
+    pickles = 0
+
+    def __reduce__(self):
+        Counted.pickles += 1
+        return (Counted, ())
+
+class TestFileCheckpointStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'ckpt')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_roundtrip(self):
+        store = FileCheckpointStore(self.path)
+        store.save({'a': 1, 'b': [1, 2]}, {'node': 3})
+        shared_storage = {'config': 'kept'}
+        self.assertEqual(FileCheckpointStore(self.path).load(shared_storage), {'node': 3})
+        self.assertEqual(shared_storage, {'config': 'kept', 'a': 1, 'b': [1, 2]})
+
+    def test_only_changed_keys_are_written(self):
+        store = FileCheckpointStore(self.path)
+        shared_storage = {'big': list(range(1000)), 'counter': 0}
+        store.save(shared_storage, {})
+        big_file = store._files['big']
+        mtime = os.stat(os.path.join(self.path, big_file)).st_mtime_ns
+        shared_storage['counter'] += 1
+        store.save(shared_storage, {})
+        self.assertEqual(store._files['big'], big_file)
+        self.assertEqual(os.stat(os.path.join(self.path, big_file)).st_mtime_ns, mtime)
+        # The stale file of the changed key is removed
+        self.assertEqual(len([f for f in os.listdir(self.path) if f.endswith('.pkl')]), 3)
+
+    def test_unchanged_objects_are_not_pickled_again(self):
+        store = FileCheckpointStore(self.path, static=['index'])
+        shared_storage = {'index': Counted(), 'text': 'x' * 1000, 'items': [1]}
+        store.save(shared_storage, {})
+        shared_storage['items'].append(2)  # mutated in place: must still be saved
+        store.save(shared_storage, {})
+        self.assertEqual(Counted.pickles, 1)
+        shared_storage['index'] = Counted()
+        store.save(shared_storage, {})
+        self.assertEqual(Counted.pickles, 2)
+        loaded = {}
+        FileCheckpointStore(self.path).load(loaded)
+        self.assertEqual((loaded['text'], loaded['items']), ('x' * 1000, [1, 2]))
+
+    def test_deleted_and_excluded_keys(self):
+        store = FileCheckpointStore(self.path, exclude=['index'])
+        store.save({'a': 1, 'b': 2, 'index': object()}, {})
+        store.save({'a': 1}, {})
+        shared_storage = {}
+        FileCheckpointStore(self.path).load(shared_storage)
+        self.assertEqual(shared_storage, {'a': 1})
+
+    def test_load_missing(self):
+        self.assertIsNone(FileCheckpointStore(self.path).load({}))
+
+class TestFlowCheckpoint(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'ckpt')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build(self, crash_on=None):
+        a, b, c = StepNode('a'), StepNode('b', crash_on), StepNode('c')
+        a >> b >> c
+        flow = Flow(start=a)
+        flow.checkpoint = FileCheckpointStore(self.path)
+        return flow
+
+    def test_run_clears_checkpoint(self):
+        shared_storage = {}
+        self.build().run(shared_storage)
+        self.assertEqual(shared_storage['runs'], ['a', 'b', 'c'])
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_resume_after_crash(self):
+        crashed = {}
+        with self.assertRaises(Crash):
+            self.build(crash_on=lambda s: True).run(crashed)
+        self.assertTrue(os.path.exists(self.path))
+
+        # A new process: empty store, fresh flow object
+        resumed = {}
+        self.build().resume(resumed)
+        # 'a' is not re-run; 'b' re-runs from the state checkpointed after 'a'
+        self.assertEqual(resumed['runs'], ['a', 'b', 'c'])
+        self.assertEqual(resumed['steps'], 3)
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_resume_restores_last_action(self):
+        class Branch(Node):
+            def post(self, shared_storage, prep_result, exec_result):
+                return 'left'
+
+        start, branch = StepNode('start'), Branch()
+        crash = StepNode('left', crash_on=lambda s: s.get('crash', True))
+        start >> branch
+        branch - 'left' >> crash
+        flow = Flow(start=start)
+        flow.checkpoint = FileCheckpointStore(self.path)
+        with self.assertRaises(Crash):
+            flow.run({})
+        shared_storage = {'crash': False}
+        self.assertIsNone(flow.resume(shared_storage))
+        self.assertEqual(shared_storage['runs'], ['start', 'left'])
+
+    def test_resume_without_checkpoint_runs_from_start(self):
+        shared_storage = {}
+        self.build().resume(shared_storage)
+        self.assertEqual(shared_storage['runs'], ['a', 'b', 'c'])
+
+    def test_batch_flow_skips_completed_param_sets(self):
+        flow = ParamBatchFlow(start=ParamNode())
+        flow.checkpoint = FileCheckpointStore(self.path)
+        ParamNode.crash_at = 3
+        with self.assertRaises(Crash):
+            flow.run({})
+        shared_storage = {}
+        flow = ParamBatchFlow(start=ParamNode())
+        flow.checkpoint = FileCheckpointStore(self.path)
+        flow.resume(shared_storage)
+        self.assertEqual(shared_storage['processed'], [0, 1, 2, 3, 4])
+
+    def test_threaded_batch_flow_skips_completed_param_sets(self):
+        def merge(shared_storage, branch, params):
+            shared_storage.setdefault('processed', []).append(branch['processed'][-1])
+        flow = ThreadedParamBatchFlow(start=ParamNode(), max_workers=1, merge=merge)
+        flow.checkpoint = FileCheckpointStore(self.path)
+        ParamNode.crash_at = 3
+        with self.assertRaises(Crash):
+            flow.run({})
+        ParamNode.crash_at = None
+        shared_storage = {}
+        flow = ThreadedParamBatchFlow(start=ParamNode(), max_workers=1, merge=merge)
+        flow.checkpoint = FileCheckpointStore(self.path)
+        flow.resume(shared_storage)
+        self.assertEqual(shared_storage['processed'], [0, 1, 2, 3, 4])
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_unsafe_parallel_checkpoints_are_rejected(self):
+        for flow in (ThreadedParamBatchFlow(start=ParamNode()), WorkStealingBatchFlow(start=ParamNode())):
+            flow.checkpoint = FileCheckpointStore(self.path)
+            with self.assertRaises(ValueError):
+                flow.run({})
+
+    def test_flows_without_a_resume_position_are_rejected(self):
+        flow = DAGFlow(start=StepNode('a'))
+        flow.checkpoint = FileCheckpointStore(self.path)
+        with self.assertRaises(ValueError):
+            flow.run({})
+        for flow in (AsyncDAGFlow(start=AsyncStepNode('a')), AsyncPipelineFlow(start=AsyncStepNode('a'))):
+            flow.checkpoint = FileCheckpointStore(self.path)
+            with self.assertRaises(ValueError):
+                asyncio.run(flow.run_async({}))
+
+    def test_async_flow_resume(self):
+        a, b = AsyncStepNode('a'), AsyncStepNode('b', crash_on=lambda s: s.get('crash', True))
+        a >> b >> AsyncStepNode('c')
+        flow = AsyncFlow(start=a)
+        flow.checkpoint = FileCheckpointStore(self.path)
+        with self.assertRaises(Crash):
+            asyncio.run(flow.run_async({}))
+        shared_storage = {'crash': False}
+        asyncio.run(flow.resume_async(shared_storage))
+        self.assertEqual(shared_storage['runs'], ['a', 'b', 'c'])
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_async_batch_flows_skip_completed(self):
+        for flow_cls, make in ((AsyncBatchFlow, dict), (AsyncParallelBatchFlow, lambda: SharedStore(policies={'processed': 'append'}))):
+            class Batches(flow_cls):
+                async def prep_async(self, shared_storage):
+                    return [{'i': i} for i in range(4)]
+
+            flow = Batches(start=AsyncParamNode())
+            flow.checkpoint = FileCheckpointStore(self.path)
+            AsyncParamNode.crash_at = 2
+            with self.assertRaises(Crash):
+                asyncio.run(flow.run_async(make()))
+            AsyncParamNode.crash_at = None
+            shared_storage = make()
+            asyncio.run(flow.resume_async(shared_storage))
+            self.assertEqual(sorted(shared_storage['processed']), [0, 1, 2, 3], flow_cls.__name__)
+
+    def test_async_parallel_batch_flow_rejects_plain_dict(self):
+        class Batches(AsyncParallelBatchFlow):
+            async def prep_async(self, shared_storage):
+                return [{'i': i} for i in range(4)]
+
+        flow = Batches(start=AsyncParamNode())
+        flow.checkpoint = FileCheckpointStore(self.path)
+        with self.assertRaises(ValueError):
+            asyncio.run(flow.run_async({}))
+
+if __name__ == '__main__':
+    unittest.main()
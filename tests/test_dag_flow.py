@@ -0,0 +1,205 @@
+import unittest
+import asyncio
+import sys
+import threading
+import time
+import warnings
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import Node, AsyncNode, Flow, DAGFlow, AsyncDAGFlow, NodeTimeout
+
+class RecordNode(Node):
+    def __init__(self, name, delay=0, action=None):
+        super().__init__()
+        self.name, self.delay, self.action = name, delay, action
+
+    def prep(self, shared_storage):
+        shared_storage.setdefault('started', []).append(self.name)
+        time.sleep(self.delay)
+        shared_storage.setdefault('order', []).append(self.name)
+
+    def post(self, shared_storage, prep_result, exec_result):
+        return self.action
+
+class AsyncRecordNode(AsyncNode):
+    def __init__(self, name, delay=0, action=None):
+        super().__init__()
+        self.name, self.delay, self.action = name, delay, action
+
+    async def prep_async(self, shared_storage):
+        shared_storage.setdefault('started', []).append(self.name)
+        await asyncio.sleep(self.delay)
+        shared_storage.setdefault('order', []).append(self.name)
+
+    async def post_async(self, shared_storage, prep_result, exec_result):
+        return self.action
+
+class FailingNode(Node):
+    def exec(self, prep_result):
+        raise ValueError("boom")
+
+class TestDAGWiring(unittest.TestCase):
+    def test_list_successors_and_join(self):
+        a, b, c, d = (RecordNode(n) for n in 'abcd')
+        self.assertIs(a >> [b, c] >> d, d)
+        self.assertEqual(a.successors['default'], [b, c])
+        self.assertIs(b.successors['default'], d)
+        self.assertIs(c.successors['default'], d)
+
+    def test_conditional_fan_out(self):
+        a, b, c = RecordNode('a'), RecordNode('b'), RecordNode('c')
+        a - 'split' >> [b, c]
+        self.assertEqual(a.successors['split'], [b, c])
+
+    def test_cycle_detection(self):
+        a, b, c = RecordNode('a'), RecordNode('b'), RecordNode('c')
+        a >> [b, c]
+        c >> a
+        with self.assertRaisesRegex(ValueError, "cycle"):
+            DAGFlow(start=a).compile()
+
+class TestDAGFlow(unittest.TestCase):
+    def test_branches_run_concurrently(self):
+        a, d = RecordNode('a'), RecordNode('d')
+        branches = [RecordNode(n, delay=0.2) for n in 'bc'] + [RecordNode('e', delay=0.2)]
+        a >> branches >> d
+        shared_storage = {}
+        start = time.perf_counter()
+        DAGFlow(start=a).run(shared_storage)
+        elapsed = time.perf_counter() - start
+        self.assertLess(elapsed, 0.45)
+        self.assertEqual(shared_storage['order'][0], 'a')
+        self.assertEqual(shared_storage['order'][-1], 'd')
+        self.assertEqual(sorted(shared_storage['order'][1:4]), ['b', 'c', 'e'])
+
+    def test_join_waits_for_all_inputs(self):
+        a, fast, slow, join = RecordNode('a'), RecordNode('fast'), RecordNode('slow', delay=0.1), RecordNode('join')
+        a >> [fast, slow]
+        fast >> join
+        slow >> [join, RecordNode('after_slow')]
+        shared_storage = {}
+        DAGFlow(start=a).run(shared_storage)
+        order = shared_storage['order']
+        self.assertEqual(order.count('join'), 1)
+        self.assertGreater(order.index('join'), order.index('slow'))
+        self.assertIn('after_slow', order)
+
+    def test_sequential_parts_and_last_action(self):
+        a, b, c = RecordNode('a'), RecordNode('b'), RecordNode('c', action='done')
+        a >> b >> c
+        shared_storage = {}
+        self.assertEqual(DAGFlow(start=a).run(shared_storage), 'done')
+        self.assertEqual(shared_storage['order'], ['a', 'b', 'c'])
+
+    def test_untaken_branch_is_skipped_but_join_runs(self):
+        router = RecordNode('router', action='left')
+        left, right, join = RecordNode('left'), RecordNode('right'), RecordNode('join')
+        router - 'left' >> left
+        router - 'right' >> right
+        left >> join
+        right >> [RecordNode('right_tail'), join]
+        shared_storage = {}
+        DAGFlow(start=router).run(shared_storage)
+        self.assertEqual(shared_storage['order'], ['router', 'left', 'join'])
+
+    def test_missing_action_warns(self):
+        a = RecordNode('a', action='nope')
+        a >> [RecordNode('b')]
+        with warnings.catch_warnings(record=True) as w:
+            warnings.simplefilter("always")
+            DAGFlow(start=a).run({})
+        self.assertIn("Flow ends: 'nope' not found in ['default']", str(w[-1].message))
+
+    def test_max_workers_bounds_parallelism(self):
+        active, peak, lock = [0], [0], threading.Lock()
+
+        class Counted(Node):
+            def exec(self, prep_result):
+                with lock:
+                    active[0] += 1
+                    peak[0] = max(peak[0], active[0])
+                time.sleep(0.05)
+                with lock:
+                    active[0] -= 1
+
+        root = Counted()
+        root >> [Counted() for _ in range(6)]
+        DAGFlow(start=root, max_workers=2).run({})
+        self.assertEqual(peak[0], 2)
+
+    def test_error_propagates(self):
+        a = RecordNode('a')
+        a >> [FailingNode(), RecordNode('b')]
+        with self.assertRaisesRegex(ValueError, "boom"):
+            DAGFlow(start=a).run({})
+
+    def test_params_and_nesting(self):
+        class ParamNode(Node):
+            def prep(self, shared_storage):
+                shared_storage.setdefault('seen', []).append(self.params['tag'])
+
+        a = ParamNode()
+        a >> [ParamNode(), ParamNode()]
+        dag = DAGFlow(start=a)
+        dag >> RecordNode('after')
+        outer = Flow(start=dag)
+        outer.set_params({'tag': 'x'})
+        shared_storage = {}
+        outer.run(shared_storage)
+        self.assertEqual(shared_storage['seen'], ['x', 'x', 'x'])
+        self.assertEqual(shared_storage['order'], ['after'])
+
+    def test_flow_timeout_reaches_branches(self):
+        class Slow(Node):
+            def exec(self, prep_result):
+                time.sleep(0.5)
+
+        a = RecordNode('a')
+        a >> [Slow(), RecordNode('b')]
+        dag = DAGFlow(start=a)
+        dag.timeout = 0.1
+        with self.assertRaises(NodeTimeout):
+            dag.run({})
+
+class TestAsyncDAGFlow(unittest.TestCase):
+    def test_async_branches_run_concurrently(self):
+        a, d = AsyncRecordNode('a'), AsyncRecordNode('d', action='end')
+        a >> [AsyncRecordNode('b', delay=0.2), AsyncRecordNode('c', delay=0.2), RecordNode('sync')] >> d
+        shared_storage = {}
+        start = time.perf_counter()
+        self.assertEqual(asyncio.run(AsyncDAGFlow(start=a).run_async(shared_storage)), 'end')
+        self.assertLess(time.perf_counter() - start, 0.35)
+        self.assertEqual(shared_storage['order'][0], 'a')
+        self.assertEqual(shared_storage['order'][-1], 'd')
+
+    def test_async_max_concurrency(self):
+        root = AsyncRecordNode('root')
+        root >> [AsyncRecordNode(str(i), delay=0.05) for i in range(4)]
+        start = time.perf_counter()
+        asyncio.run(AsyncDAGFlow(start=root, max_concurrency=2).run_async({}))
+        self.assertGreaterEqual(time.perf_counter() - start, 0.1)
+
+    def test_async_error_cancels_siblings(self):
+        cancelled = []
+
+        class Slow(AsyncNode):
+            async def exec_async(self, prep_result):
+                try:
+                    await asyncio.sleep(1)
+                except asyncio.CancelledError:
+                    cancelled.append(True)
+                    raise
+
+        class Boom(AsyncNode):
+            async def exec_async(self, prep_result):
+                raise ValueError("boom")
+
+        root = AsyncRecordNode('root')
+        root >> [Slow(), Boom()]
+        with self.assertRaisesRegex(ValueError, "boom"):
+            asyncio.run(AsyncDAGFlow(start=root).run_async({}))
+        self.assertEqual(cancelled, [True])
+
+if __name__ == '__main__':
+    unittest.main()
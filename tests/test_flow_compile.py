@@ -0,0 +1,135 @@
+import unittest
+import asyncio
+import sys
+from pathlib import Path
+import warnings
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import Node, AsyncNode, Flow, AsyncFlow
+
+class NumberNode(Node):
+    def __init__(self, number):
+        super().__init__()
+        self.number = number
+    def prep(self, shared_storage):
+        shared_storage['current'] = self.number
+
+class AddNode(Node):
+    def __init__(self, number):
+        super().__init__()
+        self.number = number
+    def prep(self, shared_storage):
+        shared_storage['current'] += self.number
+
+class CheckPositiveNode(Node):
+    def post(self, shared_storage, prep_result, proc_result):
+        return 'positive' if shared_storage['current'] >= 0 else 'negative'
+
+class EndSignalNode(Node):
+    def post(self, shared_storage, prep_result, exec_result):
+        return "finished"
+
+class ParamRecorderNode(Node):
+    def prep(self, shared_storage):
+        shared_storage.setdefault('seen', []).append(self.params.get('tag'))
+
+class AsyncAddNode(AsyncNode):
+    def __init__(self, number):
+        super().__init__()
+        self.number = number
+    async def prep_async(self, shared_storage):
+        await asyncio.sleep(0)
+        shared_storage['current'] += self.number
+
+def build_loop():
+    n1 = NumberNode(10)
+    check = CheckPositiveNode()
+    subtract3 = AddNode(-3)
+    end = EndSignalNode()
+    n1 >> check
+    check - 'positive' >> subtract3
+    check - 'negative' >> end
+    subtract3 >> check
+    return n1
+
+class TestFlowCompile(unittest.TestCase):
+
+    def test_compile_returns_flow(self):
+        flow = Flow(start=NumberNode(1))
+        self.assertIs(flow.compile(), flow)
+
+    def test_transition_table(self):
+        """Start node gets index 0 and every action maps to a node index"""
+        start = build_loop()
+        flow = Flow(start=start).compile()
+        nodes, table = flow._plan
+        self.assertIs(nodes[0], start)
+        self.assertEqual(len(nodes), 4)
+        check = nodes.index(start.successors['default'])
+        self.assertEqual(set(table[check]), {'positive', 'negative'})
+        sub = table[check]['positive']
+        self.assertEqual(table[sub]['default'], check)
+
+    def test_compiled_matches_interpreted(self):
+        interpreted, compiled = {}, {}
+        self.assertEqual(Flow(start=build_loop()).run(interpreted), "finished")
+        self.assertEqual(Flow(start=build_loop()).compile().run(compiled), "finished")
+        self.assertEqual(compiled, interpreted)
+        self.assertEqual(compiled['current'], -2)
+
+    def test_compiled_flow_is_reusable(self):
+        flow = Flow(start=build_loop()).compile()
+        for _ in range(3):
+            shared = {}
+            flow.run(shared)
+            self.assertEqual(shared['current'], -2)
+
+    def test_params_reach_every_node(self):
+        a, b = ParamRecorderNode(), ParamRecorderNode()
+        a >> b
+        flow = Flow(start=a).compile()
+        flow.set_params({'tag': 'x'})
+        shared = {}
+        flow.run(shared)
+        self.assertEqual(shared['seen'], ['x', 'x'])
+        self.assertEqual(a.params, {})
+
+    def test_nested_compiled_flows(self):
+        inner_start = NumberNode(5)
+        inner_start >> AddNode(1)
+        inner = Flow(start=inner_start).compile()
+        inner >> AddNode(10)
+        outer = Flow(start=inner).compile()
+        shared = {}
+        outer.run(shared)
+        self.assertEqual(shared['current'], 16)
+
+    def test_missing_action_warns(self):
+        class ActionNode(Node):
+            def post(self, *args): return "specific_action"
+        start = ActionNode()
+        start >> NumberNode(1)
+        flow = Flow(start=start).compile()
+        with warnings.catch_warnings(record=True) as w:
+            warnings.simplefilter("always")
+            last_action = flow.run({})
+            self.assertEqual(len(w), 1)
+            self.assertIn("Flow ends: 'specific_action' not found in ['default']", str(w[-1].message))
+        self.assertEqual(last_action, "specific_action")
+
+    def test_empty_flow(self):
+        self.assertIsNone(Flow().compile().run({}))
+
+    def test_async_flow_compile(self):
+        start = NumberNode(1)
+        check = CheckPositiveNode()
+        start >> AsyncAddNode(-3) >> check
+        check - 'negative' >> EndSignalNode()
+        flow = AsyncFlow(start=start).compile()
+        shared = {}
+        last_action = asyncio.run(flow.run_async(shared))
+        self.assertEqual(shared['current'], -2)
+        self.assertEqual(last_action, "finished")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+import unittest
+import asyncio
+import importlib.util
+import json
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import llm
+from pocketflow.llm import ClientRegistry
+
+class FakeClient:
+    """Mimics the parts of the OpenAI client the helpers use"""
+    created = 0
+    def __init__(self, **kw):
+        FakeClient.created += 1
+        self.kw, self.closed = kw, False
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._complete))
+        self.embeddings = SimpleNamespace(create=self._embed)
+
+    def _complete(self, model, messages, **kw):
+        content = f"{model}:{messages[-1]['content']}"
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+    def _embed(self, model, input):
+        return SimpleNamespace(data=[SimpleNamespace(embedding=[float(len(t))]) for t in input])
+
+    def close(self): self.closed = True
+
+class FakeAsyncClient(FakeClient):
+    def __init__(self, **kw):
+        super().__init__(**kw)
+        complete, embed = self._complete, self._embed
+        async def acomplete(**kw): return complete(**kw)
+        async def aembed(**kw): return embed(**kw)
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=acomplete))
+        self.embeddings = SimpleNamespace(create=aembed)
+
+    async def close(self): self.closed = True
+
+class TestClientRegistry(unittest.TestCase):
+    def setUp(self):
+        FakeClient.created = 0
+        self.registry = ClientRegistry()
+        self.registry.register("fake", FakeClient, FakeAsyncClient)
+
+    def test_same_client_is_reused(self):
+        a = self.registry.get("fake")
+        self.assertIs(self.registry.get("fake"), a)
+        self.assertIsNot(self.registry.get("fake", base_url="http://other"), a)
+        self.assertEqual(FakeClient.created, 2)
+
+    def test_one_client_across_threads(self):
+        seen = []
+        threads = [threading.Thread(target=lambda: seen.append(self.registry.get("fake"))) for _ in range(16)]
+        for t in threads: t.start()
+        for t in threads: t.join()
+        self.assertEqual(len({id(c) for c in seen}), 1)
+
+    def test_async_clients_are_per_event_loop(self):
+        async def grab():
+            a, b = self.registry.get_async("fake"), self.registry.get_async("fake")
+            self.assertIs(a, b)
+            return a
+        first, second = asyncio.run(grab()), asyncio.run(grab())
+        self.assertIsInstance(first, FakeAsyncClient)
+        self.assertIsNot(first, second)
+
+    def test_unknown_or_missing_factory(self):
+        self.registry.register("sync-only", FakeClient)
+        with self.assertRaises(KeyError):
+            self.registry.get("missing")
+        with self.assertRaises(KeyError):
+            asyncio.run(self._get_async("sync-only"))
+
+    async def _get_async(self, name):
+        return self.registry.get_async(name)
+
+    def test_close(self):
+        client = self.registry.get("fake")
+        self.registry.close()
+        self.assertTrue(client.closed)
+        self.assertIsNot(self.registry.get("fake"), client)
+
+        async def run():
+            c = self.registry.get_async("fake")
+            await self.registry.aclose()
+            return c
+        self.assertTrue(asyncio.run(run()).closed)
+
+class TestHelpers(unittest.TestCase):
+    def setUp(self):
+        llm.registry.register("test-fake", FakeClient, FakeAsyncClient)
+
+    def test_call_llm_and_embeddings(self):
+        self.assertEqual(llm.call_llm("hi", model="m", client="test-fake"), "m:hi")
+        messages = [{"role": "user", "content": "hello"}]
+        self.assertEqual(llm.call_llm(messages, model="m", client="test-fake"), "m:hello")
+        self.assertEqual(llm.get_embeddings(["a", "bbb"], client="test-fake"), [[1.0], [3.0]])
+        self.assertEqual(llm.get_embedding("bb", client="test-fake"), [2.0])
+
+    def test_async_helpers(self):
+        async def run():
+            return (await llm.call_llm_async("hi", model="m", client="test-fake"),
+                    await llm.get_embedding_async("abcd", client="test-fake"))
+        self.assertEqual(asyncio.run(run()), ("m:hi", [4.0]))
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True  # headers and body are separate writes
+    connections = set()
+    def do_POST(self):
+        _Handler.connections.add(self.client_address)
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        data = json.dumps({"echo": body}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+    def log_message(self, *args): pass
+
+@unittest.skipUnless(importlib.util.find_spec("httpx"), "httpx not installed")
+class TestPooledHTTPClient(unittest.TestCase):
+    def test_keep_alive_reuses_one_connection(self):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        registry = ClientRegistry()
+        registry.register("http", llm.http_client, llm.async_http_client)
+        url = f"http://127.0.0.1:{server.server_port}/v1/embeddings"
+        _Handler.connections.clear()
+        try:
+            for i in range(5):
+                self.assertEqual(registry.get("http").post(url, json={"i": i}).json(), {"echo": {"i": i}})
+            self.assertEqual(len(_Handler.connections), 1)
+        finally:
+            registry.close()
+            server.shutdown()
+            server.server_close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,211 @@
+import unittest
+import asyncio
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import (AsyncFlow, AsyncNode, AsyncParallelBatchFlow, AsyncParallelBatchNode,
+                        BatchNode, ThreadPoolBatchNode, ThreadedBatchFlow)
+from pocketflow.batching import MicroBatcher
+from pocketflow.cache import LRUCache
+
+class FakeEmbeddingProvider:
+    """Local stand-in for an embeddings API that accepts arrays of inputs"""
+    def __init__(self, fail_times=0):
+        self.requests, self.fail_times, self.lock = [], fail_times, threading.Lock()
+
+    def embed(self, texts):
+        with self.lock:
+            self.requests.append(list(texts))
+            if self.fail_times:
+                self.fail_times -= 1
+                raise ConnectionError("provider down")
+        time.sleep(0.01)
+        return [[float(len(t))] for t in texts]
+
+    async def embed_async(self, texts):
+        self.requests.append(list(texts))
+        if self.fail_times:
+            self.fail_times -= 1
+            raise ConnectionError("provider down")
+        await asyncio.sleep(0.01)
+        return [[float(len(t))] for t in texts]
+
+TEXTS = ["a" * n for n in range(1, 11)]
+EXPECTED = [[float(n)] for n in range(1, 11)]
+
+class TestMicroBatcher(unittest.TestCase):
+    def test_batch_node_coalesces_exec_calls(self):
+        provider = FakeEmbeddingProvider()
+
+        class Embed(BatchNode):
+            batcher = MicroBatcher(max_batch_size=4, max_wait=0.05)
+            def prep(self, shared): return shared["texts"]
+            def exec(self, text): raise AssertionError("exec_batch should be used")
+            def exec_batch(self, texts): return provider.embed(texts)
+            def post(self, shared, prep_res, exec_res): shared["embeddings"] = exec_res
+
+        shared = {"texts": TEXTS}
+        Embed().run(shared)
+        self.assertEqual(shared["embeddings"], EXPECTED)
+        self.assertEqual(sorted(len(r) for r in provider.requests), [2, 4, 4])
+        self.assertEqual(Embed.batcher.stats()["items"], 10)
+
+    def test_thread_pool_batch_node_waits_for_stragglers(self):
+        provider = FakeEmbeddingProvider()
+
+        class Embed(ThreadPoolBatchNode):
+            def prep(self, shared): return shared["texts"]
+            def exec_batch(self, texts): return provider.embed(texts)
+            def post(self, shared, prep_res, exec_res): shared["embeddings"] = exec_res
+
+        node = Embed(max_workers=10)
+        node.batcher = MicroBatcher(max_batch_size=64, max_wait=0.05)
+        shared = {"texts": TEXTS}
+        node.run(shared)
+        self.assertEqual(shared["embeddings"], EXPECTED)
+        self.assertEqual(len(provider.requests), 1)
+
+    def test_default_exec_batch_maps_exec(self):
+        class Double(BatchNode):
+            batcher = MicroBatcher(max_batch_size=3, max_wait=0.01)
+            def prep(self, shared): return [1, 2, 3, 4]
+            def exec(self, x): return x * 2
+            def post(self, shared, prep_res, exec_res): shared["out"] = exec_res
+
+        shared = {}
+        Double().run(shared)
+        self.assertEqual(shared["out"], [2, 4, 6, 8])
+
+    def test_shared_batcher_keeps_node_classes_apart(self):
+        batcher = MicroBatcher(max_batch_size=8, max_wait=0.05)
+
+        class Tag(ThreadPoolBatchNode):
+            def prep(self, shared): return shared["items"]
+            def exec(self, x): return (type(self).__name__, x)
+            def post(self, shared, prep_res, exec_res): shared[type(self).__name__] = exec_res
+
+        class A(Tag): pass
+        class B(Tag): pass
+
+        shared = {"items": [1, 2]}
+        a, b = A(max_workers=2), B(max_workers=2)
+        a.batcher = b.batcher = batcher
+        threads = [threading.Thread(target=n.run, args=(shared,)) for n in (a, b)]
+        for t in threads: t.start()
+        for t in threads: t.join()
+        self.assertEqual(shared["A"], [("A", 1), ("A", 2)])
+        self.assertEqual(shared["B"], [("B", 1), ("B", 2)])
+
+    def test_param_sets_get_their_own_batches(self):
+        class Scale(ThreadPoolBatchNode):
+            batcher = MicroBatcher(max_batch_size=64, max_wait=0.05)
+            def prep(self, shared): return [1, 2, 3]
+            def exec(self, x): return x * self.params['f']
+            def post(self, shared, prep_res, exec_res): shared['out'][self.params['f']] = exec_res
+
+        class PerFactor(ThreadedBatchFlow):
+            def prep(self, shared): return [{'f': 10}, {'f': 100}]
+
+        shared = {'out': {}}
+        PerFactor(start=Scale(max_workers=3), max_workers=2, merge=None).run(shared)
+        self.assertEqual(shared['out'], {10: [10, 20, 30], 100: [100, 200, 300]})
+
+    def test_failed_batch_retries_each_item(self):
+        provider = FakeEmbeddingProvider(fail_times=1)
+
+        class Embed(BatchNode):
+            batcher = MicroBatcher(max_batch_size=10, max_wait=0.05)
+            def prep(self, shared): return shared["texts"]
+            def exec_batch(self, texts): return provider.embed(texts)
+            def post(self, shared, prep_res, exec_res): shared["embeddings"] = exec_res
+
+        shared = {"texts": TEXTS[:3]}
+        Embed(max_retries=2).run(shared)
+        self.assertEqual(shared["embeddings"], EXPECTED[:3])
+        self.assertEqual(len(provider.requests[0]), 3)
+
+    def test_wrong_result_count_falls_back(self):
+        class Broken(BatchNode):
+            batcher = MicroBatcher(max_batch_size=2, max_wait=0.01)
+            def prep(self, shared): return [1, 2]
+            def exec_batch(self, items): return [0]
+            def exec_fallback(self, item, exc): return type(exc).__name__
+            def post(self, shared, prep_res, exec_res): shared["out"] = exec_res
+
+        shared = {}
+        Broken().run(shared)
+        self.assertEqual(shared["out"], ["ValueError", "ValueError"])
+
+    def test_cache_hits_skip_the_batcher(self):
+        provider = FakeEmbeddingProvider()
+
+        class Embed(BatchNode):
+            batcher = MicroBatcher(max_batch_size=64, max_wait=0.02)
+            cache = LRUCache()
+            def prep(self, shared): return shared["texts"]
+            def exec_batch(self, texts): return provider.embed(texts)
+            def post(self, shared, prep_res, exec_res): shared["embeddings"] = exec_res
+
+        Embed().run({"texts": TEXTS[:5]})
+        shared = {"texts": TEXTS}
+        Embed().run(shared)
+        self.assertEqual(shared["embeddings"], EXPECTED)
+        self.assertEqual([len(r) for r in provider.requests], [5, 5])
+
+class TestAsyncMicroBatcher(unittest.TestCase):
+    def test_async_parallel_batch_node(self):
+        provider = FakeEmbeddingProvider()
+
+        class Embed(AsyncParallelBatchNode):
+            async def prep_async(self, shared): return shared["texts"]
+            async def exec_batch_async(self, texts): return await provider.embed_async(texts)
+            async def post_async(self, shared, prep_res, exec_res): shared["embeddings"] = exec_res
+
+        node = Embed()
+        node.batcher = MicroBatcher(max_batch_size=4, max_wait=0.01)
+        shared = {"texts": TEXTS}
+        asyncio.run(node.run_async(shared))
+        self.assertEqual(shared["embeddings"], EXPECTED)
+        self.assertEqual([len(r) for r in provider.requests], [4, 4, 2])
+
+    def test_coalesces_across_parallel_flow_runs(self):
+        provider = FakeEmbeddingProvider()
+        batcher = MicroBatcher(max_batch_size=64, max_wait=0.01, by_params=False)
+
+        class EmbedQuery(AsyncNode):
+            async def prep_async(self, shared): return self.params["text"]
+            async def exec_batch_async(self, texts): return await provider.embed_async(texts)
+            async def post_async(self, shared, prep_res, exec_res): shared["out"][prep_res] = exec_res
+
+        class AllQueries(AsyncParallelBatchFlow):
+            async def prep_async(self, shared): return [{"text": t} for t in TEXTS]
+
+        node = EmbedQuery()
+        node.batcher = batcher
+        shared = {"out": {}}
+        asyncio.run(AllQueries(start=AsyncFlow(start=node)).run_async(shared))
+        self.assertEqual([shared["out"][t] for t in TEXTS], EXPECTED)
+        self.assertEqual(len(provider.requests), 1)
+        self.assertEqual(batcher.stats(), {"batches": 1, "items": 10, "mean_batch_size": 10.0})
+
+    def test_async_failure_reaches_fallback(self):
+        provider = FakeEmbeddingProvider(fail_times=5)
+
+        class Embed(AsyncParallelBatchNode):
+            async def prep_async(self, shared): return TEXTS[:3]
+            async def exec_batch_async(self, texts): return await provider.embed_async(texts)
+            async def exec_fallback_async(self, text, exc): return None
+            async def post_async(self, shared, prep_res, exec_res): shared["embeddings"] = exec_res
+
+        node = Embed()
+        node.batcher = MicroBatcher(max_batch_size=8, max_wait=0.01)
+        shared = {}
+        asyncio.run(node.run_async(shared))
+        self.assertEqual(shared["embeddings"], [None, None, None])
+        self.assertEqual(len(provider.requests), 1)
+
+if __name__ == '__main__':
+    unittest.main()
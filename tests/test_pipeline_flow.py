@@ -0,0 +1,120 @@
+import unittest
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import Node, StreamingBatchNode, AsyncParallelBatchNode, AsyncPipelineFlow
+
+class Split(StreamingBatchNode):
+    """Source stage: one document in, one chunk per word out"""
+    def prep(self, shared):
+        return iter(shared["docs"])
+
+    def exec(self, doc):
+        for word in doc.split():
+            time.sleep(shared_delay(self, "split"))
+            yield word
+
+class Upper(AsyncParallelBatchNode):
+    async def exec_async(self, word):
+        if word == "boom":
+            raise ValueError("bad word")
+        await asyncio.sleep(shared_delay(self, "upper"))
+        return word.upper()
+
+class Collect(StreamingBatchNode):
+    def exec(self, word):
+        time.sleep(shared_delay(self, "collect"))
+        return word
+
+    def post_item(self, shared, item, word):
+        shared.setdefault("out", []).append(word)
+        shared.setdefault("timeline", []).append(("collect", time.perf_counter()))
+
+    def post(self, shared, prep_res, exec_res):
+        return "indexed"
+
+def shared_delay(node, stage):
+    return node.params.get(stage, 0)
+
+def pipeline(workers=1, queue_size=64, **delays):
+    split = Split()
+    split >> Upper(max_concurrency=workers) >> Collect()
+    flow = AsyncPipelineFlow(split, queue_size=queue_size)
+    flow.set_params(delays)
+    return flow
+
+class TestAsyncPipelineFlow(unittest.TestCase):
+    def test_items_flow_through_all_stages(self):
+        shared = {"docs": ["a b c", "d e"]}
+        flow = pipeline()
+        self.assertEqual(asyncio.run(flow.run_async(shared)), "indexed")
+        self.assertEqual(shared["out"], ["A", "B", "C", "D", "E"])
+        self.assertEqual([(m["items_in"], m["items_out"]) for m in flow.metrics.values()], [(2, 5), (5, 5), (5, 5)])
+        self.assertEqual(list(flow.metrics), ["Split", "Upper", "Collect"])
+
+    def test_stages_overlap(self):
+        shared = {"docs": ["w " * 10] * 2}
+        flow = pipeline(split=0.01, upper=0.01, collect=0.01)
+        t0 = time.perf_counter()
+        asyncio.run(flow.run_async(shared))
+        elapsed = time.perf_counter() - t0
+        self.assertEqual(len(shared["out"]), 20)
+        self.assertLess(elapsed, 0.45)  # run one stage after another this takes 0.6s
+        first_out = shared["timeline"][0][1] - t0
+        self.assertLess(first_out, 0.15)  # the first chunk is indexed before chunking finishes
+
+    def test_backpressure_bounds_queues(self):
+        shared = {"docs": ["w " * 50]}
+        flow = pipeline(queue_size=3, collect=0.002)
+        asyncio.run(flow.run_async(shared))
+        self.assertEqual(len(shared["out"]), 50)
+        self.assertLessEqual(max(m["queue_max"] for m in flow.metrics.values()), 3)
+        self.assertGreater(flow.metrics["Split"]["blocked"], 0)  # the fast source waited for space
+
+    def test_parallel_stage_workers(self):
+        shared = {"docs": ["w " * 16]}
+        flow = pipeline(workers=8, upper=0.05)
+        t0 = time.perf_counter()
+        asyncio.run(flow.run_async(shared))
+        self.assertLess(time.perf_counter() - t0, 0.4)
+        self.assertEqual(flow.metrics["Upper"]["workers"], 8)
+
+    def test_error_cancels_pipeline(self):
+        shared = {"docs": ["a b boom"] + ["w " * 100] * 10}
+        flow = pipeline(queue_size=2)
+        with self.assertRaises(ValueError):
+            asyncio.run(flow.run_async(shared))
+        self.assertLess(len(shared.get("out", [])), 100)
+        self.assertIn("Upper", flow.metrics)
+
+    def test_requires_linear_chain(self):
+        a, b = Split(), Collect()
+        a - "left" >> b
+        with self.assertRaises(ValueError):
+            asyncio.run(AsyncPipelineFlow(a).run_async({"docs": []}))
+
+    def test_plain_nodes_and_metrics_table(self):
+        class Double(Node):
+            def exec(self, x):
+                return 2 * x
+        class Source(Node):
+            def prep(self, shared):
+                return range(5)
+            def exec(self, x):
+                return x
+        class Sink(Node):
+            def post_item(self, shared, item, x):
+                shared.setdefault("out", []).append(item)
+        src = Source()
+        src >> Double() >> Sink()
+        shared = {}
+        flow = AsyncPipelineFlow(src)
+        asyncio.run(flow.run_async(shared))
+        self.assertEqual(shared["out"], [0, 2, 4, 6, 8])
+        self.assertIn("items/s", flow.metrics_table())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+import unittest
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import ThreadPoolBatchNode, ProcessPoolBatchNode, Flow
+
+class SquareMixin:
+    def prep(self, shared_storage):
+        return shared_storage['numbers']
+
+    def exec(self, number):
+        if number < 0:
+            raise ValueError("negative")
+        return (number * number, os.getpid())
+
+    def exec_fallback(self, number, exc):
+        return (None, os.getpid())
+
+    def post(self, shared_storage, prep_result, exec_result):
+        shared_storage['squares'] = [sq for sq, _ in exec_result]
+        shared_storage['pids'] = {pid for _, pid in exec_result}
+
+class ProcessSquares(SquareMixin, ProcessPoolBatchNode):
+    pass
+
+class ThreadSquares(SquareMixin, ThreadPoolBatchNode):
+    pass
+
+class FlakyProcessNode(ProcessPoolBatchNode):
+    def prep(self, shared_storage):
+        return [1, 2, 3]
+
+    def exec(self, number):
+        # Fails on the first attempt for every item; succeeds on retry
+        if self.cur_retry == 0:
+            raise RuntimeError("transient")
+        return (number, self.cur_retry)
+
+    def post(self, shared_storage, prep_result, exec_result):
+        shared_storage['results'] = exec_result
+
+class TestProcessPoolBatchNode(unittest.TestCase):
+    def test_ordered_results(self):
+        shared_storage = {'numbers': list(range(20))}
+        ProcessSquares(max_workers=2, chunksize=3).run(shared_storage)
+        self.assertEqual(shared_storage['squares'], [n * n for n in range(20)])
+        self.assertNotIn(os.getpid(), shared_storage['pids'])
+
+    def test_fallback_per_item(self):
+        shared_storage = {'numbers': [2, -1, 3]}
+        ProcessSquares(max_workers=2).run(shared_storage)
+        self.assertEqual(shared_storage['squares'], [4, None, 9])
+
+    def test_retries_per_item(self):
+        shared_storage = {}
+        FlakyProcessNode(max_retries=2, max_workers=2).run(shared_storage)
+        self.assertEqual(shared_storage['results'], [(1, 1), (2, 1), (3, 1)])
+
+    def test_empty_input(self):
+        shared_storage = {'numbers': []}
+        ProcessSquares().run(shared_storage)
+        self.assertEqual(shared_storage['squares'], [])
+
+class TestThreadPoolBatchNode(unittest.TestCase):
+    def test_runs_concurrently(self):
+        class SleepNode(ThreadPoolBatchNode):
+            def prep(self, shared_storage): return list(range(8))
+            def exec(self, item):
+                time.sleep(0.1)
+                return threading.get_ident()
+            def post(self, shared_storage, prep_result, exec_result):
+                shared_storage['threads'] = set(exec_result)
+
+        shared_storage = {}
+        start = time.perf_counter()
+        SleepNode(max_workers=8).run(shared_storage)
+        self.assertLess(time.perf_counter() - start, 0.5)
+        self.assertGreater(len(shared_storage['threads']), 1)
+
+    def test_unordered_results(self):
+        class DelayNode(ThreadPoolBatchNode):
+            def prep(self, shared_storage): return [0.15, 0.0, 0.05]
+            def exec(self, delay):
+                time.sleep(delay)
+                return delay
+            def post(self, shared_storage, prep_result, exec_result):
+                shared_storage['results'] = exec_result
+
+        shared_storage = {}
+        DelayNode(max_workers=3, ordered=False).run(shared_storage)
+        self.assertEqual(shared_storage['results'], [0.0, 0.05, 0.15])
+
+    def test_chunks_keep_order(self):
+        shared_storage = {'numbers': list(range(10))}
+        ThreadSquares(max_workers=3, chunksize=4).run(shared_storage)
+        self.assertEqual(shared_storage['squares'], [n * n for n in range(10)])
+
+    def test_exception_propagates(self):
+        class FailingNode(ThreadPoolBatchNode):
+            def prep(self, shared_storage): return [1, 2, 3]
+            def exec(self, item):
+                if item == 2:
+                    raise ValueError("boom")
+                return item
+
+        with self.assertRaises(ValueError):
+            FailingNode(max_workers=2).run({})
+
+    def test_in_flow(self):
+        shared_storage = {'numbers': [1, 2, 3]}
+        Flow(start=ThreadSquares()).run(shared_storage)
+        self.assertEqual(shared_storage['squares'], [1, 4, 9])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,158 @@
+import unittest
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import Node, BatchNode, AsyncNode, AsyncParallelBatchNode, Flow, AsyncFlow, add_hook, remove_hook
+from pocketflow.profiler import Profiler, percentile
+
+class LoadNode(Node):
+    def prep(self, shared_storage):
+        return shared_storage['text']
+
+    def exec(self, text):
+        time.sleep(0.01)
+        return text.upper()
+
+    def post(self, shared_storage, prep_result, exec_result):
+        shared_storage['upper'] = exec_result
+
+class SplitNode(BatchNode):
+    def prep(self, shared_storage):
+        return list(shared_storage['upper'])
+
+    def exec(self, char):
+        return ord(char)
+
+    def post(self, shared_storage, prep_result, exec_result):
+        shared_storage['codes'] = exec_result
+
+class FlakyNode(Node):
+    def __init__(self):
+        super().__init__(max_retries=3)
+
+    def exec(self, prep_result):
+        if self.cur_retry < 2:
+            raise ValueError("flaky")
+        return "ok"
+
+class TestHooks(unittest.TestCase):
+    def test_phase_events(self):
+        events = []
+        hook = add_hook(lambda node, phase, event, info: events.append((type(node).__name__, phase, event)))
+        try:
+            load = LoadNode()
+            load >> SplitNode()
+            Flow(start=load).run({'text': 'ab'})
+        finally:
+            remove_hook(hook)
+        self.assertEqual(events[:6], [
+            ('LoadNode', 'prep', 'start'), ('LoadNode', 'prep', 'end'),
+            ('LoadNode', 'exec', 'start'), ('LoadNode', 'exec', 'end'),
+            ('LoadNode', 'post', 'start'), ('LoadNode', 'post', 'end'),
+        ])
+        self.assertEqual(events.count(('SplitNode', 'item', 'end')), 2)
+
+        events.clear()
+        LoadNode().run({'text': 'ab'})
+        self.assertEqual(events, [])
+
+    def test_end_event_reports_errors(self):
+        infos = []
+        def hook(node, phase, event, info):
+            if event == 'end':
+                infos.append((phase, info['error']))
+
+        class BrokenNode(Node):
+            def post(self, shared_storage, prep_result, exec_result):
+                raise KeyError("missing")
+
+        with Profiler() as profiler:
+            add_hook(hook)
+            try:
+                with self.assertRaises(KeyError):
+                    BrokenNode().run({})
+            finally:
+                remove_hook(hook)
+        self.assertIsNone(infos[0][1])
+        self.assertIsInstance(infos[-1][1], KeyError)
+        self.assertEqual(profiler.summary()['BrokenNode']['phases']['post']['count'], 1)
+
+class TestProfiler(unittest.TestCase):
+    def test_percentile(self):
+        self.assertEqual(percentile([], 50), 0.0)
+        self.assertEqual(percentile([1, 2, 3, 4, 5], 50), 3)
+        self.assertAlmostEqual(percentile(list(range(101)), 95), 95)
+
+    def test_summary(self):
+        load = LoadNode()
+        load >> SplitNode()
+        with Profiler() as profiler:
+            Flow(start=load).run({'text': 'abc'})
+            FlakyNode().run({})
+        summary = profiler.summary()
+        load_exec = summary['LoadNode']['phases']['exec']
+        self.assertEqual(load_exec['count'], 1)
+        self.assertGreaterEqual(load_exec['total'], 0.01)
+        items = summary['SplitNode']['phases']['item']
+        self.assertEqual(items['count'], 3)
+        self.assertLessEqual(items['p50'], items['p95'])
+        self.assertLessEqual(items['p95'], items['p99'])
+        self.assertEqual(summary['FlakyNode']['retries'], 2)
+        self.assertEqual(summary['LoadNode']['retries'], 0)
+        json.loads(profiler.to_json())
+
+    def test_fallbacks_counted(self):
+        class FailNode(Node):
+            def exec(self, prep_result): raise ValueError("no")
+            def exec_fallback(self, prep_result, exc): return "fallback"
+
+        with Profiler() as profiler:
+            FailNode(max_retries=2).run({})
+        node = profiler.summary()['FailNode']
+        self.assertEqual((node['retries'], node['fallbacks']), (1, 1))
+
+    def test_async_parallel_items(self):
+        class Items(AsyncParallelBatchNode):
+            async def prep_async(self, shared_storage):
+                return [0.01, 0.02, 0.03]
+            async def exec_async(self, delay):
+                await asyncio.sleep(delay)
+                return delay
+
+        with Profiler() as profiler:
+            asyncio.run(AsyncFlow(start=Items()).run_async({}))
+        phases = profiler.summary()['Items']['phases']
+        self.assertEqual(phases['item']['count'], 3)
+        self.assertGreaterEqual(phases['item']['max'], 0.03)
+        self.assertLess(phases['exec']['total'], 0.06)  # items overlapped
+
+    def test_table_and_chrome_trace(self):
+        with Profiler(trace=True) as profiler:
+            SplitNode().run({'upper': 'xy'})
+        table = profiler.table()
+        self.assertIn('SplitNode', table)
+        self.assertIn('p95 ms', table)
+        trace = profiler.chrome_trace()
+        names = [e['name'] for e in trace['traceEvents']]
+        self.assertEqual(names.count('SplitNode.item'), 2)
+        self.assertTrue(all(e['ph'] == 'X' and e['dur'] >= 0 for e in trace['traceEvents']))
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'trace.json')
+            profiler.write_chrome_trace(path)
+            with open(path) as f:
+                self.assertEqual(len(json.load(f)['traceEvents']), len(names))
+
+    def test_unregistered_after_exit(self):
+        with Profiler() as profiler:
+            pass
+        LoadNode().run({'text': 'a'})
+        self.assertEqual(profiler.summary(), {})
+
+if __name__ == '__main__':
+    unittest.main()
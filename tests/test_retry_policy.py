@@ -0,0 +1,160 @@
+import unittest
+import asyncio
+import sys
+import time
+from email.utils import formatdate
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import Node, AsyncNode, AsyncParallelBatchNode, Flow
+from pocketflow.retry import RetryPolicy, RetryBudget, retry_after
+
+class RateLimitError(Exception):
+    def __init__(self, retry_after=None):
+        super().__init__("429")
+        if retry_after is not None:
+            self.retry_after = retry_after
+
+class Response:
+    def __init__(self, headers):
+        self.headers = headers
+
+class HTTPError(Exception):
+    def __init__(self, headers):
+        super().__init__("http error")
+        self.response = Response(headers)
+
+class FlakyNode(Node):
+    def __init__(self, errors, max_retries=5):
+        super().__init__(max_retries=max_retries)
+        self.errors = list(errors)
+        self.attempts = 0
+
+    def exec(self, prep_result):
+        self.attempts += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "success"
+
+    def exec_fallback(self, prep_result, exc):
+        return f"fallback:{type(exc).__name__}"
+
+    def post(self, shared_storage, prep_result, exec_result):
+        return exec_result
+
+class TestRetryAfter(unittest.TestCase):
+    def test_attribute(self):
+        self.assertEqual(retry_after(RateLimitError(2)), 2.0)
+
+    def test_header_seconds(self):
+        self.assertEqual(retry_after(HTTPError({'retry-after': '3'})), 3.0)
+        self.assertEqual(retry_after(HTTPError({'Retry-After': '1.5'})), 1.5)
+
+    def test_header_http_date(self):
+        delay = retry_after(HTTPError({'retry-after': formatdate(time.time() + 30, usegmt=True)}))
+        self.assertTrue(28 <= delay <= 31)
+
+    def test_missing_or_invalid(self):
+        self.assertIsNone(retry_after(ValueError()))
+        self.assertIsNone(retry_after(HTTPError({'retry-after': 'soon'})))
+
+class TestRetryPolicy(unittest.TestCase):
+    def test_exponential_backoff_is_capped(self):
+        policy = RetryPolicy(base=1, cap=5, jitter=False)
+        self.assertEqual([policy.backoff(a) for a in range(5)], [1, 2, 4, 5, 5])
+
+    def test_full_jitter_within_bounds(self):
+        policy = RetryPolicy(base=1, cap=100)
+        delays = [policy.backoff(3) for _ in range(200)]
+        self.assertTrue(all(0 <= d <= 8 for d in delays))
+        self.assertGreater(len(set(delays)), 100)
+
+    def test_retry_after_is_a_lower_bound(self):
+        policy = RetryPolicy(base=0.01, jitter=False)
+        self.assertEqual(policy.delay(0, RateLimitError(2), 0), 2)
+
+    def test_non_retryable_exception_goes_to_fallback(self):
+        node = FlakyNode([KeyError("bad input"), RateLimitError()])
+        node.retry = RetryPolicy(base=0, retry_on=(RateLimitError,))
+        self.assertEqual(node.run({}), "fallback:KeyError")
+        self.assertEqual(node.attempts, 1)
+
+    def test_retryable_exception_retries(self):
+        node = FlakyNode([RateLimitError(), RateLimitError()])
+        node.retry = RetryPolicy(base=0.001, retry_on=(RateLimitError,))
+        self.assertEqual(node.run({}), "success")
+        self.assertEqual(node.attempts, 3)
+
+    def test_max_retries_still_applies(self):
+        node = FlakyNode([RateLimitError()] * 5, max_retries=2)
+        node.retry = RetryPolicy(base=0)
+        self.assertEqual(node.run({}), "fallback:RateLimitError")
+        self.assertEqual(node.attempts, 2)
+
+    def test_max_elapsed(self):
+        node = FlakyNode([RateLimitError(retry_after=10)])
+        node.retry = RetryPolicy(base=0, max_elapsed=1)
+        start = time.perf_counter()
+        self.assertEqual(node.run({}), "fallback:RateLimitError")
+        self.assertLess(time.perf_counter() - start, 0.5)
+
+    def test_shared_budget(self):
+        budget = RetryBudget(3)
+        policy = RetryPolicy(base=0, budget=budget)
+        calls = []
+
+        class Step(FlakyNode):
+            def exec(self, prep_result):
+                calls.append(self.step)
+                return super().exec(prep_result)
+
+            def post(self, shared, prep_result, exec_result):
+                return None
+
+        nodes = [Step([]) for _ in range(3)]
+        for i, node in enumerate(nodes):
+            node.retry, node.step = policy, i
+        nodes[0] >> nodes[1] >> nodes[2]
+        for _ in range(2):
+            calls.clear()
+            for node in nodes:
+                node.errors[:] = [RateLimitError()] * 2
+            Flow(start=nodes[0]).run({})
+            # First node spends 2 retries, second gets 1 then falls back, third gets none.
+            # Each flow run starts with the full budget.
+            self.assertEqual([calls.count(i) for i in range(3)], [3, 2, 1])
+        self.assertEqual(budget.remaining, 3)
+
+    def test_budget_outside_a_run(self):
+        budget = RetryBudget(2)
+        self.assertEqual([budget.take() for _ in range(3)], [True, True, False])
+        self.assertEqual(budget.remaining, 0)
+        budget.reset()
+        self.assertEqual(budget.remaining, 2)
+
+    def test_async_node_with_jitter(self):
+        attempts = []
+
+        class FlakyAsyncNode(AsyncParallelBatchNode):
+            async def prep_async(self, shared_storage):
+                return list(range(20))
+            async def exec_async(self, item):
+                first = all(i != item for i, _ in attempts)
+                attempts.append((item, time.perf_counter()))
+                if first:
+                    raise RateLimitError()
+                return item
+            async def post_async(self, shared_storage, prep_result, exec_result):
+                shared_storage['results'] = exec_result
+
+        node = FlakyAsyncNode(max_retries=2)
+        node.retry = RetryPolicy(base=0.05)
+        shared_storage = {}
+        asyncio.run(node.run_async(shared_storage))
+        self.assertEqual(shared_storage['results'], list(range(20)))
+        retries = sorted(t for i, t in attempts[20:])
+        # Full jitter spreads the retries out instead of firing them together
+        self.assertGreater(retries[-1] - retries[0], 0.01)
+
+if __name__ == '__main__':
+    unittest.main()
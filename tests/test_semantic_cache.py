@@ -0,0 +1,150 @@
+import unittest
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import Node, AsyncNode
+from pocketflow.cache import SemanticCache, prompt_text
+
+VOCAB = ["install", "pocketflow", "how", "do", "i", "weather", "today", "paris", "please"]
+EMBEDS = []
+
+def embed(text):
+    """Bag-of-words over a tiny vocabulary: paraphrases with the same key words are close"""
+    EMBEDS.append(text)
+    words = text.lower().replace("?", "").split()
+    return [float(words.count(w)) for w in VOCAB]
+
+class AskNode(Node):
+    def prep(self, shared):
+        return shared["question"]
+
+    def exec(self, question):
+        self.calls = getattr(self, "calls", 0) + 1
+        return f"answer to {question}"
+
+    def post(self, shared, prep_res, exec_res):
+        shared["answer"] = exec_res
+
+class OtherAskNode(AskNode):
+    pass
+
+class AsyncAskNode(AsyncNode):
+    async def prep_async(self, shared):
+        return shared["question"]
+
+    async def exec_async(self, question):
+        self.calls = getattr(self, "calls", 0) + 1
+        return f"async answer to {question}"
+
+    async def post_async(self, shared, prep_res, exec_res):
+        shared["answer"] = exec_res
+
+class TestSemanticCache(unittest.TestCase):
+    def setUp(self):
+        EMBEDS.clear()
+
+    def ask(self, node, question):
+        shared = {"question": question}
+        node.run(shared)
+        return shared["answer"]
+
+    def test_similar_prompt_hits(self):
+        node = AskNode()
+        node.cache = SemanticCache(embed, threshold=0.9)
+        first = self.ask(node, "How do I install PocketFlow?")
+        self.assertEqual(self.ask(node, "how do i install pocketflow please"), first)
+        self.assertEqual(node.calls, 1)
+        self.ask(node, "weather in Paris today")
+        self.assertEqual(node.calls, 2)
+        stats = node.cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["semantic_hits"]), (1, 2, 1))
+
+    def test_exact_prompt_skips_embedding(self):
+        node = AskNode()
+        node.cache = SemanticCache(embed)
+        self.ask(node, "How do I install PocketFlow?")
+        self.ask(node, "How do I install PocketFlow?")
+        self.assertEqual(len(EMBEDS), 1)
+        self.assertEqual(node.cache.stats()["exact_hits"], 1)
+
+    def test_lru_eviction(self):
+        node = AskNode()
+        node.cache = cache = SemanticCache(embed, threshold=0.99, maxsize=2)
+        for q in ["install", "weather", "install", "paris"]:  # "install" is used again, so "weather" is evicted
+            self.ask(node, q)
+        self.assertEqual(len(cache), 2)
+        self.ask(node, "install")
+        self.assertEqual(node.calls, 3)
+        self.ask(node, "weather")
+        self.assertEqual(node.calls, 4)
+
+    def test_ttl_expiry(self):
+        node = AskNode()
+        node.cache = SemanticCache(embed, ttl=0.05)
+        self.ask(node, "install pocketflow")
+        time.sleep(0.1)
+        self.ask(node, "install pocketflow")
+        self.assertEqual(node.calls, 2)
+
+    def test_namespaces_are_separate(self):
+        cache = SemanticCache(embed)
+        a, b = AskNode(), OtherAskNode()
+        a.cache = b.cache = cache
+        self.ask(a, "install pocketflow")
+        self.ask(b, "install pocketflow")
+        self.assertEqual((a.calls, b.calls), (1, 1))
+        b.cache_namespace = a.cache_namespace = "support-flow"
+        self.ask(a, "install pocketflow")
+        self.assertEqual(self.ask(b, "install pocketflow"), "answer to install pocketflow")
+        self.assertEqual(b.calls, 1)
+        self.assertEqual(set(cache.stats()["namespaces"]), {cache.namespace(AskNode()), cache.namespace(OtherAskNode()), "support-flow"})
+
+    def test_async_node(self):
+        node = AsyncAskNode()
+        node.cache = SemanticCache(embed, threshold=0.9)
+        for q in ["How do I install PocketFlow?", "how do i install pocketflow please"]:
+            shared = {"question": q}
+            asyncio.run(node.run_async(shared))
+        self.assertEqual(node.calls, 1)
+        self.assertEqual(shared["answer"], "async answer to How do I install PocketFlow?")
+
+    def test_embedding_error_is_an_uncached_miss(self):
+        def broken(text):
+            raise ValueError("input too long")
+        node = AskNode()
+        node.cache = SemanticCache(broken)
+        with self.assertWarns(UserWarning):
+            self.assertEqual(self.ask(node, "install pocketflow"), "answer to install pocketflow")
+        with self.assertWarns(UserWarning):
+            self.ask(node, "install pocketflow")
+        self.assertEqual(node.calls, 2)
+        self.assertEqual(node.cache.stats()["embed_errors"], 2)
+        self.assertEqual(len(node.cache), 0)
+
+    def test_long_prompt_is_trimmed(self):
+        node = AskNode()
+        node.cache = SemanticCache(embed, max_chars=20)
+        self.ask(node, "weather " * 100 + "install pocketflow")
+        self.assertEqual(EMBEDS, ["r install pocketflow"])
+
+    def test_precomputed_vector(self):
+        node = AskNode()
+        node.cache = SemanticCache(vector=lambda q: None if q.startswith("weather") else embed(q.replace("please", "")), threshold=0.9)
+        self.ask(node, "install pocketflow")
+        self.ask(node, "install pocketflow please")
+        self.assertEqual(node.calls, 1)
+        self.ask(node, "weather today")
+        self.ask(node, "weather today")
+        self.assertEqual(node.calls, 3)  # no vector: nothing stored
+        self.assertEqual(node.cache.stats()["embeddings"], 2)
+
+    def test_prompt_text(self):
+        self.assertEqual(prompt_text("hi"), "hi")
+        self.assertEqual(prompt_text([{"role": "user", "content": "hi"}]), "user: hi")
+        self.assertEqual(prompt_text({"b": 1, "a": 2}), '{"a": 2, "b": 1}')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,198 @@
+import unittest
+import asyncio
+import pickle
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import AsyncNode, AsyncFlow, AsyncParallelBatchFlow, Node, ThreadedBatchFlow
+from pocketflow.store import SharedStore, MergeConflict
+
+class Matrix:
+    """Stands in for a large array: must never be copied"""
+    copies = 0
+    def __copy__(self):
+        Matrix.copies += 1
+        return Matrix()
+    def __deepcopy__(self, memo):
+        return self.__copy__()
+
+class LoadNode(AsyncNode):
+    async def prep_async(self, shared):
+        await asyncio.sleep(0.01 * (3 - self.params['i'] % 3))
+        # Scratch key written by every run: races without snapshots
+        shared['current'] = self.params['i']
+        return shared['matrix']
+
+    async def post_async(self, shared, matrix, exec_res):
+        await asyncio.sleep(0.01)
+        shared['answers'][self.params['i']] = (shared['current'], matrix is shared['matrix'])
+        shared['log'].append(self.params['i'])
+        shared['tokens'] += 10
+
+class AllBatches(AsyncParallelBatchFlow):
+    async def prep_async(self, shared):
+        return [{'i': i} for i in range(6)]
+
+def make_store(**policies):
+    return SharedStore(
+        {'matrix': Matrix(), 'answers': {}, 'log': [], 'tokens': 5},
+        policies={'answers': 'update', 'log': 'append', 'current': 'last',
+                  'tokens': lambda base, values: base + sum(v - base for v in values), **policies},
+    )
+
+class TestSharedStore(unittest.TestCase):
+    def test_snapshot_reads_through_and_isolates_writes(self):
+        store = SharedStore({'a': 1, 'nested': {'x': [1]}})
+        snap = store.snapshot()
+        self.assertEqual(snap['a'], 1)
+        snap['a'] = 2
+        snap['nested']['x'].append(2)
+        snap['b'] = 3
+        del snap['a']
+        self.assertNotIn('a', snap)
+        self.assertEqual(dict(store), {'a': 1, 'nested': {'x': [1]}})
+        self.assertEqual(sorted(snap), ['b', 'nested'])
+        changes = snap._changes()
+        self.assertEqual(sorted(changes), ['a', 'b', 'nested'])
+        self.assertEqual(changes['nested'], {'x': [1, 2]})
+
+    def test_unchanged_reads_are_not_changes(self):
+        store = SharedStore({'items': [1, 2], 'n': 1})
+        snap = store.snapshot()
+        snap['items']
+        snap['n'] = 1
+        self.assertEqual(snap._changes(), {})
+
+    def test_reads_hand_out_views_without_copying(self):
+        big = list(range(100_000))
+        store = SharedStore({'big': big, 'd': {'rows': [1, 2]}})
+        snap = store.snapshot()
+        self.assertEqual(snap['big'][-1], 99_999)
+        self.assertEqual(len(snap['big']), 100_000)
+        self.assertEqual(snap['d'], {'rows': [1, 2]})
+        self.assertEqual(snap._data, {})
+        self.assertEqual(pickle.loads(pickle.dumps(snap['d'])), {'rows': [1, 2]})
+        self.assertEqual(snap._changes(), {})
+
+    def test_first_write_copies_only_the_touched_path(self):
+        store = SharedStore({'d': {'a': {'x': 1}, 'b': [1]}})
+        snap = store.snapshot()
+        a = snap['d']['a']
+        a['x'] = 2
+        self.assertEqual(store['d'], {'a': {'x': 1}, 'b': [1]})
+        self.assertEqual(snap['d'], {'a': {'x': 2}, 'b': [1]})
+        self.assertIs(snap._changes()['d']['b'], store['d']['b'])
+        a['y'] = 3
+        self.assertEqual(snap['d']['a'], {'x': 2, 'y': 3})
+
+    def test_replaced_key_detaches_old_view(self):
+        store = SharedStore({'d': {}})
+        snap = store.snapshot()
+        old = snap['d']
+        snap['d'] = {'new': 1}
+        old['stale'] = 1
+        self.assertEqual(snap['d'], {'new': 1})
+        self.assertEqual(store['d'], {})
+
+    def test_default_policy_detects_conflicts(self):
+        store = SharedStore({'x': 0})
+        a, b = store.snapshot(), store.snapshot()
+        a['x'], b['x'] = 1, 2
+        with self.assertRaises(MergeConflict) as cm:
+            store.merge([a, b])
+        self.assertEqual(cm.exception.key, 'x')
+        self.assertEqual(store['x'], 0)
+
+    def test_equal_writes_and_single_writer_do_not_conflict(self):
+        store = SharedStore({'x': 0})
+        a, b, c = store.snapshot(), store.snapshot(), store.snapshot()
+        a['x'] = b['x'] = 1
+        c['y'] = 2
+        self.assertEqual(store.merge([a, b, c]), [])
+        self.assertEqual(dict(store), {'x': 1, 'y': 2})
+
+    def test_last_writer_records_conflict(self):
+        store = SharedStore({'x': 0}, default='last')
+        a, b = store.snapshot(), store.snapshot()
+        a['x'], b['x'] = 1, 2
+        self.assertEqual(store.merge([a, b]), ['x'])
+        self.assertEqual(store['x'], 2)
+
+    def test_update_policy_rejects_conflicting_subkeys(self):
+        store = SharedStore({'d': {}}, policies={'d': 'update'})
+        a, b = store.snapshot(), store.snapshot()
+        a['d']['k'], b['d']['k'] = 1, 2
+        with self.assertRaises(MergeConflict):
+            store.merge([a, b])
+
+    def test_nested_snapshots(self):
+        store = SharedStore({'log': []}, policies={'log': 'append'})
+        outer = store.snapshot()
+        inner_a, inner_b = outer.snapshot(), outer.snapshot()
+        inner_a['log'].append('a')
+        inner_b['log'].append('b')
+        outer.merge([inner_a, inner_b])
+        self.assertEqual(store['log'], [])
+        store.merge([outer])
+        self.assertEqual(store['log'], ['a', 'b'])
+
+    def test_merge_rejects_foreign_snapshot(self):
+        with self.assertRaises(ValueError):
+            SharedStore().merge([SharedStore().snapshot()])
+
+    def test_unknown_policy(self):
+        store = SharedStore(default='bogus')
+        snap = store.snapshot()
+        snap['x'] = 1
+        with self.assertRaises(ValueError):
+            store.merge([snap])
+
+class TestParallelFlowsWithSharedStore(unittest.TestCase):
+    def setUp(self):
+        Matrix.copies = 0
+
+    def test_async_parallel_batch_flow(self):
+        shared = make_store()
+        asyncio.run(AllBatches(start=AsyncFlow(start=LoadNode())).run_async(shared))
+        self.assertEqual(shared['answers'], {i: (i, True) for i in range(6)})
+        self.assertEqual(shared['log'], list(range(6)))
+        self.assertEqual(shared['tokens'], 65)
+        self.assertEqual(shared['current'], 5)
+        self.assertIn('current', shared.conflicts)
+        self.assertEqual(Matrix.copies, 0)
+
+    def test_async_parallel_batch_flow_conflict(self):
+        shared = make_store(current='error')
+        with self.assertRaises(MergeConflict):
+            asyncio.run(AllBatches(start=AsyncFlow(start=LoadNode())).run_async(shared))
+        self.assertEqual(shared['answers'], {})
+
+    def test_plain_dict_still_shared(self):
+        shared = {'matrix': Matrix(), 'answers': {}, 'log': [], 'tokens': 5}
+        asyncio.run(AllBatches(start=AsyncFlow(start=LoadNode())).run_async(shared))
+        self.assertEqual(sorted(shared['log']), list(range(6)))
+        self.assertEqual(shared['tokens'], 65)
+
+    def test_threaded_batch_flow(self):
+        class Record(Node):
+            def prep(self, shared):
+                shared['current'] = self.params['i']
+                time.sleep(0.01)
+                return shared['current']
+
+            def post(self, shared, prep_res, exec_res):
+                shared['answers'][self.params['i']] = prep_res
+
+        class Threaded(ThreadedBatchFlow):
+            def prep(self, shared):
+                return [{'i': i} for i in range(8)]
+
+        shared = make_store()
+        Threaded(start=Record(), max_workers=8).run(shared)
+        self.assertEqual(shared['answers'], {i: i for i in range(8)})
+        self.assertEqual(shared['current'], 7)
+
+if __name__ == '__main__':
+    unittest.main()
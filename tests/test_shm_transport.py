@@ -0,0 +1,104 @@
+import unittest
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+import numpy as np
+from pocketflow import ProcessPoolBatchNode, ThreadPoolBatchNode
+from pocketflow.shm import ShmTransport, SharedArray
+
+def segments():
+    return set(os.listdir("/dev/shm")) if os.path.isdir("/dev/shm") else set()
+
+class Normalize(ProcessPoolBatchNode):
+    transport = ShmTransport(min_bytes=1024)
+
+    def prep(self, shared):
+        return shared["frames"]
+
+    def exec(self, frame):
+        if frame["id"] < 0:
+            raise ValueError("bad frame")
+        return {"id": frame["id"], "pixels": frame["pixels"] / 255.0, "mean": float(frame["pixels"].mean()), "pid": os.getpid()}
+
+    def post(self, shared, prep_res, exec_res_list):
+        shared["normalized"] = exec_res_list
+
+class Passthrough(ProcessPoolBatchNode):
+    transport = ShmTransport(min_bytes=1024)
+
+    def prep(self, shared):
+        return shared["frames"]
+
+    def exec(self, pixels):
+        return pixels  # a view of the input segment
+
+    def post(self, shared, prep_res, exec_res_list):
+        shared["out"] = exec_res_list
+
+class ThreadNormalize(ThreadPoolBatchNode):
+    transport = ShmTransport(min_bytes=1024)
+    prep, exec, post = Normalize.prep, Normalize.exec, Normalize.post
+
+def frames(n=6, size=64):
+    return [{"id": i, "pixels": np.full((size, size, 3), i, dtype=np.uint8)} for i in range(n)]
+
+class TestShmTransport(unittest.TestCase):
+    def setUp(self):
+        self.before = segments()
+
+    def tearDown(self):
+        self.assertEqual(segments() - self.before, set(), "shared memory segments leaked")
+
+    def test_export_replaces_large_arrays_only(self):
+        t = ShmTransport(min_bytes=1024)
+        owned = []
+        big, small = np.ones((32, 32)), np.ones(4)
+        handles = t.export({"big": big, "small": small, "rest": ("x", [big])}, owned)
+        self.assertIsInstance(handles["big"], SharedArray)
+        self.assertIs(handles["small"], small)
+        self.assertIsInstance(handles["rest"][1][0], SharedArray)
+        self.assertEqual(len(owned), 2)
+        shms = []
+        views = t.attach(handles, shms)
+        np.testing.assert_array_equal(views["big"], big)
+        del views
+        for shm in shms:
+            shm.close()
+        t.release(owned)
+
+    def test_process_pool_round_trip(self):
+        shared = {"frames": frames()}
+        Normalize(max_workers=2, chunksize=2).run(shared)
+        out = shared["normalized"]
+        self.assertEqual([r["id"] for r in out], list(range(6)))
+        for i, r in enumerate(out):
+            self.assertEqual(r["pixels"].dtype, np.float64)
+            np.testing.assert_allclose(r["pixels"], i / 255.0)
+            self.assertEqual(r["mean"], i)
+            self.assertNotEqual(r["pid"], os.getpid())
+
+    def test_unordered(self):
+        shared = {"frames": frames(8)}
+        Normalize(max_workers=3, ordered=False).run(shared)
+        self.assertEqual(sorted(r["id"] for r in shared["normalized"]), list(range(8)))
+
+    def test_exec_returning_input_view(self):
+        shared = {"frames": [f["pixels"] for f in frames(3)]}
+        Passthrough(max_workers=2).run(shared)
+        for i, a in enumerate(shared["out"]):
+            np.testing.assert_array_equal(a, i)
+
+    def test_error_cleans_up(self):
+        shared = {"frames": frames(4) + [{"id": -1, "pixels": np.zeros((64, 64, 3), np.uint8)}]}
+        with self.assertRaises(ValueError):
+            Normalize(max_workers=2).run(shared)
+
+    def test_thread_pool_ignores_transport(self):
+        shared = {"frames": frames(2)}
+        ThreadNormalize(max_workers=2).run(shared)
+        self.assertEqual({r["pid"] for r in shared["normalized"]}, {os.getpid()})
+
+if __name__ == '__main__':
+    unittest.main()
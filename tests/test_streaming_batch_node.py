@@ -0,0 +1,122 @@
+import unittest
+import gc
+import sys
+import weakref
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import Node, StreamingBatchNode, Flow, add_hook, remove_hook
+
+class RunningSumNode(StreamingBatchNode):
+    def prep(self, shared_storage):
+        # A generator: items are only produced as the node consumes them
+        for n in range(shared_storage['count']):
+            shared_storage.setdefault('produced', []).append(n)
+            yield n
+
+    def exec(self, item):
+        return item * 2
+
+    def post_item(self, shared_storage, item, exec_result):
+        # Items are consumed lazily: only this item has been produced so far
+        self_check = shared_storage['produced'][-1] == item
+        shared_storage['lazy'] = shared_storage.get('lazy', True) and self_check
+        shared_storage['total'] = shared_storage.get('total', 0) + exec_result
+
+    def post(self, shared_storage, prep_result, exec_result):
+        shared_storage['post_exec_result'] = exec_result
+        return "done"
+
+class ReportNode(Node):
+    def prep(self, shared_storage):
+        shared_storage['report'] = f"total={shared_storage['total']}"
+
+class Payload:
+    pass
+
+class TestStreamingBatchNode(unittest.TestCase):
+    def test_items_processed_lazily(self):
+        shared_storage = {'count': 5}
+        action = RunningSumNode().run(shared_storage)
+        self.assertEqual(action, "done")
+        self.assertEqual(shared_storage['total'], 20)
+        self.assertTrue(shared_storage['lazy'])
+        self.assertIsNone(shared_storage['post_exec_result'])
+
+    def test_emits_phase_events(self):
+        events = []
+        hook = add_hook(lambda node, phase, event, info: events.append((phase, event)))
+        try:
+            RunningSumNode().run({'count': 2})
+        finally:
+            remove_hook(hook)
+        self.assertEqual(events, [
+            ('prep', 'start'), ('prep', 'end'), ('exec', 'start'),
+            ('item', 'start'), ('item', 'end'), ('item', 'start'), ('item', 'end'),
+            ('exec', 'end'), ('post', 'start'), ('post', 'end'),
+        ])
+
+    def test_empty_and_none_prep(self):
+        shared_storage = {'count': 0}
+        RunningSumNode().run(shared_storage)
+        self.assertNotIn('total', shared_storage)
+
+        class NoneNode(StreamingBatchNode):
+            def prep(self, shared_storage): return None
+            def post(self, shared_storage, prep_result, exec_result): return "empty"
+        self.assertEqual(NoneNode().run({}), "empty")
+
+    def test_results_are_not_retained(self):
+        """At most the previous item is still referenced when the next one is produced"""
+        refs = []
+
+        class DropNode(StreamingBatchNode):
+            def prep(self, shared_storage):
+                for _ in range(3):
+                    gc.collect()
+                    shared_storage.setdefault('alive', []).append(sum(r() is not None for r in refs))
+                    payload = Payload()
+                    refs.append(weakref.ref(payload))
+                    yield payload
+                    del payload
+            def exec(self, item):
+                return item
+
+        shared_storage = {}
+        DropNode().run(shared_storage)
+        self.assertLessEqual(max(shared_storage['alive']), 1)
+
+    def test_retries_and_fallback_per_item(self):
+        class FlakyNode(StreamingBatchNode):
+            def __init__(self):
+                super().__init__(max_retries=2)
+                self.attempts = {}
+            def prep(self, shared_storage):
+                return iter([1, 2, 3])
+            def exec(self, item):
+                self.attempts[item] = self.attempts.get(item, 0) + 1
+                if item == 2 and self.attempts[item] < 2:
+                    raise ValueError("retry me")
+                if item == 3:
+                    raise ValueError("always fails")
+                return item
+            def exec_fallback(self, prep_result, exc):
+                return -prep_result
+            def post_item(self, shared_storage, item, exec_result):
+                shared_storage.setdefault('results', []).append(exec_result)
+
+        shared_storage = {}
+        node = FlakyNode()
+        node.run(shared_storage)
+        self.assertEqual(shared_storage['results'], [1, 2, -3])
+        self.assertEqual(node.attempts, {1: 1, 2: 2, 3: 2})
+
+    def test_in_flow(self):
+        node = RunningSumNode()
+        node - "done" >> ReportNode()
+        shared_storage = {'count': 4}
+        Flow(start=node).run(shared_storage)
+        self.assertEqual(shared_storage['report'], "total=12")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,193 @@
+import unittest
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import Node, Flow, ThreadedBatchFlow
+
+class LoadGrades(Node):
+    def prep(self, shared_storage):
+        time.sleep(0.05)  # Simulate blocking I/O
+        return self.params['grades']
+
+    def post(self, shared_storage, prep_result, exec_result):
+        # Scratch key written by every run: races without isolation
+        shared_storage['grades'] = prep_result
+        return "calculate"
+
+class CalculateAverage(Node):
+    def prep(self, shared_storage):
+        time.sleep(0.01)
+        return shared_storage['grades']
+
+    def exec(self, grades):
+        return sum(grades) / len(grades)
+
+    def post(self, shared_storage, prep_result, average):
+        results = shared_storage.setdefault('results', {})
+        results.setdefault(self.params['class'], {})[self.params['student']] = average
+
+def create_base_flow():
+    load = LoadGrades()
+    load - "calculate" >> CalculateAverage()
+    return Flow(start=load)
+
+SCHOOL = {
+    'class_a': {'s1': [8, 9, 10], 's2': [5, 6, 7], 's3': [1, 2, 3]},
+    'class_b': {'s4': [9, 9, 9], 's5': [4, 5, 6]},
+}
+
+class ClassBatchFlow(ThreadedBatchFlow):
+    def prep(self, shared_storage):
+        students = SCHOOL[self.params['class']]
+        return [{'student': s, 'grades': g} for s, g in students.items()]
+
+class SchoolBatchFlow(ThreadedBatchFlow):
+    def prep(self, shared_storage):
+        return [{'class': c} for c in SCHOOL]
+
+EXPECTED = {
+    'class_a': {'s1': 9.0, 's2': 6.0, 's3': 2.0},
+    'class_b': {'s4': 9.0, 's5': 5.0},
+}
+
+class Tracked:
+    """Counts how many deep copies of the store are alive at once"""
+    lock, live, peak = threading.Lock(), 0, 0
+
+    def __deepcopy__(self, memo):
+        with Tracked.lock:
+            Tracked.live += 1
+            Tracked.peak = max(Tracked.peak, Tracked.live)
+        return Tracked()
+
+    def __del__(self):
+        with Tracked.lock:
+            Tracked.live -= 1
+
+class TestThreadedBatchFlow(unittest.TestCase):
+    def test_isolated_copies_bounded_by_workers(self):
+        class Slow(Node):
+            def prep(self, shared_storage):
+                time.sleep(0.005)
+
+        class ManyRuns(ThreadedBatchFlow):
+            def prep(self, shared_storage):
+                return [{'i': i} for i in range(40)]
+
+        Tracked.live = Tracked.peak = 0
+        ManyRuns(start=Slow(), max_workers=2, merge="update").run({'big': Tracked()})
+        # the frozen base plus, per worker, the running copy and a finished one awaiting its in-order merge
+        self.assertLessEqual(Tracked.peak, 1 + 2 * 2)
+
+    def test_shared_store_without_merge(self):
+        """Without a merge strategy every run writes to the same store"""
+        class CountNode(Node):
+            lock = threading.Lock()
+            def prep(self, shared_storage):
+                time.sleep(0.05)
+                with self.lock:
+                    shared_storage['seen'].append(self.params['i'])
+
+        class CountFlow(ThreadedBatchFlow):
+            def prep(self, shared_storage):
+                return [{'i': i} for i in range(8)]
+
+        shared_storage = {'seen': []}
+        start = time.perf_counter()
+        CountFlow(start=CountNode(), max_workers=8).run(shared_storage)
+        self.assertLess(time.perf_counter() - start, 0.3)
+        self.assertEqual(sorted(shared_storage['seen']), list(range(8)))
+
+    def test_nested_deep_merge(self):
+        """Isolated runs merged recursively reproduce the serial result"""
+        class_flow = ClassBatchFlow(start=create_base_flow(), max_workers=4, merge="deep")
+        school_flow = SchoolBatchFlow(start=class_flow, max_workers=2, merge="deep")
+        shared_storage = {}
+        school_flow.run(shared_storage)
+        self.assertEqual(shared_storage['results'], EXPECTED)
+
+    def test_update_merge_last_writer_wins(self):
+        class WriteNode(Node):
+            def prep(self, shared_storage):
+                time.sleep(0.05 * (3 - self.params['i']))  # finish in reverse order
+                shared_storage['last'] = self.params['i']
+                shared_storage[f"key_{self.params['i']}"] = True
+
+        class WriteFlow(ThreadedBatchFlow):
+            def prep(self, shared_storage):
+                return [{'i': i} for i in range(3)]
+
+        shared_storage = {'untouched': 1, 'last': None}
+        WriteFlow(start=WriteNode(), merge="update").run(shared_storage)
+        # Merged in param order, not completion order
+        self.assertEqual(shared_storage['last'], 2)
+        self.assertEqual(shared_storage['untouched'], 1)
+        self.assertTrue(all(shared_storage[f"key_{i}"] for i in range(3)))
+
+    def test_unchanged_keys_do_not_overwrite(self):
+        class WriteNode(Node):
+            def prep(self, shared_storage):
+                if self.params['i'] == 0:
+                    shared_storage['value'] = 'changed'
+
+        class WriteFlow(ThreadedBatchFlow):
+            def prep(self, shared_storage):
+                return [{'i': i} for i in range(3)]
+
+        shared_storage = {'value': 'original'}
+        WriteFlow(start=WriteNode(), merge="update").run(shared_storage)
+        self.assertEqual(shared_storage['value'], 'changed')
+
+    def test_custom_merge(self):
+        class EmitNode(Node):
+            def prep(self, shared_storage):
+                shared_storage['out'] = self.params['i'] * 10
+
+        class EmitFlow(ThreadedBatchFlow):
+            def prep(self, shared_storage):
+                return [{'i': i} for i in range(4)]
+
+        def collect(shared_storage, branch, params):
+            shared_storage.setdefault('all', []).append((params['i'], branch['out']))
+
+        shared_storage = {}
+        EmitFlow(start=EmitNode(), merge=collect).run(shared_storage)
+        self.assertEqual(shared_storage['all'], [(0, 0), (1, 10), (2, 20), (3, 30)])
+        self.assertNotIn('out', shared_storage)
+
+    def test_post_sees_merged_results(self):
+        class AverageFlow(ClassBatchFlow):
+            def post(self, shared_storage, prep_result, exec_result):
+                class_results = shared_storage['results'][self.params['class']]
+                shared_storage['average'] = sum(class_results.values()) / len(class_results)
+
+        flow = AverageFlow(start=create_base_flow(), merge="deep")
+        flow.set_params({'class': 'class_b'})
+        shared_storage = {}
+        flow.run(shared_storage)
+        self.assertEqual(shared_storage['average'], 7.0)
+
+    def test_unknown_merge_strategy(self):
+        class OneFlow(ThreadedBatchFlow):
+            def prep(self, shared_storage):
+                return [{}]
+        with self.assertRaises(ValueError):
+            OneFlow(start=Node(), merge="bogus").run({})
+
+    def test_exception_propagates(self):
+        class FailNode(Node):
+            def exec(self, prep_result):
+                raise RuntimeError("boom")
+
+        class OneFlow(ThreadedBatchFlow):
+            def prep(self, shared_storage):
+                return [{'i': 1}, {'i': 2}]
+
+        with self.assertRaises(RuntimeError):
+            OneFlow(start=FailNode()).run({})
+
+if __name__ == '__main__':
+    unittest.main()
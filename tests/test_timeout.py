@@ -0,0 +1,183 @@
+import unittest
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import (Node, AsyncNode, Flow, AsyncFlow, BatchFlow, AsyncParallelBatchNode,
+                        AsyncParallelBatchFlow, NodeTimeout)
+
+class SleepNode(Node):
+    def __init__(self, delay, max_retries=1):
+        super().__init__(max_retries=max_retries)
+        self.delay = delay
+
+    def exec(self, prep_result):
+        time.sleep(self.delay)
+        return "done"
+
+    def post(self, shared_storage, prep_result, exec_result):
+        shared_storage.setdefault('results', []).append(exec_result)
+        return exec_result
+
+class AsyncSleepNode(AsyncNode):
+    def __init__(self, delay, max_retries=1):
+        super().__init__(max_retries=max_retries)
+        self.delay = delay
+
+    async def exec_async(self, prep_result):
+        await asyncio.sleep(self.delay)
+        return "done"
+
+    async def post_async(self, shared_storage, prep_result, exec_result):
+        shared_storage.setdefault('results', []).append(exec_result)
+        return exec_result
+
+class TestSyncTimeout(unittest.TestCase):
+    def test_no_timeout_by_default(self):
+        self.assertEqual(SleepNode(0.01).run({}), "done")
+
+    def test_watchdog_raises_node_timeout(self):
+        node = SleepNode(1)
+        node.timeout = 0.05
+        start = time.perf_counter()
+        with self.assertRaises(NodeTimeout) as cm:
+            node.run({})
+        self.assertLess(time.perf_counter() - start, 0.5)
+        self.assertIs(cm.exception.node, node)
+        self.assertIn("SleepNode timed out after 0.05s", str(cm.exception))
+
+    def test_timeout_triggers_fallback(self):
+        class FallbackSleepNode(SleepNode):
+            def exec_fallback(self, prep_result, exc):
+                return f"fallback:{type(exc).__name__}"
+
+        node = FallbackSleepNode(1, max_retries=2)
+        node.timeout = 0.02
+        self.assertEqual(node.run({}), "fallback:NodeTimeout")
+
+    def test_exec_errors_pass_through(self):
+        class FailNode(Node):
+            timeout = 1
+            def exec(self, prep_result):
+                raise KeyError("bad")
+        with self.assertRaises(KeyError):
+            FailNode().run({})
+
+    def test_flow_deadline(self):
+        first, second = SleepNode(0.05), SleepNode(1)
+        first - "done" >> second
+        flow = Flow(start=first)
+        flow.timeout = 0.2
+        shared_storage = {}
+        with self.assertRaises(NodeTimeout) as cm:
+            flow.run(shared_storage)
+        self.assertIsInstance(cm.exception.node, SleepNode)
+        self.assertEqual(cm.exception.node.delay, 1)
+        self.assertEqual(shared_storage['results'], ["done"])
+
+    def test_batch_flow_deadline_covers_all_runs(self):
+        class Batch(BatchFlow):
+            timeout = 0.15
+            def prep(self, shared_storage):
+                return [{}] * 10
+
+        with self.assertRaises(NodeTimeout):
+            Batch(start=SleepNode(0.05)).run({})
+
+class TestAsyncTimeout(unittest.TestCase):
+    def test_node_timeout(self):
+        node = AsyncSleepNode(1)
+        node.timeout = 0.05
+        with self.assertRaises(NodeTimeout) as cm:
+            asyncio.run(node.run_async({}))
+        self.assertIs(cm.exception.node, node)
+
+    def test_async_fallback(self):
+        class FallbackNode(AsyncSleepNode):
+            async def exec_fallback_async(self, prep_result, exc):
+                return "fallback"
+
+        node = FallbackNode(1, max_retries=2)
+        node.timeout = 0.02
+        self.assertEqual(asyncio.run(node.run_async({})), "fallback")
+
+    def test_flow_deadline_propagates_to_nested_nodes(self):
+        slow = AsyncSleepNode(1)
+        inner = AsyncFlow(start=slow)
+        outer = AsyncFlow(start=AsyncSleepNode(0.01))
+        outer.start_node - "done" >> inner
+        outer.timeout = 0.1
+        start = time.perf_counter()
+        with self.assertRaises(NodeTimeout) as cm:
+            asyncio.run(outer.run_async({}))
+        self.assertLess(time.perf_counter() - start, 0.5)
+        self.assertEqual(cm.exception.node.delay, 1)
+
+    def test_parallel_batch_timeout_uses_fallback_per_item(self):
+        class Items(AsyncParallelBatchNode):
+            timeout = 0.05
+            async def prep_async(self, shared_storage):
+                return [0.01, 1, 0.01]
+            async def exec_async(self, delay):
+                await asyncio.sleep(delay)
+                return delay
+            async def exec_fallback_async(self, delay, exc):
+                return "timed out"
+            async def post_async(self, shared_storage, prep_result, exec_result):
+                shared_storage['results'] = exec_result
+
+        shared_storage = {}
+        asyncio.run(Items().run_async(shared_storage))
+        self.assertEqual(shared_storage['results'], [0.01, "timed out", 0.01])
+
+    def test_parallel_batch_timeout_cancels_siblings(self):
+        started, cancelled = [], []
+
+        class Items(AsyncParallelBatchNode):
+            async def prep_async(self, shared_storage):
+                return [1, 0.09, 0.09]
+            async def exec_async(self, delay):
+                started.append(delay)
+                try:
+                    await asyncio.sleep(delay)
+                except asyncio.CancelledError:
+                    cancelled.append(delay)
+                    raise
+
+        node = Items(max_concurrency=2)
+        node.timeout = 0.1
+        start = time.perf_counter()
+        with self.assertRaises(NodeTimeout):
+            asyncio.run(node.run_async({}))
+        # The hung item is cancelled at 0.1s, and so is the second 0.09s item still in flight
+        self.assertLess(time.perf_counter() - start, 0.3)
+        self.assertEqual(started, [1, 0.09, 0.09])
+        self.assertEqual(cancelled, [1, 0.09])
+
+        started.clear()
+        node = Items(max_concurrency=1)
+        node.timeout = 0.05
+        with self.assertRaises(NodeTimeout):
+            asyncio.run(node.run_async({}))
+        # Queued items never start once an item has failed
+        self.assertEqual(started, [1])
+
+    def test_parallel_batch_flow_deadline(self):
+        class Batches(AsyncParallelBatchFlow):
+            timeout = 0.1
+            async def prep_async(self, shared_storage):
+                return [{'delay': 0.01}, {'delay': 1}]
+
+        class ParamSleep(AsyncNode):
+            async def exec_async(self, prep_result):
+                await asyncio.sleep(self.params['delay'])
+
+        start = time.perf_counter()
+        with self.assertRaises(NodeTimeout):
+            asyncio.run(Batches(start=ParamSleep()).run_async({}))
+        self.assertLess(time.perf_counter() - start, 0.5)
+
+if __name__ == '__main__':
+    unittest.main()
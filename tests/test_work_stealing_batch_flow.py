@@ -0,0 +1,127 @@
+import unittest
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import Node, Flow, BatchFlow, WorkStealingBatchFlow, NodeTimeout
+
+class GradeNode(Node):
+    delay = 0.05
+
+    def prep(self, shared_storage):
+        time.sleep(self.delay)
+        with shared_storage['lock']:
+            shared_storage['log'].append(('student', self.params['cls'], self.params['student']))
+            shared_storage['results'].setdefault(self.params['cls'], {})[self.params['student']] = len(self.params['student'])
+
+class ClassBatch(BatchFlow):
+    def prep(self, shared_storage):
+        return [{'student': s} for s in shared_storage['school'][self.params['cls']]]
+
+    def post(self, shared_storage, prep_result, exec_result):
+        with shared_storage['lock']:
+            shared_storage['log'].append(('class', self.params['cls'], None))
+            scores = shared_storage['results'][self.params['cls']]
+            shared_storage.setdefault('complete', []).append(len(scores) == len(prep_result))
+            shared_storage.setdefault('averages', {})[self.params['cls']] = sum(scores.values()) / len(scores)
+        return 'default'
+
+class School(WorkStealingBatchFlow):
+    def prep(self, shared_storage):
+        return [{'cls': c} for c in shared_storage['school']]
+
+    def post(self, shared_storage, prep_result, exec_result):
+        shared_storage['log'].append(('school', None, None))
+        shared_storage['done'] = True
+
+def make_shared(school):
+    return {'school': school, 'lock': threading.Lock(), 'log': [], 'results': {}}
+
+SKEWED = {'a': ['s%d' % i for i in range(8)], 'b': ['x'], 'c': ['yy'], 'd': ['zzz']}
+
+class TestWorkStealingBatchFlow(unittest.TestCase):
+    def test_matches_sequential_results(self):
+        expected = make_shared(SKEWED)
+        class SequentialSchool(BatchFlow):
+            prep = School.prep
+            post = School.post
+        SequentialSchool(start=ClassBatch(start=GradeNode())).run(expected)
+        shared_storage = make_shared(SKEWED)
+        School(start=ClassBatch(start=GradeNode()), max_workers=4).run(shared_storage)
+        self.assertEqual(shared_storage['results'], expected['results'])
+        self.assertEqual(shared_storage['averages'], expected['averages'])
+        self.assertTrue(shared_storage['done'])
+
+    def test_level_post_runs_after_its_children(self):
+        shared_storage = make_shared(SKEWED)
+        School(start=ClassBatch(start=GradeNode()), max_workers=4).run(shared_storage)
+        log = shared_storage['log']
+        self.assertEqual(log[-1], ('school', None, None))
+        for cls, students in SKEWED.items():
+            class_at = log.index(('class', cls, None))
+            for s in students:
+                self.assertLess(log.index(('student', cls, s)), class_at)
+        self.assertTrue(all(shared_storage['complete']))
+
+    def test_skewed_children_are_stolen(self):
+        shared_storage = make_shared(SKEWED)
+        start = time.perf_counter()
+        School(start=ClassBatch(start=GradeNode()), max_workers=4).run(shared_storage)
+        elapsed = time.perf_counter() - start
+        # 11 students * 50ms on 4 workers; parallelizing only classes would take 8 * 50ms
+        self.assertLess(elapsed, 0.3)
+
+    def test_chain_after_nested_level(self):
+        class Tally(Node):
+            def prep(self, shared_storage):
+                with shared_storage['lock']:
+                    shared_storage.setdefault('tallied', []).append(self.params['cls'])
+
+        class_flow = ClassBatch(start=GradeNode())
+        class_flow >> Tally()
+        shared_storage = make_shared(SKEWED)
+        School(start=class_flow, max_workers=3).run(shared_storage)
+        self.assertEqual(sorted(shared_storage['tallied']), sorted(SKEWED))
+
+    def test_empty_levels(self):
+        shared_storage = make_shared({'a': [], 'b': ['x']})
+
+        class SafeClassBatch(ClassBatch):
+            def post(self, shared_storage, prep_result, exec_result):
+                shared_storage['log'].append(('class', self.params['cls'], None))
+
+        School(start=SafeClassBatch(start=GradeNode()), max_workers=2).run(shared_storage)
+        self.assertIn(('class', 'a', None), shared_storage['log'])
+        self.assertEqual(shared_storage['results'], {'b': {'x': 1}})
+        self.assertTrue(shared_storage['done'])
+        self.assertEqual(School(start=GradeNode()).run(make_shared({})), None)
+
+    def test_plain_sub_flow_runs_as_a_unit(self):
+        inner = ClassBatch(start=GradeNode())
+        shared_storage = make_shared({'a': ['x', 'y']})
+        School(start=Flow(start=inner), max_workers=2).run(shared_storage)
+        self.assertEqual(shared_storage['results'], {'a': {'x': 1, 'y': 1}})
+
+    def test_error_propagates(self):
+        class Boom(Node):
+            def exec(self, prep_result):
+                if self.params['student'] == 's3':
+                    raise ValueError("boom")
+
+        with self.assertRaisesRegex(ValueError, "boom"):
+            School(start=ClassBatch(start=Boom()), max_workers=4).run(make_shared(SKEWED))
+
+    def test_flow_timeout_reaches_workers(self):
+        class Slow(Node):
+            def exec(self, prep_result):
+                time.sleep(0.3)
+
+        school = School(start=ClassBatch(start=Slow()), max_workers=2)
+        school.timeout = 0.05
+        with self.assertRaises(NodeTimeout):
+            school.run(make_shared({'a': ['x']}))
+
+if __name__ == '__main__':
+    unittest.main()